@@ -0,0 +1,255 @@
+import asyncio
+import heapq
+import itertools
+import math
+import os
+import time
+import weakref
+from contextlib import asynccontextmanager
+from admission.rate_limit import TokenBucket, ClientRateLimiter
+from telemetry.metrics import registry
+
+INTERACTIVE = 0
+BATCH = 1
+PRIORITY_NAMES = {INTERACTIVE: "interactive", BATCH: "batch"}
+
+# Upstream calls budgeted per question: two-pass agents make a tool-decision call and an answer call
+CALLS_PER_QUESTION = 2
+
+_wait_seconds = registry.histogram("tutor_admission_wait_seconds", "Time requests spent in the admission queue", ("priority",))
+_admitted_total = registry.counter("tutor_admission_admitted_total", "Requests admitted to the agents", ("priority",))
+_rejections_total = registry.counter("tutor_admission_rejections_total", "Requests refused with 429, by reason", ("reason",))
+_bypassed_total = registry.counter("tutor_admission_bypassed_total", "Requests answered from the answer cache or an identical in-flight question without queueing")
+
+class Overloaded(Exception):
+    """The request was refused; the client should retry after retry_after seconds"""
+
+    def __init__(self, reason: str, retry_after: float):
+        super().__init__(f"Too many requests ({reason}), retry in {math.ceil(retry_after)}s")
+        self.reason = reason
+        self.retry_after = retry_after
+
+class _Waiter:
+    __slots__ = ("priority", "sequence", "cost", "future")
+
+    def __init__(self, priority: int, sequence: int, cost: float, future: asyncio.Future):
+        self.priority = priority
+        self.sequence = sequence
+        self.cost = cost
+        self.future = future
+
+    def __lt__(self, other):
+        return (self.priority, self.sequence) < (other.priority, other.sequence)
+
+class _LoopQueue:
+    """Queue state of one event loop (futures and timers cannot cross loops)"""
+
+    def __init__(self):
+        self.heap = []
+        self.waiting = 0
+        self.queued_cost = 0.0
+        self.in_flight = 0
+        self.wakeup = None
+
+class AdmissionController:
+    """
+    Decides which requests reach the agents, and when.
+
+    Each client has a token bucket, so one student cannot starve the class,
+    and each address has a larger one capping all the clients behind it.
+    At most max_concurrent requests run at once, and together they may only
+    spend the upstream budget (LLM calls per second). Requests beyond that wait
+    in a bounded priority queue, interactive questions ahead of batches. A
+    request that cannot be admitted within queue_timeout is refused up front
+    with Overloaded, since a fast 429 beats a slow timeout.
+    """
+
+    def __init__(self, max_concurrent: int, queue_size: int, queue_timeout: float,
+                 upstream: TokenBucket = None, clients: ClientRateLimiter = None,
+                 addresses: ClientRateLimiter = None):
+        self.max_concurrent = max_concurrent
+        self.queue_size = queue_size
+        self.queue_timeout = queue_timeout
+        self.upstream = upstream
+        self.clients = clients
+        self.addresses = addresses
+        self._queues = weakref.WeakKeyDictionary()
+        self._sequence = itertools.count()
+        # Smoothed time a request holds its slot, used to estimate queue waits
+        self._service_seconds = 1.0
+
+    def _queue(self) -> _LoopQueue:
+        loop = asyncio.get_running_loop()
+        queue = self._queues.get(loop)
+        if queue is None:
+            queue = self._queues[loop] = _LoopQueue()
+        return queue
+
+    def _reject(self, reason: str, retry_after: float):
+        _rejections_total.inc(reason=reason)
+        raise Overloaded(reason, max(1.0, retry_after))
+
+    def check_client(self, address: str, client_id: str = None):
+        """
+        Charge one request to the client's bucket and its address's, raising Overloaded if either is empty.
+
+        A client is its address, or a sub-bucket of it when the browser sent a
+        client ID. IDs are not authenticated, so the address bucket caps what
+        all of them together (or one client rotating IDs) may ask.
+        """
+        if self.clients is not None:
+            wait = self.clients.try_acquire(f"{address}/{client_id}" if client_id else address)
+            if wait:
+                self._reject("client_rate", wait)
+        if self.addresses is not None:
+            wait = self.addresses.try_acquire(address)
+            if wait:
+                self._reject("address_rate", wait)
+
+    def record_bypass(self):
+        _bypassed_total.inc()
+
+    def _estimated_wait(self, queue: _LoopQueue, cost: float) -> float:
+        slot_wait = 0.0
+        if queue.in_flight >= self.max_concurrent:
+            slot_wait = (queue.waiting + 1) / self.max_concurrent * self._service_seconds
+        budget_wait = self.upstream.wait_time(queue.queued_cost + cost) if self.upstream is not None else 0.0
+        return max(slot_wait, budget_wait)
+
+    def _dispatch(self, queue: _LoopQueue):
+        """Admit waiters in priority order while slots and upstream budget allow"""
+        if queue.wakeup is not None:
+            queue.wakeup.cancel()
+            queue.wakeup = None
+        while queue.heap and queue.in_flight < self.max_concurrent:
+            waiter = queue.heap[0]
+            if waiter.future.done():
+                # Timed out or cancelled; its counters were already adjusted
+                heapq.heappop(queue.heap)
+                continue
+            if self.upstream is not None:
+                wait = self.upstream.try_acquire(waiter.cost)
+                if wait:
+                    queue.wakeup = asyncio.get_running_loop().call_later(wait, self._dispatch, queue)
+                    return
+            heapq.heappop(queue.heap)
+            queue.waiting -= 1
+            queue.queued_cost -= waiter.cost
+            queue.in_flight += 1
+            waiter.future.set_result(None)
+
+    def _abandon(self, queue: _LoopQueue, waiter: _Waiter):
+        queue.waiting -= 1
+        queue.queued_cost -= waiter.cost
+        # The head may have been blocking others on budget it no longer needs
+        self._dispatch(queue)
+
+    async def acquire(self, priority: int = INTERACTIVE, cost: float = CALLS_PER_QUESTION):
+        """Wait for a slot and cost upstream calls of budget; pair with release()"""
+        queue = self._queue()
+        if self.upstream is not None:
+            cost = min(cost, self.upstream.burst)
+        name = PRIORITY_NAMES.get(priority, str(priority))
+
+        if not queue.waiting and queue.in_flight < self.max_concurrent and (self.upstream is None or not self.upstream.try_acquire(cost)):
+            queue.in_flight += 1
+            _admitted_total.inc(priority=name)
+            _wait_seconds.observe(0.0, priority=name)
+            return
+
+        if queue.waiting >= self.queue_size:
+            self._reject("queue_full", self._estimated_wait(queue, cost))
+        estimate = self._estimated_wait(queue, cost)
+        if estimate > self.queue_timeout:
+            self._reject("overloaded", estimate)
+
+        waiter = _Waiter(priority, next(self._sequence), cost, asyncio.get_running_loop().create_future())
+        heapq.heappush(queue.heap, waiter)
+        queue.waiting += 1
+        queue.queued_cost += cost
+        self._dispatch(queue)
+
+        started = time.perf_counter()
+        try:
+            await asyncio.wait_for(waiter.future, self.queue_timeout)
+        except asyncio.TimeoutError:
+            self._abandon(queue, waiter)
+            self._reject("queue_timeout", self._estimated_wait(queue, cost))
+        except asyncio.CancelledError:
+            if waiter.future.done() and not waiter.future.cancelled():
+                # Admitted just as the caller went away
+                self.release()
+            else:
+                self._abandon(queue, waiter)
+            raise
+        _admitted_total.inc(priority=name)
+        _wait_seconds.observe(time.perf_counter() - started, priority=name)
+
+    def release(self, held_seconds: float = None):
+        queue = self._queue()
+        queue.in_flight -= 1
+        if held_seconds is not None:
+            self._service_seconds = 0.9 * self._service_seconds + 0.1 * held_seconds
+        self._dispatch(queue)
+
+    @asynccontextmanager
+    async def admit(self, priority: int = INTERACTIVE, cost: float = CALLS_PER_QUESTION):
+        """Hold an admission slot for the duration of the block"""
+        await self.acquire(priority, cost)
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.release(time.perf_counter() - started)
+
+    def depth(self) -> tuple:
+        """(waiting, in flight) summed over event loops"""
+        queues = list(self._queues.values())
+        return sum(queue.waiting for queue in queues), sum(queue.in_flight for queue in queues)
+
+    def stats(self) -> dict:
+        waiting, in_flight = self.depth()
+        return {
+            "waiting": waiting,
+            "in_flight": in_flight,
+            "max_concurrent": self.max_concurrent,
+            "queue_size": self.queue_size,
+            "queue_timeout_seconds": self.queue_timeout,
+            "service_seconds": round(self._service_seconds, 4),
+            "upstream_tokens": round(self.upstream.available, 2) if self.upstream is not None else None,
+            "tracked_clients": len(self.clients) if self.clients is not None else None,
+            "tracked_addresses": len(self.addresses) if self.addresses is not None else None,
+        }
+
+_admission = None
+
+def get_admission():
+    """Return the process-wide admission controller configured from ADMISSION_* / RATE_LIMIT_* / LLM_QPS_*, or None when disabled"""
+    global _admission
+    if os.getenv("ADMISSION_CONTROL", "on") == "off":
+        return None
+    if _admission is None:
+        per_minute = float(os.getenv("RATE_LIMIT_PER_MINUTE", "20"))
+        per_address = float(os.getenv("RATE_LIMIT_PER_ADDRESS_PER_MINUTE", "200"))
+        qps = float(os.getenv("LLM_QPS_BUDGET", "10"))
+        _admission = AdmissionController(
+            max_concurrent=int(os.getenv("ADMISSION_MAX_CONCURRENT", "32")),
+            queue_size=int(os.getenv("ADMISSION_QUEUE_SIZE", "200")),
+            queue_timeout=float(os.getenv("ADMISSION_QUEUE_TIMEOUT_SECONDS", "15")),
+            upstream=TokenBucket(qps, float(os.getenv("LLM_QPS_BURST", str(2 * qps)))) if qps > 0 else None,
+            clients=ClientRateLimiter(per_minute, float(os.getenv("RATE_LIMIT_BURST", "10"))) if per_minute > 0 else None,
+            addresses=ClientRateLimiter(per_address, float(os.getenv("RATE_LIMIT_ADDRESS_BURST", "60"))) if per_address > 0 else None,
+        )
+    return _admission
+
+def _collect_queue_metrics():
+    admission = _admission
+    if admission is None:
+        return
+    waiting, in_flight = admission.depth()
+    yield ("tutor_admission_queue_depth", "gauge", "Requests waiting in the admission queue", [({}, waiting)])
+    yield ("tutor_admission_in_flight", "gauge", "Admitted requests currently being answered", [({}, in_flight)])
+    if admission.upstream is not None:
+        yield ("tutor_llm_budget_tokens", "gauge", "Upstream LLM calls the QPS budget can start right now", [({}, admission.upstream.available)])
+
+registry.add_collector(_collect_queue_metrics)
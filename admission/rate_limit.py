@@ -0,0 +1,76 @@
+import threading
+import time
+from collections import OrderedDict
+
+class TokenBucket:
+    """
+    Classic token bucket: holds up to `burst` tokens, refilled at `rate` per second.
+
+    Thread-safe and independent of any event loop, so one bucket can be
+    shared by the whole process.
+    """
+
+    def __init__(self, rate: float, burst: float, clock=time.monotonic):
+        self.rate = rate
+        self.burst = burst
+        self._clock = clock
+        self._tokens = burst
+        self._updated = clock()
+        self._lock = threading.Lock()
+
+    def _refill(self, now: float):
+        self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def try_acquire(self, tokens: float = 1) -> float:
+        """Take tokens if available and return 0, otherwise return the seconds until they will be"""
+        with self._lock:
+            now = self._clock()
+            self._refill(now)
+            if self._tokens >= tokens:
+                self._tokens -= tokens
+                return 0.0
+            return (tokens - self._tokens) / self.rate
+
+    def wait_time(self, tokens: float = 1) -> float:
+        """Seconds until tokens would be available, without taking them"""
+        with self._lock:
+            self._refill(self._clock())
+            return max(0.0, (tokens - self._tokens) / self.rate)
+
+    @property
+    def available(self) -> float:
+        with self._lock:
+            self._refill(self._clock())
+            return self._tokens
+
+class ClientRateLimiter:
+    """
+    One token bucket per client key, e.g. a browser ID or an IP address.
+
+    Buckets of the least recently seen clients are dropped beyond max_clients;
+    a dropped client simply starts again with a full bucket.
+    """
+
+    def __init__(self, per_minute: float, burst: float, max_clients: int = 10000, clock=time.monotonic):
+        self.rate = per_minute / 60
+        self.burst = burst
+        self.max_clients = max_clients
+        self._clock = clock
+        self._buckets = OrderedDict()
+        self._lock = threading.Lock()
+
+    def try_acquire(self, client: str) -> float:
+        """Return 0 if the client may make a request now, otherwise the seconds to wait"""
+        with self._lock:
+            bucket = self._buckets.get(client)
+            if bucket is None:
+                bucket = self._buckets[client] = TokenBucket(self.rate, self.burst, self._clock)
+                if len(self._buckets) > self.max_clients:
+                    self._buckets.popitem(last=False)
+            else:
+                self._buckets.move_to_end(client)
+        return bucket.try_acquire()
+
+    def __len__(self):
+        return len(self._buckets)
@@ -1,10 +1,41 @@
-import google.generativeai as genai
 import os
 import re
-from dotenv import load_dotenv
+from llm.client import generate_answer
+from cache.tool_cache import memoize_tool, lowercase
+from tools.chemical_balancer import balance_equation, format_equation, FormulaError
+from tools.functional_groups import find_compound, find_functional_groups
+from agents.single_pass import agent_mode, answer_in_single_pass, SINGLE_PASS
+from agents.structured import StructuredResult, generate_structured
+from telemetry.tracing import record_fallback
 
-load_dotenv()
-genai.configure(api_key=os.getenv("GEMINI_API_KEY"))
+# A reaction written with "->", e.g. "H2 + O2 -> H2O"
+EQUATION_PATTERN = re.compile(r'([A-Za-z0-9\s\+\(\)\[\]·]+\s*->\s*[A-Za-z0-9\s\+\(\)\[\]·]+)')
+# Older compound-name heuristic, for names the local parser doesn't know
+COMPOUND_NAME_PATTERN = re.compile(r'([A-Za-z0-9\-]+ol|[A-Za-z0-9\-]+ane|[A-Za-z0-9\-]+ene|[A-Za-z0-9\-]+oic acid|[A-Za-z0-9\-]+aldehyde|[A-Za-z0-9\-]+one|[A-Za-z0-9\-]+amine)', re.IGNORECASE)
+# Detect functional groups locally for compounds the parser understands; "0" always asks the model
+LOCAL_FUNCTIONAL_GROUPS = os.getenv("LOCAL_FUNCTIONAL_GROUPS", "1") == "1"
+NO_FUNCTIONAL_GROUPS = "none (only C–C and C–H single bonds)"
+
+class ChemistryDecision(StructuredResult):
+    """Which specialised tool, if any, a chemistry question calls for"""
+
+    schema = {
+        "type": "object",
+        "properties": {
+            "question_type": {"type": "string", "enum": ["equation_balancing", "functional_groups", "general"]},
+            "extract": {"type": "string"},
+        },
+        "required": ["question_type"],
+    }
+
+class FunctionalGroups(StructuredResult):
+    """The functional groups found in a compound"""
+
+    schema = {
+        "type": "object",
+        "properties": {"functional_groups": {"type": "array", "items": {"type": "string"}}},
+        "required": ["functional_groups"],
+    }
 
 def balance_chemical_equation(equation: str) -> str:
     """Attempt to balance a chemical equation"""
@@ -13,37 +44,90 @@ def balance_chemical_equation(equation: str) -> str:
         if not re.search(r'[A-Z][a-z]?\d*', equation) or not '->' in equation:
             return None
             
-        # Use Gemini to balance the equation
-        model = genai.GenerativeModel("gemini-2.0-flash")
-        prompt = f"""
-        Balance this chemical equation: {equation}
-        
-        Return only the balanced equation, with coefficients as needed.
-        """
-        response = model.generate_content(prompt)
-        return response.text.strip()
-    except Exception:
+        # Balance locally by solving the element-count matrix
+        return format_equation(*balance_equation(equation))
+    except FormulaError:
+        return None
+
+def balance_equation_in_text(text: str) -> str:
+    """
+    Balance the reaction written with "->" somewhere in text, or return None.
+
+    EQUATION_PATTERN also takes in the words before the formulas ("Balance
+    the equation Fe + O2 -> ..."), so they are dropped one at a time until
+    what is left balances.
+    """
+    match = EQUATION_PATTERN.search(text)
+    if not match:
+        return None
+    words = match.group(1).split()
+    for start in range(words.index("->") if "->" in words else len(words)):
+        balanced = balance_chemical_equation(" ".join(words[start:]))
+        if balanced:
+            return balanced
+    return None
+
+def detect_functional_groups_locally(compound: str):
+    """Functional groups found by the local structure parser, or None when it can't parse the compound"""
+    groups = find_functional_groups(compound) if LOCAL_FUNCTIONAL_GROUPS else None
+    if groups is None:
         return None
+    return {"compound": compound, "functional_groups": groups or [NO_FUNCTIONAL_GROUPS]}
 
-def identify_functional_groups(compound: str) -> dict:
+async def identify_functional_groups(compound: str) -> dict:
     """Identify functional groups in an organic compound"""
+    # Names, SMILES and condensed formulas the parser understands need no model call
+    return detect_functional_groups_locally(compound) or await _identify_with_model(compound)
+
+@memoize_tool("identify_functional_groups", normalize=lowercase, should_cache=lambda result: bool(result["functional_groups"]))
+async def _identify_with_model(compound: str) -> dict:
     try:
         # Use Gemini to identify functional groups
-        model = genai.GenerativeModel("gemini-2.0-flash")
         prompt = f"""
         Identify all functional groups present in this organic compound: {compound}
         
-        Return the result as a comma-separated list of functional groups.
+        Respond in JSON format like this:
+        {{"functional_groups": ["list of functional group names"]}}
         """
-        response = model.generate_content(prompt)
-        groups = [group.strip() for group in response.text.split(',')]
-        return {"compound": compound, "functional_groups": groups}
+        result = await generate_structured(prompt, FunctionalGroups, agent="chemistry", stage="functional_groups")
+        if result is None:
+            record_fallback("chemistry", "unparseable_functional_groups")
+            return {"compound": compound, "functional_groups": []}
+        return {"compound": compound, "functional_groups": result.functional_groups}
     except Exception:
+        record_fallback("chemistry", "functional_groups_failed")
         return {"compound": compound, "functional_groups": []}
 
-def handle_chemistry_question(question: str) -> str:
+def local_functional_groups(question: str):
+    """Summarise the locally detected functional groups of a question's compound, or None when there are none"""
+    if "functional group" not in question.lower():
+        return None
+    compound = find_compound(question)
+    result = detect_functional_groups_locally(compound) if compound else None
+    if result is None:
+        return None
+    return f"The compound {compound} contains these functional groups: {', '.join(result['functional_groups'])}"
+
+async def handle_chemistry_question(question: str) -> str:
     """Handle chemistry questions using specialized tools when appropriate"""
-    model = genai.GenerativeModel("gemini-2.0-flash")
+    if agent_mode("chemistry") == SINGLE_PASS:
+        return await answer_in_single_pass(
+            question,
+            agent="chemistry",
+            context=local_functional_groups(question),
+            persona="You are a chemistry professor answering a student's question.",
+            instructions="""Provide a comprehensive explanation that addresses the core chemistry concepts involved.
+    For equation balancing, explain the law of conservation of mass, how to count atoms on each side and the systematic approach to balancing.
+    For functional groups, explain what each group is, its properties and how it affects the molecule's behavior.""",
+            tools={
+                "balance_equation": {
+                    "description": "Balances a chemical equation written with '->'.",
+                    "arguments": '{"equation": "e.g. H2 + O2 -> H2O"}',
+                    "run": lambda args: balance_equation_in_text(args["equation"]),
+                },
+            },
+        )
+
     
     # First, analyze if this is a specialized chemistry question
     analysis_prompt = f"""
@@ -60,42 +144,37 @@ def handle_chemistry_question(question: str) -> str:
     {{"question_type": "equation_balancing/functional_groups/general", "extract": "extracted equation or compound if applicable"}}
     """
     
-    analysis_response = model.generate_content(analysis_prompt)
+    analysis = await generate_structured(analysis_prompt, ChemistryDecision, agent="chemistry")
+    if analysis is None:
+        # The decision call was wasted; answer as a general question
+        record_fallback("chemistry", "unparseable_decision")
     
     try:
-        # Extract the analysis as text and try to parse it
-        analysis_text = analysis_response.text
-        
         # Check for equation balancing
-        if "equation_balancing" in analysis_text and "->" in question:
-            # Extract the equation using regex
-            equation_match = re.search(r'([A-Za-z0-9\s\+\(\)]+\s*->\s*[A-Za-z0-9\s\+\(\)]+)', question)
-            if equation_match:
-                equation = equation_match.group(1).strip()
-                balanced_equation = balance_chemical_equation(equation)
+        if analysis and analysis.question_type == "equation_balancing" and "->" in question:
+            # Extract the equation from the question and balance it
+            balanced_equation = balance_equation_in_text(question)
+            if balanced_equation:
+                final_prompt = f"""
+                You are a chemistry professor explaining how to balance equations. The question was: {question}
                 
-                if balanced_equation:
-                    final_prompt = f"""
-                    You are a chemistry professor explaining how to balance equations. The question was: {question}
-                    
-                    The balanced equation is: {balanced_equation}
-                    
-                    Explain step by step how to balance this equation, discussing:
-                    1. The law of conservation of mass
-                    2. How to count atoms on each side
-                    3. The systematic approach to balancing
-                    """
-                    
-                    final_response = model.generate_content(final_prompt)
-                    return final_response.text
+                The balanced equation is: {balanced_equation}
+                
+                Explain step by step how to balance this equation, discussing:
+                1. The law of conservation of mass
+                2. How to count atoms on each side
+                3. The systematic approach to balancing
+                """
+                
+                return await generate_answer(final_prompt)
         
         # Check for functional group identification
-        if "functional_groups" in analysis_text:
+        if analysis and analysis.question_type == "functional_groups":
             # Look for organic compound names or formulas
-            compound_match = re.search(r'([A-Za-z0-9\-]+ol|[A-Za-z0-9\-]+ane|[A-Za-z0-9\-]+ene|[A-Za-z0-9\-]+oic acid|[A-Za-z0-9\-]+aldehyde|[A-Za-z0-9\-]+one|[A-Za-z0-9\-]+amine)', question, re.IGNORECASE)
-            if compound_match:
-                compound = compound_match.group(1).strip()
-                result = identify_functional_groups(compound)
+            compound_match = COMPOUND_NAME_PATTERN.search(question)
+            compound = find_compound(question) or (compound_match.group(1).strip() if compound_match else None)
+            if compound:
+                result = await identify_functional_groups(compound)
                 
                 if result and result["functional_groups"]:
                     groups_text = ", ".join(result["functional_groups"])
@@ -107,12 +186,11 @@ def handle_chemistry_question(question: str) -> str:
                     Explain what each of these functional groups is, their properties, and how they affect the overall molecule's behavior.
                     """
                     
-                    final_response = model.generate_content(final_prompt)
-                    return final_response.text
+                    return await generate_answer(final_prompt)
     
     except Exception as e:
         # If there's any error in parsing or processing, fall back to general answer
-        pass
+        record_fallback("chemistry", "tool_error")
     
     # For general chemistry questions or if specialized tools failed
     chemistry_prompt = f"""
@@ -127,5 +205,4 @@ def handle_chemistry_question(question: str) -> str:
     Be educational, accurate, and engaging in your response.
     """
     
-    response = model.generate_content(chemistry_prompt)
-    return response.text
+    return await generate_answer(chemistry_prompt)
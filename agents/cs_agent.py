@@ -1,17 +1,60 @@
-import google.generativeai as genai
+import asyncio
 import os
 import re
-import json
-from dotenv import load_dotenv
+from llm.client import generate_answer
+from llm.resilience import is_unavailable
+from cache.tool_cache import memoize_tool, lowercase
+from agents.single_pass import agent_mode, answer_in_single_pass, SINGLE_PASS
+from agents.structured import StructuredResult, generate_structured
+from telemetry.tracing import record_fallback
+from tools.code_analyzer import analyze_code_locally
 
-load_dotenv()
-genai.configure(api_key=os.getenv("GEMINI_API_KEY"))
+# Review code with the local analyzer first, asking Gemini only for languages it doesn't support
+LOCAL_CODE_ANALYSIS = os.getenv("LOCAL_CODE_ANALYSIS", "1") == "1"
 
-def analyze_code(code: str) -> dict:
-    """Analyze code for errors and improvements"""
+class CodeAnalysis(StructuredResult):
+    """A review of a code snippet: its language, errors, suggested improvements and complexity"""
+
+    schema = {
+        "type": "object",
+        "properties": {
+            "language": {"type": "string"},
+            "errors": {"type": "array", "items": {"type": "string"}},
+            "improvements": {"type": "array", "items": {"type": "string"}},
+            "complexity": {"type": "string"},
+        },
+        "required": ["language", "errors", "improvements"],
+    }
+
+class CSDecision(StructuredResult):
+    """Which specialised tool, if any, a computer science question calls for"""
+
+    schema = {
+        "type": "object",
+        "properties": {
+            "question_type": {"type": "string", "enum": ["code_analysis", "algorithm", "general"]},
+            "extract": {"type": "string"},
+        },
+        "required": ["question_type"],
+    }
+
+def extract_code(question: str):
+    """Return the code snippet in a question, fenced or not, or None"""
+    # A fence's language tag ("```python") is only a tag when the code starts on the next line
+    code_match = re.search(r'```(?:[\w+#-]*[ \t]*\n)?\s*([\s\S]+?)```', question)
+    if not code_match:
+        # Try to find code without markdown formatting
+        code_match = re.search(r'((?:(?:public|private|protected|class|def|function|var|let|const)[\s\S]*?[{;])|(?:for|while|if)[\s\S]*?[{;])', question)
+    return code_match.group(1).strip() if code_match else None
+
+async def analyze_code(code: str):
+    """Analyze code for errors and improvements, returning a CodeAnalysis or None"""
+    if LOCAL_CODE_ANALYSIS:
+        local = analyze_code_locally(code)
+        if local is not None:
+            return CodeAnalysis(local)
     try:
         # Use Gemini to analyze the code
-        model = genai.GenerativeModel("gemini-2.0-flash")
         prompt = f"""
         Analyze this code for errors and potential improvements:
         
@@ -27,72 +70,85 @@ def analyze_code(code: str) -> dict:
             "complexity": "assessment of time/space complexity if applicable"
         }}
         """
-        response = model.generate_content(prompt)
-        
-        # Try to parse as JSON, but handle cases where it's not valid JSON
-        try:
-            return json.loads(response.text)
-        except json.JSONDecodeError:
-            # Extract structured data using regex if JSON parsing fails
-            language_match = re.search(r'"language":\s*"([^"]+)"', response.text)
-            language = language_match.group(1) if language_match else "unknown"
-            
-            errors = []
-            improvements = []
-            complexity = "unknown"
-            
-            # Extract other fields using regex
-            errors_match = re.findall(r'"errors":\s*\[(.*?)\]', response.text, re.DOTALL)
-            if errors_match:
-                errors = re.findall(r'"([^"]+)"', errors_match[0])
-                
-            improvements_match = re.findall(r'"improvements":\s*\[(.*?)\]', response.text, re.DOTALL)
-            if improvements_match:
-                improvements = re.findall(r'"([^"]+)"', improvements_match[0])
-                
-            complexity_match = re.search(r'"complexity":\s*"([^"]+)"', response.text)
-            if complexity_match:
-                complexity = complexity_match.group(1)
-                
-            return {
-                "language": language,
-                "errors": errors,
-                "improvements": improvements,
-                "complexity": complexity
-            }
-    except Exception as e:
-        return {
-            "language": "unknown",
-            "errors": ["Could not analyze code"],
-            "improvements": [],
-            "complexity": "unknown"
-        }
+        analysis = await generate_structured(prompt, CodeAnalysis, agent="cs", stage="analyze_code")
+        if analysis is None:
+            record_fallback("cs", "unparseable_code_analysis")
+        return analysis
+    except Exception:
+        record_fallback("cs", "code_analysis_failed")
+        return None
+
+COMMON_ALGORITHMS = [
+    "binary search", "linear search", "bubble sort", "insertion sort", 
+    "selection sort", "merge sort", "quick sort", "heap sort", 
+    "breadth-first search", "depth-first search", "dijkstra", 
+    "dynamic programming", "greedy algorithm", "backtracking"
+]
+
+@memoize_tool("explain_algorithm", normalize=lowercase)
+async def _generate_algorithm_explanation(algorithm_name: str) -> str:
+    # Use Gemini to explain the algorithm
+    prompt = f"""
+    Explain the {algorithm_name} algorithm in detail, covering:
+    
+    1. The problem it solves
+    2. How it works step-by-step
+    3. Its time and space complexity
+    4. Common use cases
+    5. Pseudocode implementation
+    
+    Make your explanation educational and clear.
+    """
+    return await generate_answer(prompt, stage="explain_algorithm")
 
-def explain_algorithm(algorithm_name: str) -> str:
-    """Explain a computer science algorithm"""
+async def explain_algorithm(algorithm_name: str):
+    """
+    Explain a computer science algorithm, or return None if the explanation failed.
+
+    When the LLM is unavailable the error propagates, so the question gets a
+    degraded answer that is never stored in the answer cache.
+    """
     try:
-        # Use Gemini to explain the algorithm
-        model = genai.GenerativeModel("gemini-2.0-flash")
-        prompt = f"""
-        Explain the {algorithm_name} algorithm in detail, covering:
-        
-        1. The problem it solves
-        2. How it works step-by-step
-        3. Its time and space complexity
-        4. Common use cases
-        5. Pseudocode implementation
-        
-        Make your explanation educational and clear.
-        """
-        response = model.generate_content(prompt)
-        return response.text
-    except Exception:
-        return f"I couldn't generate an explanation for the {algorithm_name} algorithm."
+        return await _generate_algorithm_explanation(algorithm_name)
+    except Exception as e:
+        if is_unavailable(e):
+            raise
+        record_fallback("cs", "explain_algorithm_failed")
+        return None
+
+async def warm_algorithm_explanations():
+    """Precompute the explanation of every common algorithm into the tool cache"""
+    await asyncio.gather(*(explain_algorithm(algorithm) for algorithm in COMMON_ALGORITHMS), return_exceptions=True)
 
-def handle_cs_question(question: str) -> str:
+def local_code_review(question: str):
+    """Summarise the local analyzer's review of the question's code, or None when there is none"""
+    code = extract_code(question)
+    review = analyze_code_locally(code) if code and LOCAL_CODE_ANALYSIS else None
+    if review is None:
+        return None
+    lines = [f"Automatic review of the {review['language']} code:"]
+    lines += [f"- Error: {error}" for error in review["errors"]] or ["- No errors found."]
+    lines += [f"- Improvement: {improvement}" for improvement in review["improvements"]]
+    lines.append(f"- Complexity: {review['complexity']}")
+    return "\n".join(lines)
+
+async def handle_cs_question(question: str) -> str:
     """Handle computer science questions using specialized tools when appropriate"""
-    model = genai.GenerativeModel("gemini-2.0-flash")
-    
+    if agent_mode("cs") == SINGLE_PASS:
+        # Algorithm explanations are themselves LLM prompts, so a single combined
+        # prompt replaces them; code is still reviewed locally up front
+        return await answer_in_single_pass(
+            question,
+            agent="cs",
+            context=local_code_review(question),
+            persona="You are a computer science professor answering a student's question.",
+            instructions="""Provide a comprehensive explanation that:
+    1. Addresses the core computer science concepts involved
+    2. If code is included, identifies its language, any errors, suggested improvements and its time/space complexity
+    3. If an algorithm is asked about, covers the problem it solves, how it works step-by-step, its complexity and pseudocode
+    4. Uses clear examples and code snippets where helpful""",
+        )
+
     # First, analyze if this is a specialized CS question
     analysis_prompt = f"""
     You are a computer science teaching assistant that can decide when to use specialized tools.
@@ -108,32 +164,27 @@ def handle_cs_question(question: str) -> str:
     {{"question_type": "code_analysis/algorithm/general", "extract": "extracted code or algorithm name if applicable"}}
     """
     
-    analysis_response = model.generate_content(analysis_prompt)
+    analysis = await generate_structured(analysis_prompt, CSDecision, agent="cs")
+    if analysis is None:
+        # The decision call was wasted; answer as a general question
+        record_fallback("cs", "unparseable_decision")
     
     try:
-        # Extract the analysis as text and try to parse it
-        analysis_text = analysis_response.text
-        
         # Check for code analysis
-        if "code_analysis" in analysis_text:
+        if analysis and analysis.question_type == "code_analysis":
             # Look for code blocks in the question
-            code_match = re.search(r'```(?:\w+)?\s*([\s\S]+?)```', question)
-            if not code_match:
-                # Try to find code without markdown formatting
-                code_match = re.search(r'((?:(?:public|private|protected|class|def|function|var|let|const)[\s\S]*?[{;])|(?:for|while|if)[\s\S]*?[{;])', question)
-            
-            if code_match:
-                code = code_match.group(1).strip()
-                analysis_result = analyze_code(code)
+            code = extract_code(question)
+            if code:
+                analysis_result = await analyze_code(code)
                 
                 if analysis_result:
-                    errors_text = "\n".join([f"- {error}" for error in analysis_result["errors"]]) if analysis_result["errors"] else "No errors found."
-                    improvements_text = "\n".join([f"- {improvement}" for improvement in analysis_result["improvements"]]) if analysis_result["improvements"] else "No specific improvements suggested."
+                    errors_text = "\n".join([f"- {error}" for error in analysis_result.errors]) if analysis_result.errors else "No errors found."
+                    improvements_text = "\n".join([f"- {improvement}" for improvement in analysis_result.improvements]) if analysis_result.improvements else "No specific improvements suggested."
                     
                     final_prompt = f"""
                     You are a computer science professor reviewing code. The question was: {question}
                     
-                    I've analyzed the code (detected as {analysis_result["language"]}):
+                    I've analyzed the code (detected as {analysis_result.language}):
                     
                     Errors:
                     {errors_text}
@@ -141,32 +192,28 @@ def handle_cs_question(question: str) -> str:
                     Suggested Improvements:
                     {improvements_text}
                     
-                    Complexity: {analysis_result["complexity"]}
+                    Complexity: {analysis_result.complexity or "not assessed"}
                     
                     Provide a detailed educational explanation that addresses these issues, explains the concepts involved, and teaches good programming practices.
                     """
                     
-                    final_response = model.generate_content(final_prompt)
-                    return final_response.text
+                    return await generate_answer(final_prompt)
         
         # Check for algorithm explanation
-        if "algorithm" in analysis_text:
+        if analysis and analysis.question_type == "algorithm":
             # Look for algorithm names
-            common_algorithms = [
-                "binary search", "linear search", "bubble sort", "insertion sort", 
-                "selection sort", "merge sort", "quick sort", "heap sort", 
-                "breadth-first search", "depth-first search", "dijkstra", 
-                "dynamic programming", "greedy algorithm", "backtracking"
-            ]
-            
-            for algorithm in common_algorithms:
+            for algorithm in COMMON_ALGORITHMS:
                 if algorithm.lower() in question.lower():
-                    explanation = explain_algorithm(algorithm)
-                    return explanation
+                    explanation = await explain_algorithm(algorithm)
+                    if explanation:
+                        return explanation
+                    break
     
     except Exception as e:
+        if is_unavailable(e):
+            raise
         # If there's any error in parsing or processing, fall back to general answer
-        pass
+        record_fallback("cs", "tool_error")
     
     # For general CS questions or if specialized tools failed
     cs_prompt = f"""
@@ -181,5 +228,4 @@ def handle_cs_question(question: str) -> str:
     Be educational, accurate, and engaging in your response.
     """
     
-    response = model.generate_content(cs_prompt)
-    return response.text
+    return await generate_answer(cs_prompt)
@@ -0,0 +1,65 @@
+import re
+from agents.chemistry_agent import balance_equation_in_text, local_functional_groups
+from agents.cs_agent import COMMON_ALGORITHMS, local_code_review
+from cache.tool_cache import get_tool_cache, lowercase
+from tools.calculator import solve_equation
+from tools.physics_calculator import solve_physics_problem
+
+UNAVAILABLE_NOTE = "(The tutor's language model is unavailable right now, so this is a shorter answer worked out locally. Please ask again in a little while for a full explanation.)"
+
+UNAVAILABLE_ANSWER = "Sorry, the tutor's language model is unavailable right now. Please try your question again in a little while."
+
+# Runs of numbers, single-letter variables and operators, e.g. "2x + 3 = 7" in "Solve 2x + 3 = 7 for x"
+MATH_RUN = re.compile(r"(?:\d+(?:\.\d+)?|(?<![A-Za-z])[a-z](?![A-Za-z])|[-+*/^()=.,]|[ \t])+")
+
+def _math_answer(question: str):
+    runs = [run.strip(" .,") for run in MATH_RUN.findall(question)]
+    candidates = [run for run in runs if re.search(r"\d", run) and re.search(r"[-+*/^=]", run)]
+    if not candidates:
+        return None
+    result = solve_equation(max(candidates, key=len))
+    return result if result.startswith("The ") else None
+
+def _physics_answer(question: str):
+    result = solve_physics_problem(question)
+    return None if result.startswith("I couldn't") else f"From the quantities in your question: {result}"
+
+def _chemistry_answer(question: str):
+    balanced = balance_equation_in_text(question)
+    if balanced:
+        return f"The balanced equation is {balanced}"
+    return local_functional_groups(question)
+
+async def _cs_answer(question: str):
+    review = local_code_review(question)
+    if review:
+        return review
+    cache = get_tool_cache()
+    if cache is None:
+        return None
+    for algorithm in COMMON_ALGORITHMS:
+        if algorithm in question.lower():
+            found, explanation = await cache.get("explain_algorithm", lowercase(algorithm))
+            if found:
+                return explanation
+    return None
+
+async def degraded_answer(subject: str, question: str) -> str:
+    """
+    Answer without the LLM, for when it is down or timing out.
+
+    Uses whatever local tool fits the subject (calculator, physics solver,
+    equation balancer, functional-group detector, code analyzer, cached algorithm explanations) and
+    otherwise says the tutor is unavailable.
+    """
+    if subject == "math":
+        answer = _math_answer(question)
+    elif subject == "physics":
+        answer = _physics_answer(question)
+    elif subject == "chemistry":
+        answer = _chemistry_answer(question)
+    elif subject == "cs":
+        answer = await _cs_answer(question)
+    else:
+        answer = None
+    return f"{answer}\n\n{UNAVAILABLE_NOTE}" if answer else UNAVAILABLE_ANSWER
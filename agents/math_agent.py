@@ -1,51 +1,67 @@
-import google.generativeai as genai
 from tools.calculator import solve_equation
-import os
-from dotenv import load_dotenv
-import json
+from llm.client import generate_answer
+from agents.single_pass import agent_mode, answer_in_single_pass, SINGLE_PASS
+from agents.structured import StructuredResult, generate_structured
+from telemetry.tracing import record_fallback
 
-load_dotenv()
-genai.configure(api_key=os.getenv("GEMINI_API_KEY"))
+class CalculatorDecision(StructuredResult):
+    """Whether a math question needs the calculator, and the expression or equations to give it"""
+
+    schema = {
+        "type": "object",
+        "properties": {
+            "needs_calculator": {"type": "boolean"},
+            "expression": {"type": "string"},
+        },
+        "required": ["needs_calculator"],
+    }
+
+async def handle_math_question(question: str) -> str:
+    if agent_mode("math") == SINGLE_PASS:
+        return await answer_in_single_pass(
+            question,
+            agent="math",
+            persona="You are a helpful math tutor.",
+            instructions="Provide a complete, educational answer that works through the problem step by step.",
+            tools={
+                "calculator": {
+                    "description": "Evaluates an arithmetic expression exactly, or solves linear/quadratic equations and linear systems.",
+                    "arguments": '{"expression": "e.g. 2^10 + 3(4+1), 2x+3=7 or x+y=3, x-y=1"}',
+                    "run": lambda args: solve_equation(args["expression"]),
+                },
+            },
+        )
 
-def handle_math_question(question: str) -> str:
-    model = genai.GenerativeModel("gemini-2.0-flash")
-    
     # First, ask Gemini to decide if we should use the calculator tool
     tool_decision_prompt = f"""
     You are a math tutor assistant that can decide when to use a calculator tool.
     
     Question: {question}
     
-    Does this question require a direct calculation? If yes, extract just the mathematical expression to calculate.
+    Does this question require a direct calculation? If yes, extract just the mathematical expression to calculate, or the equation(s) to solve (e.g. "2x+3=7", or "x+y=3, x-y=1" for a system).
     
     Respond in JSON format like this:
     {{"needs_calculator": true/false, "expression": "extracted expression if applicable"}}
     """
     
-    decision_response = model.generate_content(tool_decision_prompt)
-    
-    try:
-        decision = json.loads(decision_response.text)
+    decision = await generate_structured(tool_decision_prompt, CalculatorDecision, agent="math")
+    if decision is None:
+        # The decision call was wasted; answer directly
+        record_fallback("math", "unparseable_decision")
+    elif decision.needs_calculator and decision.expression:
+        # Use the calculator tool with the extracted expression
+        calculation_result = solve_equation(decision.expression)
+        
+        # Now ask Gemini to provide a complete answer using the calculation
+        final_prompt = f"""
+        You are a helpful math tutor. The question was: {question}
+        
+        I've calculated: {calculation_result}
+        
+        Please provide a complete, educational answer incorporating this calculation result.
+        """
         
-        if decision.get("needs_calculator", False) and decision.get("expression"):
-            # Use the calculator tool with the extracted expression
-            calculation_result = solve_equation(decision["expression"])
-            
-            # Now ask Gemini to provide a complete answer using the calculation
-            final_prompt = f"""
-            You are a helpful math tutor. The question was: {question}
-            
-            I've calculated: {calculation_result}
-            
-            Please provide a complete, educational answer incorporating this calculation result.
-            """
-            
-            final_response = model.generate_content(final_prompt)
-            return final_response.text
-    except (json.JSONDecodeError, AttributeError, KeyError):
-        # If there's any error in parsing or processing, fall back to direct answer
-        pass
+        return await generate_answer(final_prompt)
         
     # If we didn't use the calculator or there was an error, just answer directly
-    response = model.generate_content(f"You are a helpful math tutor. Answer this question thoroughly: {question}")
-    return response.text
+    return await generate_answer(f"You are a helpful math tutor. Answer this question thoroughly: {question}")
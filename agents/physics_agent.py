@@ -1,15 +1,38 @@
-import google.generativeai as genai
-import os
-from dotenv import load_dotenv
-import json
 from tools.physics_calculator import solve_physics_problem
+from llm.client import generate_answer
+from agents.single_pass import agent_mode, answer_in_single_pass, SINGLE_PASS
+from agents.structured import StructuredResult, generate_structured
+from telemetry.tracing import record_fallback
 
-load_dotenv()
-genai.configure(api_key=os.getenv("GEMINI_API_KEY"))
+class PhysicsAnalysis(StructuredResult):
+    """Whether a physics question needs a numerical calculation, its problem type and the concepts involved"""
+
+    schema = {
+        "type": "object",
+        "properties": {
+            "needs_calculation": {"type": "boolean"},
+            "problem_type": {"type": "string"},
+            "conceptual_elements": {"type": "array", "items": {"type": "string"}},
+        },
+        "required": ["needs_calculation"],
+    }
+
+async def handle_physics_question(question: str) -> str:
+    if agent_mode("physics") == SINGLE_PASS:
+        # The physics solver only needs the question text, so run it up front
+        # and let the model decide whether its result is relevant
+        return await answer_in_single_pass(
+            question,
+            agent="physics",
+            persona="You are a physics professor explaining a problem to a student.",
+            instructions="""Please provide a complete, educational answer that:
+    1. Explains the relevant physics concepts
+    2. Shows the approach to solving this problem step-by-step
+    3. Uses the calculator output above if it is relevant (ignore it if it is not)
+    4. Explains what the result means physically""",
+            context=f"Local physics calculator output: {solve_physics_problem(question)}",
+        )
 
-def handle_physics_question(question: str) -> str:
-    model = genai.GenerativeModel("gemini-2.0-flash")
-    
     # First, ask Gemini to analyze if this is a calculation-based physics problem
     analysis_prompt = f"""
     You are a physics teaching assistant that can decide when to use calculation tools.
@@ -23,33 +46,28 @@ def handle_physics_question(question: str) -> str:
     {{"needs_calculation": true/false, "problem_type": "kinematics/forces/energy/etc", "conceptual_elements": ["list of physics concepts involved"]}}
     """
     
-    analysis_response = model.generate_content(analysis_prompt)
-    
-    try:
-        analysis = json.loads(analysis_response.text)
+    analysis = await generate_structured(analysis_prompt, PhysicsAnalysis, agent="physics")
+    if analysis is None:
+        # The analysis call was wasted; explain conceptually instead
+        record_fallback("physics", "unparseable_analysis")
+    elif analysis.needs_calculation:
+        # Try to solve using our physics calculator tool
+        calculation_result = solve_physics_problem(question)
+        
+        # Ask Gemini to provide a complete educational answer incorporating the calculation
+        final_prompt = f"""
+        You are a physics professor explaining a problem to a student. The question was: {question}
+        
+        I've calculated: {calculation_result}
+        
+        Please provide a complete, educational answer that:
+        1. Explains the relevant physics concepts ({', '.join(analysis.conceptual_elements)})
+        2. Shows the approach to solving this problem step-by-step
+        3. Incorporates the calculation result
+        4. Explains what the result means physically
+        """
         
-        if analysis.get("needs_calculation", False):
-            # Try to solve using our physics calculator tool
-            calculation_result = solve_physics_problem(question)
-            
-            # Ask Gemini to provide a complete educational answer incorporating the calculation
-            final_prompt = f"""
-            You are a physics professor explaining a problem to a student. The question was: {question}
-            
-            I've calculated: {calculation_result}
-            
-            Please provide a complete, educational answer that:
-            1. Explains the relevant physics concepts ({', '.join(analysis.get('conceptual_elements', ['']))})
-            2. Shows the approach to solving this problem step-by-step
-            3. Incorporates the calculation result
-            4. Explains what the result means physically
-            """
-            
-            final_response = model.generate_content(final_prompt)
-            return final_response.text
-    except (json.JSONDecodeError, AttributeError, KeyError) as e:
-        # If there's any error in parsing or processing, fall back to direct answer
-        pass
+        return await generate_answer(final_prompt)
     
     # For conceptual questions or if calculation failed, provide a comprehensive explanation
     conceptual_prompt = f"""
@@ -62,5 +80,4 @@ def handle_physics_question(question: str) -> str:
     4. Connects the concept to real-world applications
     """
     
-    response = model.generate_content(conceptual_prompt)
-    return response.text
+    return await generate_answer(conceptual_prompt)
@@ -0,0 +1,102 @@
+import os
+import re
+import threading
+
+# Minimum confidence for a local routing decision; below it we ask the LLM
+CONFIDENCE_THRESHOLD = float(os.getenv("ROUTER_CONFIDENCE_THRESHOLD", "0.7"))
+FAST_PATH_ENABLED = os.getenv("ROUTER_FAST_PATH", "1") != "0"
+
+# (pattern, weight) pairs per subject, compiled once at import time
+SUBJECT_PATTERNS = {
+    "math": [
+        (r"\b(?:solve|simplify|factori[sz]e|integrate|differentiate|derivative|integral|equation|polynomial|quadratic|algebra|calculus|geometry|trigonometry|theorem|matrix|matrices|logarithm|fraction|percent(?:age)?|probability|prime number|square root)\b", 2),
+        (r"\d+(?:\.\d+)?\s*[-+*/^×÷]\s*\(?\d", 2),
+        (r"\b(?:sin|cos|tan|log|ln|sqrt)\s*\(", 2),
+        (r"\b(?:calculate|compute|evaluate|how many)\b", 1),
+        (r"\b[a-z]\s*=\s*-?\d|\d[a-z]\b", 1),
+    ],
+    "physics": [
+        (r"\b(?:force|velocity|acceleration|momentum|gravity|gravitational|friction|kinetic|potential energy|newton'?s?|projectile|inertia|torque|voltage|current|resistance|circuit|ohm'?s?|wavelength|frequency|optics|refraction|thermodynamics|quantum|relativity|displacement|free fall|pendulum)\b", 2),
+        (r"\d\s*(?-i:m/s²|m/s\^?2|m/s|km/h|kg|N|J|W|Pa|Hz|V|Ω|ohms?)(?![A-Za-z0-9])", 2),
+        (r"\b(?:physics|motion|energy|speed|mass|weight|power|work done)\b", 1),
+    ],
+    "chemistry": [
+        (r"(?-i:(?:\d*[A-Z][a-z]?[\d()]*)+(?:\s*\+\s*(?:\d*[A-Z][a-z]?[\d()]*)+)*)\s*(?:->|→|=>)", 3),
+        (r"\b(?:chemical|reaction|molecule|molecular|molar|moles?|stoichiometry|compound|periodic table|acid|alkali|ph|ions?|ionic|covalent|oxidation|reduction|redox|catalyst|functional groups?|organic|alkane|alkene|alkyne|alcohol|ester|aldehyde|ketone|amine|isotope|electron configuration|valence)\b", 2),
+        (r"(?-i:\b(?=[A-Za-z0-9]*\d)(?:[A-Z][a-z]?\d*){2,}\b)", 1),
+        (r"\b(?:chemistry|element|bond|solution|balance)\b", 1),
+    ],
+    "cs": [
+        (r"```|\bdef \w+\(|\bfunction \w+\(|\bclass \w+|#include|public static void|console\.log|System\.out", 3),
+        (r"\b(?:algorithm|data structures?|programming|python|javascript|java|c\+\+|recursion|linked list|binary tree|hash ?(?:map|table)|big[- ]o|time complexity|space complexity|compiler|database|sql|operating system|binary search|bubble sort|merge sort|quick ?sort|heap sort|dijkstra|breadth-first|depth-first|dynamic programming|debug(?:ging)?)\b", 2),
+        (r"\b(?:code|program|function|variable|loop|array|stack|queue|graph|sort(?:ing)?|software|api|ram|cpu|gpu|memory|computer|server|network|bug)\b", 1),
+    ],
+}
+
+GENERAL_PATTERN = re.compile(
+    r"^\s*(?:hi|hello|hey|good (?:morning|afternoon|evening)|thanks?|thank you|who are you|what(?:'s| is) your name|how are you)\b",
+    re.IGNORECASE,
+)
+
+# Patterns are case-insensitive; formula and unit fragments opt out with (?-i:...)
+_COMPILED_PATTERNS = {
+    subject: [(re.compile(pattern, re.IGNORECASE), weight) for pattern, weight in patterns]
+    for subject, patterns in SUBJECT_PATTERNS.items()
+}
+
+_stats_lock = threading.Lock()
+_decisions = {}
+
+def score_subjects(question: str) -> dict:
+    """Score each subject by the weighted number of patterns matching the question"""
+    return {
+        subject: sum(weight for pattern, weight in patterns if pattern.search(question))
+        for subject, patterns in _COMPILED_PATTERNS.items()
+    }
+
+def route_locally(question: str) -> tuple:
+    """
+    Pick a subject without calling the LLM.
+
+    Returns (subject, confidence). Confidence is the top score's share of the
+    top two scores, scaled down when the top score comes from a single weak
+    keyword so that e.g. "memory" alone never clears the threshold.
+    """
+    scores = score_subjects(question)
+    ranked = sorted(scores.items(), key=lambda item: item[1], reverse=True)
+    (best_subject, best_score), (_, second_score) = ranked[0], ranked[1]
+
+    if best_score == 0:
+        if GENERAL_PATTERN.search(question):
+            return "general", 0.9
+        return "general", 0.0
+
+    confidence = best_score / (best_score + second_score) * min(1.0, best_score / 2)
+    return best_subject, round(confidence, 3)
+
+def likely_subjects(question: str, limit: int = 1) -> list:
+    """The subjects with keyword matches, most likely first, for speculating on when the router is unsure"""
+    scores = score_subjects(question)
+    ranked = sorted((subject for subject, score in scores.items() if score > 0), key=lambda subject: -scores[subject])
+    return ranked[:limit]
+
+def record_decision(source: str, subject: str):
+    """Count a routing decision made by the given source ("local" or "llm")"""
+    with _stats_lock:
+        key = (source, subject)
+        _decisions[key] = _decisions.get(key, 0) + 1
+
+def router_stats() -> dict:
+    with _stats_lock:
+        local = sum(count for (source, _), count in _decisions.items() if source == "local")
+        total = sum(_decisions.values())
+        by_source = {}
+        for (source, subject), count in _decisions.items():
+            by_source.setdefault(source, {})[subject] = count
+    return {
+        "fast_path_enabled": FAST_PATH_ENABLED,
+        "confidence_threshold": CONFIDENCE_THRESHOLD,
+        "decisions": by_source,
+        "total": total,
+        "fast_path_hit_rate": round(local / total, 4) if total else 0.0,
+    }
@@ -0,0 +1,108 @@
+import inspect
+import json
+import os
+import re
+from llm.client import generate_answer
+from agents.structured import parse_json_object
+from telemetry.tracing import record_fallback
+
+TWO_PASS = "two_pass"
+SINGLE_PASS = "single_pass"
+
+# Placeholder the model writes where a tool's output belongs in its answer
+TOOL_RESULT_PLACEHOLDER = "[[TOOL_RESULT]]"
+
+JSON_RESPONSE_CONFIG = {"response_mime_type": "application/json"}
+
+_ANSWER_FIELD = re.compile(r'"answer"\s*:\s*"')
+# The complete characters and escapes at the start of a JSON string's body, short of a trailing high surrogate
+_STRING_BODY = re.compile(r'(?:[^"\\]|\\["\\/bfnrt]|\\u(?![dD][89abAB])[0-9a-fA-F]{4}|\\u[dD][89abAB][0-9a-fA-F]{2}\\u[0-9a-fA-F]{4})*')
+
+def streamable_answer(text: str) -> str:
+    """
+    The answer a single-pass reply received so far can show the client.
+
+    That is the decoded "answer" field, up to where the tool result will be
+    filled in, so neither the JSON around it nor the placeholder is streamed.
+    """
+    match = _ANSWER_FIELD.search(text)
+    if not match:
+        return ""
+    answer = json.loads(f'"{_STRING_BODY.match(text, match.end()).group()}"', strict=False)
+    answer = answer.split(TOOL_RESULT_PLACEHOLDER, 1)[0]
+    # Hold back what may be the start of the placeholder
+    for length in range(len(TOOL_RESULT_PLACEHOLDER) - 1, 0, -1):
+        if answer.endswith(TOOL_RESULT_PLACEHOLDER[:length]):
+            return answer[:-length]
+    return answer
+
+def agent_mode(agent: str) -> str:
+    """
+    Return the answering mode for an agent ("two_pass" or "single_pass").
+
+    Each agent can be switched individually with e.g. MATH_AGENT_MODE=single_pass;
+    AGENT_MODE sets the default for all of them.
+    """
+    mode = os.getenv(f"{agent.upper()}_AGENT_MODE", os.getenv("AGENT_MODE", TWO_PASS))
+    return SINGLE_PASS if mode == SINGLE_PASS else TWO_PASS
+
+async def answer_in_single_pass(question: str, persona: str, instructions: str, tools: dict = None, context: str = None, agent: str = "single_pass") -> str:
+    """
+    Answer a question with one structured LLM call.
+
+    Instead of a separate "which tool?" call followed by an answer call, the
+    model returns JSON naming the tool it wants and the full answer, with
+    TOOL_RESULT_PLACEHOLDER where the tool's output belongs. The local tool is
+    then run inline and its output substituted into the answer.
+
+    tools maps a tool name to {"description", "arguments", "run"}, where run
+    takes the arguments dict and returns (or awaits) the tool output as text.
+    context is optional pre-computed information to include in the prompt.
+    agent labels the fallback metrics.
+    """
+    tools = tools or {}
+    tool_lines = "\n".join(
+        f'    - "{name}": {tool["description"]} Arguments: {tool["arguments"]}'
+        for name, tool in tools.items()
+    ) or "    (no tools available)"
+    context_text = f"\n    Additional information: {context}\n" if context else ""
+
+    prompt = f"""
+    {persona} The question is: {question}
+    {context_text}
+    {instructions}
+
+    You may use one of these local tools:
+{tool_lines}
+
+    Respond with a single JSON object:
+    {{"tool": "none" or a tool name, "arguments": {{tool arguments}}, "answer": "your complete answer"}}
+
+    If you use a tool, write {TOOL_RESULT_PLACEHOLDER} in the answer exactly where the tool's result should appear; it will be filled in for you.
+    """
+
+    # Through generate_answer, so a speculative run waits for confirmation and a streaming request sees the answer as it arrives
+    response_text = await generate_answer(prompt, generation_config=JSON_RESPONSE_CONFIG, stage="single_pass", visible=streamable_answer)
+    response = parse_json_object(response_text)
+    if response is None:
+        # The model ignored the format; its text is still the best answer we have
+        record_fallback(agent, "unparseable_single_pass")
+        return response_text
+
+    answer = str(response.get("answer", ""))
+    tool = tools.get(response.get("tool"))
+    if tool is None:
+        return answer.replace(TOOL_RESULT_PLACEHOLDER, "").strip()
+
+    try:
+        result = tool["run"](response.get("arguments") or {})
+        if inspect.isawaitable(result):
+            result = await result
+    except Exception:
+        record_fallback(agent, "tool_error")
+        result = None
+
+    result_text = str(result) if result else "(the tool could not compute this)"
+    if TOOL_RESULT_PLACEHOLDER in answer:
+        return answer.replace(TOOL_RESULT_PLACEHOLDER, result_text)
+    return f"{answer}\n\n**Result:** {result_text}"
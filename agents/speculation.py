@@ -0,0 +1,68 @@
+import asyncio
+import os
+import time
+from llm.client import SpeculationGate, speculative
+from telemetry.metrics import registry
+
+# Start the likely subjects' analysis alongside LLM classification when the keyword router is unsure
+SPECULATIVE_ROUTING = os.getenv("SPECULATIVE_ROUTING", "0") == "1"
+# How many of the most likely subjects to speculate on
+SPECULATIVE_SUBJECTS = int(os.getenv("SPECULATIVE_SUBJECTS", "1"))
+
+_speculations_total = registry.counter("tutor_speculations_total", "Speculative subject runs, by whether classification confirmed them", ("outcome",))
+_saved_seconds = registry.histogram("tutor_speculation_saved_seconds", "Analysis time overlapped with classification by confirmed speculative runs")
+_saved_seconds_total = registry.counter("tutor_speculation_saved_seconds_total", "Total analysis time overlapped with classification")
+_wasted_calls_total = registry.counter("tutor_speculation_wasted_calls_total", "LLM calls spent by speculative runs that were cancelled")
+_wasted_tokens_total = registry.counter("tutor_speculation_wasted_prompt_tokens_total", "Estimated prompt tokens spent by speculative runs that were cancelled")
+
+class Speculation:
+    """
+    A subject agent started before the question's subject is known.
+
+    The run does its analysis steps (tool decisions, code review, ...) right
+    away, but its answer call waits until confirm(). cancel() stops a run
+    whose subject lost and records what it had already spent.
+    """
+
+    def __init__(self, handler, question: str):
+        self.gate = SpeculationGate()
+        self.started = time.perf_counter()
+        self.settled = False
+        with speculative(self.gate):
+            self.task = asyncio.create_task(handler(question))
+        # Losers may fail before they are cancelled; nobody awaits them
+        self.task.add_done_callback(lambda task: task.cancelled() or task.exception())
+
+    async def confirm(self) -> str:
+        self.settled = True
+        confirmed = time.perf_counter()
+        reached = self.gate.reached_at if self.gate.reached_at is not None else confirmed
+        saved = min(reached, confirmed) - self.started
+        _speculations_total.inc(outcome="hit")
+        _saved_seconds.observe(saved)
+        _saved_seconds_total.inc(saved)
+        self.gate.confirm()
+        return await self.task
+
+    def cancel(self, outcome: str = "miss"):
+        if self.settled:
+            return
+        self.settled = True
+        _speculations_total.inc(outcome=outcome)
+        _wasted_calls_total.inc(self.gate.calls)
+        _wasted_tokens_total.inc(self.gate.prompt_tokens)
+        self.gate.abort()
+        self.task.cancel()
+
+def speculation_stats() -> dict:
+    hits, misses = _speculations_total.value(outcome="hit"), _speculations_total.value(outcome="miss")
+    return {
+        "enabled": SPECULATIVE_ROUTING,
+        "subjects": SPECULATIVE_SUBJECTS,
+        "hits": hits,
+        "misses": misses,
+        "hit_rate": round(hits / (hits + misses), 4) if hits + misses else 0.0,
+        "saved_seconds": round(_saved_seconds_total.value(), 4),
+        "wasted_llm_calls": _wasted_calls_total.value(),
+        "wasted_prompt_tokens": _wasted_tokens_total.value(),
+    }
@@ -0,0 +1,114 @@
+import json
+from llm.client import generate
+from telemetry.metrics import registry
+
+_structured_calls_total = registry.counter(
+    "tutor_structured_calls_total",
+    "Schema-constrained LLM calls (tool decisions, code analysis, ...) by agent, stage and whether the reply was usable",
+    ("agent", "stage", "outcome"),
+)
+
+_decoder = json.JSONDecoder()
+
+# JSON schema types of the fields a StructuredResult can declare, and the Python types they accept
+_FIELD_TYPES = {
+    "string": (str,),
+    "boolean": (bool,),
+    "array": (list,),
+}
+
+def json_config(schema: dict) -> dict:
+    """Generation config asking the model for JSON that follows the schema"""
+    return {"response_mime_type": "application/json", "response_schema": schema}
+
+def parse_json_object(text: str):
+    """
+    Parse the JSON object in a model reply, or return None.
+
+    Schema-constrained replies are plain JSON and take the fast path. Other
+    replies may wrap the object in ```json fences or surround it with prose;
+    then the first complete {...} in the text is decoded.
+    """
+    try:
+        parsed = json.loads(text)
+    except json.JSONDecodeError:
+        parsed = None
+        start = text.find("{")
+        while start != -1:
+            try:
+                parsed = _decoder.raw_decode(text, start)[0]
+                break
+            except json.JSONDecodeError:
+                start = text.find("{", start + 1)
+    return parsed if isinstance(parsed, dict) else None
+
+class StructuredResult:
+    """
+    Typed view of a schema-constrained reply.
+
+    Subclasses set schema to a JSON schema object; each of its properties
+    becomes an attribute. Required fields must be present and every field
+    must have its declared type (arrays hold strings), otherwise the reply
+    is rejected with ValueError. Missing optional fields get an empty value.
+    """
+
+    schema = {"type": "object", "properties": {}, "required": []}
+
+    def __init__(self, data: dict):
+        required = set(self.schema.get("required", ()))
+        for name, field in self.schema["properties"].items():
+            value = data.get(name)
+            if value is None:
+                if name in required:
+                    raise ValueError(f"missing field {name!r}")
+                value = "" if field["type"] == "string" else False if field["type"] == "boolean" else []
+            elif not isinstance(value, _FIELD_TYPES[field["type"]]):
+                raise ValueError(f"field {name!r} is not a {field['type']}")
+            elif field["type"] == "array":
+                value = [str(item).strip() for item in value if str(item).strip()]
+            elif field["type"] == "string":
+                value = value.strip()
+                if "enum" in field and value not in field["enum"]:
+                    raise ValueError(f"field {name!r} is not one of {field['enum']}")
+            setattr(self, name, value)
+
+    def __repr__(self):
+        fields = ", ".join(f"{name}={getattr(self, name)!r}" for name in self.schema["properties"])
+        return f"{type(self).__name__}({fields})"
+
+async def generate_structured(prompt: str, result_type: type, agent: str, stage: str = "tool_decision"):
+    """
+    Make a schema-constrained LLM call and return the reply as a result_type, or None.
+
+    A reply that can't be parsed or doesn't match the schema means the call
+    was wasted; both are counted per agent and stage in
+    tutor_structured_calls_total, so the caller only has to fall back.
+    """
+    text = await generate(prompt, generation_config=json_config(result_type.schema), stage=stage)
+    data = parse_json_object(text)
+    result = None
+    if data is None:
+        outcome = "unparseable"
+    else:
+        try:
+            result = result_type(data)
+            outcome = "ok"
+        except ValueError:
+            outcome = "invalid"
+    _structured_calls_total.inc(agent=agent, stage=stage, outcome=outcome)
+    return result
+
+def structured_output_stats() -> dict:
+    """Schema-constrained calls per agent, with the share whose reply couldn't be used"""
+    agents = {}
+    for (agent, stage, outcome), count in _structured_calls_total.values().items():
+        counts = agents.setdefault(agent, {"calls": 0, "unparseable": 0, "invalid": 0, "stages": {}})
+        counts["calls"] += count
+        counts["stages"][stage] = counts["stages"].get(stage, 0) + count
+        if outcome != "ok":
+            counts[outcome] += count
+    for counts in agents.values():
+        counts["wasted_calls"] = counts["unparseable"] + counts["invalid"]
+        counts["parse_failure_rate"] = round(counts["unparseable"] / counts["calls"], 4)
+        counts["wasted_rate"] = round(counts["wasted_calls"] / counts["calls"], 4)
+    return {"agents": agents}
@@ -1,16 +1,53 @@
-from agents.math_agent import handle_math_question
-from agents.physics_agent import handle_physics_question
-from agents.chemistry_agent import handle_chemistry_question
-from agents.cs_agent import handle_cs_question
-import google.generativeai as genai
-import os
-from dotenv import load_dotenv
-
-load_dotenv()
-genai.configure(api_key=os.getenv("GEMINI_API_KEY"))
-
-def classify_subject(question: str) -> str:
-    model = genai.GenerativeModel("gemini-2.0-flash")
+from agents.router import route_locally, likely_subjects, record_decision, CONFIDENCE_THRESHOLD, FAST_PATH_ENABLED
+from agents.speculation import Speculation, SPECULATIVE_ROUTING, SPECULATIVE_SUBJECTS
+from agents.structured import StructuredResult, generate_structured
+from cache.answer_cache import get_answer_cache, normalize_question
+from cache.single_flight import SingleFlight
+from llm.client import generate, generate_answer, current_conversation
+from llm.resilience import is_unavailable
+from telemetry.metrics import agent_requests_total
+from telemetry.tracing import span, record_fallback
+import asyncio
+import importlib
+import json
+
+# Identical questions asked concurrently share one pipeline run
+answer_flights = SingleFlight()
+
+# Subject agents are imported on first use (or preloaded at startup), so importing the tutor stays cheap
+AGENT_HANDLERS = {
+    "math": ("agents.math_agent", "handle_math_question"),
+    "physics": ("agents.physics_agent", "handle_physics_question"),
+    "chemistry": ("agents.chemistry_agent", "handle_chemistry_question"),
+    "cs": ("agents.cs_agent", "handle_cs_question"),
+}
+_agent_handlers = {}
+
+def load_agent(subject: str):
+    """Return the question handler of a subject agent, importing its module on first use"""
+    handler = _agent_handlers.get(subject)
+    if handler is None:
+        module_name, function_name = AGENT_HANDLERS[subject]
+        handler = _agent_handlers[subject] = getattr(importlib.import_module(module_name), function_name)
+    return handler
+
+def preload_agents():
+    """Import every subject agent (and its local tools) ahead of the first question"""
+    for subject in AGENT_HANDLERS:
+        load_agent(subject)
+
+class SubjectLabels(StructuredResult):
+    """The subjects of a batch of questions, in order"""
+
+    schema = {
+        "type": "object",
+        "properties": {
+            "labels": {"type": "array", "items": {"type": "string"}},
+        },
+        "required": ["labels"],
+    }
+
+async def classify_subject(question: str) -> str:
     prompt = f"""
     Classify the subject of this question into one of these categories: "math", "physics", "chemistry", "computer science", or "general".
     
@@ -25,23 +62,119 @@ def classify_subject(question: str) -> str:
     Respond with just one word: math, physics, chemistry, computer science, or general.
     If it's computer science, you can abbreviate it as "cs".
     """
-    response = model.generate_content(prompt)
-    return response.text.strip().lower()
+    response_text = await generate(prompt, stage="classify")
+    return response_text.strip().lower()
+
+async def classify_subjects(questions: list) -> list:
+    """Classify several questions with one LLM call, falling back to one call each if the reply is unusable"""
+    if len(questions) == 1:
+        return [await classify_subject(questions[0])]
 
-def tutor_agent(question: str) -> str:
-    subject = classify_subject(question)
+    numbered = "\n".join(f"    {i}. {json.dumps(question)}" for i, question in enumerate(questions, 1))
+    prompt = f"""
+    Classify the subject of each numbered question below into one of these categories: "math", "physics", "chemistry", "computer science", or "general".
     
+    Math questions involve calculations, equations, mathematical concepts, or numerical problems.
+    Physics questions involve physical phenomena, forces, energy, motion, or scientific principles.
+    Chemistry questions involve chemical reactions, elements, compounds, molecular structures, or chemical properties.
+    Computer Science questions involve programming, algorithms, data structures, software development, or computational concepts.
+    General questions are anything else, including personal questions, greetings, or non-academic topics.
+    
+    Questions:
+{numbered}
+    
+    Respond in JSON format with exactly {len(questions)} labels in the same order, like this:
+    {{"labels": ["math", "cs", "general"]}}
+    """
+    result = await generate_structured(prompt, SubjectLabels, agent="router", stage="classify_batch")
+    if result is not None and len(result.labels) == len(questions):
+        return [label.lower() for label in result.labels]
+    record_fallback("router", "unparseable_batch_classification")
+    return list(await asyncio.gather(*(classify_subject(question) for question in questions)))
+
+async def route_subject(question: str) -> str:
+    """Route locally when the keyword router is confident, otherwise ask the LLM"""
+    with span("route_local"):
+        local_subject, confidence = route_locally(question)
+    if FAST_PATH_ENABLED and confidence >= CONFIDENCE_THRESHOLD:
+        record_decision("local", local_subject)
+        return local_subject
+    return await _classify_or_guess(question, local_subject)
+
+async def route_speculatively(question: str) -> tuple:
+    """
+    route_subject, but while the LLM classifies, the likeliest subjects' agents already start on the question.
+
+    Returns (subject, {subject: Speculation}). The caller confirms the
+    speculation matching the subject, if any, and cancels the rest.
+    """
+    with span("route_local"):
+        local_subject, confidence = route_locally(question)
+    if FAST_PATH_ENABLED and confidence >= CONFIDENCE_THRESHOLD:
+        record_decision("local", local_subject)
+        return local_subject, {}
+
+    speculations = {subject: Speculation(load_agent(subject), question) for subject in likely_subjects(question, SPECULATIVE_SUBJECTS)}
+    try:
+        return await _classify_or_guess(question, local_subject), speculations
+    except BaseException:
+        for speculation in speculations.values():
+            speculation.cancel()
+        raise
+
+async def _classify_or_guess(question: str, local_subject: str) -> str:
+    try:
+        with span("classify"):
+            subject = await classify_subject(question)
+    except Exception as e:
+        if not is_unavailable(e):
+            raise
+        # Without the LLM the keyword router's best guess beats failing the question
+        record_fallback("router", "llm_unavailable")
+        record_decision("local", local_subject)
+        return local_subject
+    record_decision("llm", subject)
+    return subject
+
+async def route_subjects(questions: list) -> list:
+    """Route a batch: confident questions locally, the rest in one batched LLM classification"""
+    subjects = [None] * len(questions)
+    pending = []
+    for index, question in enumerate(questions):
+        if FAST_PATH_ENABLED:
+            subject, confidence = route_locally(question)
+            if confidence >= CONFIDENCE_THRESHOLD:
+                record_decision("local", subject)
+                subjects[index] = subject
+                continue
+        pending.append(index)
+
+    if pending:
+        labels = await classify_subjects([questions[index] for index in pending])
+        for index, label in zip(pending, labels):
+            record_decision("llm", label)
+            subjects[index] = label
+    return subjects
+
+def canonical_subject(subject: str) -> str:
+    """Map a router or LLM label onto one of the agent names"""
     if "math" in subject:
-        return handle_math_question(question)
+        return "math"
     elif "physics" in subject:
-        return handle_physics_question(question)
+        return "physics"
     elif "chemistry" in subject:
-        return handle_chemistry_question(question)
+        return "chemistry"
     elif "computer" in subject or "cs" in subject:
-        return handle_cs_question(question)
+        return "cs"
     elif "general" in subject:
+        return "general"
+    return "unknown"
+
+async def answer_for_subject(subject: str, question: str) -> str:
+    if subject in AGENT_HANDLERS:
+        return await load_agent(subject)(question)
+    elif subject == "general":
         # Handle general questions in a friendly way
-        model = genai.GenerativeModel("gemini-2.0-flash")
         prompt = f"""
         You are a friendly educational tutor bot. The user has asked a general question: "{question}"
         
@@ -49,8 +182,114 @@ def tutor_agent(question: str) -> str:
         If it's not related to education, politely remind them that you're primarily an educational tutor specializing in math, physics, chemistry, and computer science.
         Keep your response brief and friendly.
         """
-        response = model.generate_content(prompt)
-        return response.text
+        return await generate_answer(prompt)
     else:
         # Fallback for any other classification
         return "I'm your educational tutor specializing in math, physics, chemistry, and computer science. How can I help you with a question today?"
+
+async def tutor_agent(question: str, subject: str = None) -> str:
+    """Answer a question, routing it first unless the subject is already known"""
+    speculations = {}
+    if subject is None and SPECULATIVE_ROUTING:
+        subject, speculations = await route_speculatively(question)
+    subject = canonical_subject(subject or await route_subject(question))
+    speculation = speculations.pop(subject, None)
+    for loser in speculations.values():
+        loser.cancel()
+    try:
+        return await _answer(subject, question, speculation)
+    finally:
+        # Unless it was confirmed, a speculative run would otherwise wait at its gate forever
+        if speculation is not None:
+            speculation.cancel("abandoned")
+
+async def _answer(subject: str, question: str, speculation: Speculation = None) -> str:
+    # A follow-up's answer depends on the conversation, so it is neither served from nor stored in the cache
+    answer_cache = get_answer_cache() if current_conversation() is None else None
+    if answer_cache is not None:
+        with span("answer_cache"):
+            cached_answer = await answer_cache.get(subject, question)
+        if cached_answer is not None:
+            if speculation is not None:
+                speculation.cancel("cached")
+            return cached_answer
+
+    agent_requests_total.inc(agent=subject)
+    try:
+        with span(f"agent_{subject}"):
+            if speculation is not None:
+                answer = await speculation.confirm()
+            else:
+                answer = await answer_for_subject(subject, question)
+    except Exception as e:
+        if not is_unavailable(e):
+            raise
+        # Serve a local answer, and don't cache it over the full one we'll get once the LLM is back
+        from agents.degraded import degraded_answer
+        record_fallback(subject, "llm_unavailable")
+        return await degraded_answer(subject, question)
+
+    if answer_cache is not None and subject != "unknown":
+        await answer_cache.set(subject, question, answer)
+    return answer
+
+async def ask_tutor(question: str, subject: str = None) -> str:
+    """tutor_agent, with concurrent identical questions coalesced onto one run"""
+    if current_conversation() is not None:
+        return await tutor_agent(question, subject)
+    return await answer_flights.run(normalize_question(question), lambda: tutor_agent(question, subject))
+
+async def answer_without_llm(question: str):
+    """
+    Return an answer that costs no LLM calls, or None.
+
+    Joins an identical question that is already being answered, or serves a
+    cached answer when the keyword router is confident about the subject.
+    Follow-ups in a session always need the LLM.
+    """
+    if current_conversation() is not None:
+        return None
+    if answer_flights.is_running(normalize_question(question)):
+        return await ask_tutor(question)
+
+    answer_cache = get_answer_cache()
+    if answer_cache is None or not FAST_PATH_ENABLED:
+        return None
+    subject, confidence = route_locally(question)
+    if confidence < CONFIDENCE_THRESHOLD:
+        return None
+    return await answer_cache.get(canonical_subject(subject), question, count_miss=False)
+
+async def tutor_agent_batch(questions: list, concurrency: int = 8) -> list:
+    """
+    Answer a list of questions, returning {"answer": ...} or {"error": ...} per question in order.
+
+    Duplicates (after normalisation) are answered once, questions the local
+    router is unsure about are classified together in a single LLM call, and
+    at most `concurrency` questions are answered at a time.
+    """
+    keys = [normalize_question(question) for question in questions]
+    unique = {}
+    for key, question in zip(keys, questions):
+        unique.setdefault(key, question)
+    unique_questions = list(unique.values())
+
+    try:
+        subjects = await route_subjects(unique_questions)
+    except Exception:
+        # Let each question route itself (and fail on its own) instead of failing the batch
+        record_fallback("router", "batch_routing_failed")
+        subjects = [None] * len(unique_questions)
+
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def answer(question, subject):
+        async with semaphore:
+            try:
+                return {"answer": await ask_tutor(question, subject)}
+            except Exception as e:
+                return {"error": str(e)}
+
+    outcomes = await asyncio.gather(*(answer(q, s) for q, s in zip(unique_questions, subjects)))
+    by_key = dict(zip(unique, outcomes))
+    return [by_key[key] for key in keys]
@@ -0,0 +1,103 @@
+"""
+A whole class asks at once: /ask with and without admission control.
+
+Every student sends one question at the same moment to a FakeBackend that
+enforces an upstream quota (calls per second), the way Gemini does. Without
+admission control the burst blows through the quota, calls are retried
+until the circuit breaker opens, and most students get degraded answers.
+With it, questions queue up and reach the model at the budgeted rate;
+students who would wait longer than the queue timeout get a fast 429 with
+Retry-After instead.
+
+Usage:
+    python -m benchmarks.admission_benchmark --students 120 --quota-qps 10
+"""
+import argparse
+import asyncio
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+# Every student asks something different, as in a real class
+os.environ.setdefault("ANSWER_CACHE", "off")
+
+from starlette.requests import Request
+
+import admission.queue
+import llm.resilience as resilience
+from admission.queue import Overloaded
+from agents.degraded import UNAVAILABLE_ANSWER, UNAVAILABLE_NOTE
+from benchmarks.load_test import QUESTIONS
+from llm.client import set_backend
+from llm.fake_backend import FakeBackend
+
+def student_request(student: int) -> Request:
+    """A minimal request as seen by the endpoint: one browser per student, one shared school IP"""
+    return Request({
+        "type": "http",
+        "method": "POST",
+        "path": "/ask",
+        "headers": [(b"x-client-id", f"student-{student}".encode())],
+        "client": ("203.0.113.7", 50000 + student),
+    })
+
+def percentile(samples: list, p: float) -> float:
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(p * len(ordered)))] if ordered else 0.0
+
+async def run_class(students: int) -> dict:
+    import main
+    outcomes = {"full": 0, "degraded": 0, "429": 0, "failed": 0}
+    latencies = {outcome: [] for outcome in outcomes}
+
+    async def ask(student):
+        question = f"{QUESTIONS[student % len(QUESTIONS)]} (student {student})"
+        started = time.perf_counter()
+        try:
+            response = await main.ask_question(main.Question(query=question), student_request(student))
+            answer = response["answer"]
+            outcome = "degraded" if answer == UNAVAILABLE_ANSWER or UNAVAILABLE_NOTE in answer else "full"
+        except Overloaded:
+            outcome = "429"
+        except Exception:
+            outcome = "failed"
+        outcomes[outcome] += 1
+        latencies[outcome].append(time.perf_counter() - started)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(ask(student) for student in range(students)))
+    return {
+        **outcomes,
+        "wall": time.perf_counter() - started,
+        "answered_p95": percentile(latencies["full"] + latencies["degraded"], 0.95),
+        "rejected_p95": percentile(latencies["429"], 0.95),
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--students", type=int, default=120)
+    parser.add_argument("--quota-qps", type=float, default=10, help="upstream calls per second the fake model accepts")
+    parser.add_argument("--latency-ms", default="lognormal:400,0.3", help="fake LLM latency distribution")
+    parser.add_argument("--queue-timeout", type=float, default=15, help="ADMISSION_QUEUE_TIMEOUT_SECONDS")
+    args = parser.parse_args()
+
+    # Budget a little under the quota, with a small burst, since retries and classification calls also spend it
+    os.environ["LLM_QPS_BUDGET"] = str(args.quota_qps * 0.9)
+    os.environ["LLM_QPS_BURST"] = str(args.quota_qps / 2)
+    os.environ["ADMISSION_QUEUE_TIMEOUT_SECONDS"] = str(args.queue_timeout)
+
+    print(f"{args.students} students at once, upstream quota {args.quota_qps:g} calls/s")
+    print(f"{'admission':<10} {'full':>5} {'degraded':>9} {'429':>5} {'failed':>7} {'answered p95 (s)':>17} {'429 p95 (s)':>12} {'wall (s)':>9} {'quota hits':>11}")
+    for mode in ("off", "on"):
+        os.environ["ADMISSION_CONTROL"] = mode
+        admission.queue._admission = None
+        resilience.breaker = resilience.CircuitBreaker()
+        backend = FakeBackend(latency_ms=args.latency_ms, quota_per_second=args.quota_qps)
+        set_backend(backend)
+        result = asyncio.run(run_class(args.students))
+        print(f"{mode:<10} {result['full']:>5} {result['degraded']:>9} {result['429']:>5} {result['failed']:>7} "
+              f"{result['answered_p95']:>17.2f} {result['rejected_p95']:>12.3f} {result['wall']:>9.2f} {backend.quota_rejections:>11}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,87 @@
+"""
+Compare the local chemical equation balancer with asking the LLM to balance.
+
+The local path parses each equation and solves its element-count matrix; the
+LLM path sends the prompt the chemistry agent used to send. By default the LLM
+path runs against the FakeBackend with a realistic latency distribution; pass
+--live to use the backend configured by LLM_BACKEND (e.g. real Gemini) and
+also check how often its answers are actually balanced.
+
+Usage:
+    python -m benchmarks.balancer_benchmark --iterations 2000
+    LLM_BACKEND=gemini python -m benchmarks.balancer_benchmark --live
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from llm.client import generate, set_backend
+from llm.fake_backend import FakeBackend
+from tools.chemical_balancer import balance_equation, format_equation, is_balanced
+
+EQUATIONS = [
+    "H2 + O2 -> H2O",
+    "Fe + O2 -> Fe2O3",
+    "C3H8 + O2 -> CO2 + H2O",
+    "Al + HCl -> AlCl3 + H2",
+    "Ca(OH)2 + H3PO4 -> Ca3(PO4)2 + H2O",
+    "CuSO4·5H2O -> CuSO4 + H2O",
+    "KMnO4 + HCl -> KCl + MnCl2 + H2O + Cl2",
+    "C6H12O6 + O2 -> CO2 + H2O",
+    "Cu + HNO3 -> Cu(NO3)2 + NO + H2O",
+    "K4[Fe(CN)6] + KMnO4 + H2SO4 -> KHSO4 + Fe2(SO4)3 + MnSO4 + HNO3 + CO2 + H2O",
+]
+
+def benchmark_local(iterations: int) -> list:
+    rows = []
+    for equation in EQUATIONS:
+        started = time.perf_counter()
+        for _ in range(iterations):
+            balanced = format_equation(*balance_equation(equation))
+        elapsed = (time.perf_counter() - started) / iterations
+        rows.append((equation, balanced, elapsed, is_balanced(balanced)))
+    return rows
+
+async def benchmark_llm() -> list:
+    rows = []
+    for equation in EQUATIONS:
+        prompt = f"""
+        Balance this chemical equation: {equation}
+        
+        Return only the balanced equation, with coefficients as needed.
+        """
+        started = time.perf_counter()
+        answer = (await generate(prompt)).strip()
+        rows.append((equation, answer, time.perf_counter() - started, is_balanced(answer)))
+    return rows
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--iterations", type=int, default=2000, help="local balancer runs per equation")
+    parser.add_argument("--live", action="store_true", help="use the backend from LLM_BACKEND instead of the fake")
+    parser.add_argument("--latency-ms", default="lognormal:700,0.35", help="fake LLM latency distribution")
+    args = parser.parse_args()
+
+    if not args.live:
+        set_backend(FakeBackend(latency_ms=args.latency_ms))
+
+    local_rows = benchmark_local(args.iterations)
+    llm_rows = asyncio.run(benchmark_llm())
+
+    print(f"{'equation':<45} {'local (us)':>11} {'LLM (ms)':>10}  balanced (local / LLM)")
+    for (equation, _, local_time, local_ok), (_, _, llm_time, llm_ok) in zip(local_rows, llm_rows):
+        print(f"{equation[:45]:<45} {local_time * 1e6:>11.1f} {llm_time * 1000:>10.1f}  {local_ok!s:>5} / {llm_ok!s}")
+
+    local_median = statistics.median(row[2] for row in local_rows)
+    llm_median = statistics.median(row[2] for row in llm_rows)
+    print(f"\nMedian: local {local_median * 1e6:.1f} us, LLM {llm_median * 1000:.1f} ms ({llm_median / local_median:,.0f}x slower)")
+    print(f"Correct: local {sum(r[3] for r in local_rows)}/{len(local_rows)}, LLM {sum(r[3] for r in llm_rows)}/{len(llm_rows)}"
+          + ("" if args.live else " (fake backend echoes the input, so its correctness is not meaningful)"))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,89 @@
+"""
+Compare answering a problem set with serial /ask calls against one /ask/batch.
+
+Builds a problem set from the load-test questions, with a share of exact and
+re-cased duplicates and a few questions only the LLM can route. It answers
+the set one question at a time, the way teachers did before /ask/batch, and
+then as a single batch. Both runs use the FakeBackend with a realistic
+latency distribution and report wall time and LLM calls.
+
+Usage:
+    python -m benchmarks.batch_benchmark --questions 30 --latency-ms lognormal:400,0.3
+"""
+import argparse
+import asyncio
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+# Duplicates should be coalesced by the batch itself, not served from the answer cache
+os.environ.setdefault("ANSWER_CACHE", "off")
+# Measure the pipeline itself, not the admission queue and rate limits in front of it
+os.environ.setdefault("ADMISSION_CONTROL", "off")
+
+from llm.client import set_backend
+from llm.fake_backend import FakeBackend
+from benchmarks.load_test import QUESTIONS
+
+# Questions the keyword router is unsure about, so they need LLM classification
+AMBIGUOUS = [
+    "Why is the sky blue?",
+    "What makes a good study schedule?",
+    "How do rainbows form?",
+    "What is the meaning of entropy?",
+]
+
+def make_problem_set(size: int, duplicate_share: float, seed: int) -> list:
+    rng = random.Random(seed)
+    pool = QUESTIONS + AMBIGUOUS
+    problems = []
+    while len(problems) < size:
+        if problems and rng.random() < duplicate_share:
+            repeat = rng.choice(problems)
+            problems.append(repeat.lower() if rng.random() < 0.5 else repeat)
+        else:
+            problems.append(rng.choice(pool))
+    return problems
+
+async def run_serial(problems: list) -> float:
+    import main
+    started = time.perf_counter()
+    for problem in problems:
+        await main.ask_question(main.Question(query=problem))
+    return time.perf_counter() - started
+
+async def run_batch(problems: list) -> tuple:
+    import main
+    started = time.perf_counter()
+    response = await main.ask_question_batch(main.QuestionBatch(queries=problems))
+    errors = sum(1 for result in response["results"] if "error" in result)
+    return time.perf_counter() - started, errors
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--questions", type=int, default=30, help="problem set size")
+    parser.add_argument("--duplicates", type=float, default=0.3, help="share of questions that repeat an earlier one")
+    parser.add_argument("--latency-ms", default="lognormal:400,0.3", help="fake LLM latency distribution")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    problems = make_problem_set(args.questions, args.duplicates, args.seed)
+
+    serial_backend = FakeBackend(latency_ms=args.latency_ms, seed=args.seed)
+    set_backend(serial_backend)
+    serial_seconds = asyncio.run(run_serial(problems))
+
+    batch_backend = FakeBackend(latency_ms=args.latency_ms, seed=args.seed)
+    set_backend(batch_backend)
+    batch_seconds, errors = asyncio.run(run_batch(problems))
+
+    print(f"Problem set: {len(problems)} questions, {len({p.lower() for p in problems})} distinct")
+    print(f"{'mode':<12} {'wall (s)':>9} {'LLM calls':>10}")
+    print(f"{'serial /ask':<12} {serial_seconds:>9.2f} {serial_backend.calls:>10}")
+    print(f"{'/ask/batch':<12} {batch_seconds:>9.2f} {batch_backend.calls:>10}")
+    print(f"\nSpeed-up: {serial_seconds / batch_seconds:.1f}x, LLM calls saved: {serial_backend.calls - batch_backend.calls}, errors: {errors}")
+
+if __name__ == "__main__":
+    main()
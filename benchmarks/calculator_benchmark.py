@@ -0,0 +1,100 @@
+"""
+Measure the throughput of the calculator's expression engine.
+
+Each expression is timed three ways: cold (the compiled-expression cache is
+cleared before every run, so tokenising and parsing are included), warm (the
+compiled closure is reused), and through solve_equation as the math agent
+calls it. A final section feeds in hostile inputs and reports how quickly
+each is rejected.
+
+Usage:
+    python -m benchmarks.calculator_benchmark --iterations 5000
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from tools.calculator import solve_equation
+from tools.expression_engine import ExpressionError, compile_expression, evaluate, solve
+
+EXPRESSIONS = [
+    "2+5*3",
+    "2^10 - 3(4+1)",
+    "1/3 + 1/6 - 0.25",
+    "sqrt(144) / 4 + 2^-3",
+    "sin(pi/6) + cos(0) * log(100, 10)",
+    "factorial(12) / (6^0 + 1)",
+]
+
+EQUATIONS = [
+    "2x+3=7",
+    "3(x - 2) = x/2 + 4",
+    "x^2-5x+6=0",
+    "2x^2 + 3x = 7",
+    "x + y = 3, x - y = 1",
+    "2a + b - c = 1; a - b + 2c = 7; a + b + c = 6",
+]
+
+HOSTILE = [
+    "9^9^9",
+    "10^100000",
+    "factorial(100000)",
+    "(" * 200 + "1" + ")" * 200,
+    "+".join(["1"] * 400),
+    "__import__('os').system('true')",
+    "().__class__.__bases__[0].__subclasses__()",
+    "x^50 = 1",
+    "1e999 * 2",
+    "*".join(["(10^300)"] * 20),
+    "((a+b+c+d)^8)^5 = 1",
+    "((a+b+c+d+e+f)^8)^8 = 1",
+]
+
+def time_per_call(func, iterations: int) -> float:
+    started = time.perf_counter()
+    for _ in range(iterations):
+        func()
+    return (time.perf_counter() - started) / iterations
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--iterations", type=int, default=5000, help="runs per expression")
+    args = parser.parse_args()
+
+    def cold_evaluate(expression):
+        compile_expression.cache_clear()
+        return evaluate(expression)
+
+    def cold_solve(equation):
+        compile_expression.cache_clear()
+        return solve(equation)
+
+    print(f"{'input':<48} {'cold (us)':>10} {'warm (us)':>10} {'tool (us)':>10}")
+    warm_total = 0.0
+    for text, run in [(e, evaluate) for e in EXPRESSIONS] + [(e, solve) for e in EQUATIONS]:
+        cold_run = cold_evaluate if run is evaluate else cold_solve
+        cold = time_per_call(lambda: cold_run(text), max(1, args.iterations // 10))
+        warm = time_per_call(lambda: run(text), args.iterations)
+        tool = time_per_call(lambda: solve_equation(text), args.iterations)
+        warm_total += warm
+        print(f"{text[:48]:<48} {cold * 1e6:>10.1f} {warm * 1e6:>10.1f} {tool * 1e6:>10.1f}")
+
+    count = len(EXPRESSIONS) + len(EQUATIONS)
+    print(f"\nWarm throughput: {count / warm_total:,.0f} expressions/s")
+
+    print(f"\n{'hostile input':<48} {'rejected in (ms)':>17}  reason")
+    for text in HOSTILE:
+        compile_expression.cache_clear()
+        started = time.perf_counter()
+        try:
+            evaluate(text) if "=" not in text else solve(text)
+            reason = "evaluated"
+        except ExpressionError as e:
+            reason = str(e)
+        print(f"{text[:48]:<48} {(time.perf_counter() - started) * 1000:>17.3f}  {reason}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,174 @@
+"""
+Local code analyzer vs. asking the model to review a snippet.
+
+Reviews a corpus of student snippets (Python, JavaScript, Java, C, C++,
+Go, Ruby, SQL) with analyze_code_locally and reports its per-snippet
+latency, the snippets it handled itself and the findings it produced.
+Snippets it can't handle would go to the model; their share is the
+remaining analyze_code calls. The same snippets are also reviewed through
+cs_agent.analyze_code against the fake model, with and without the local
+pre-pass, for the end-to-end time and number of LLM calls.
+
+Usage:
+    python -m benchmarks.code_analyzer_benchmark --iterations 200 --latency-ms lognormal:900,0.3
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import agents.cs_agent as cs_agent
+from llm.client import set_backend
+from llm.fake_backend import FakeBackend
+from tools.code_analyzer import analyze_code_locally
+
+SNIPPETS = {
+    "python: nested loops": """
+def has_duplicates(items):
+    for i in range(len(items)):
+        for j in range(len(items)):
+            if i != j and items[i] == items[j]:
+                return True
+    return False
+""",
+    "python: syntax error": """
+def average(numbers)
+    return sum(numbers) / len(numbers)
+""",
+    "python: exponential recursion": """
+def fib(n):
+    if n < 2:
+        return n
+    return fib(n - 1) + fib(n - 2)
+""",
+    "python: common bugs": """
+def collect(item, bucket=[]):
+    bucket.append(item)
+    if item is 'stop':
+        return bucket
+    try:
+        return bucket[len(bucket)]
+    except:
+        pass
+""",
+    "python: binary search": """
+def search(values, target):
+    lo, hi = 0, len(values) - 1
+    while lo <= hi:
+        mid = (lo + hi) // 2
+        if values[mid] < target:
+            lo = mid + 1
+        elif values[mid] > target:
+            hi = mid - 1
+        else:
+            return mid
+    return -1
+""",
+    "javascript: off by one": """
+function total(arr) {
+  var sum = 0;
+  for (let i = 0; i <= arr.length; i++) {
+    if (arr[i] == null) continue;
+    sum += arr[i];
+  }
+  return sum;
+}
+""",
+    "java: string compare": """
+public class Login {
+    public static boolean check(String name) {
+        if (name == "admin") { return true; }
+        return false;
+    }
+}
+""",
+    "c: unsafe input": """
+#include <stdio.h>
+int main() {
+    char name[16];
+    gets(name);
+    for (int i = 0; i < 16; i++) { for (int j = 0; j < 16; j++) { printf("%d", i * j); } }
+    return 0;
+""",
+    "cpp: sort in loop": """
+#include <vector>
+#include <algorithm>
+void process(std::vector<int>& v) {
+    for (int k = 0; k < 10; k++) {
+        std::sort(v.begin(), v.end());
+    }
+}
+""",
+    "go: loop": """
+package main
+import "fmt"
+func main() {
+    for i := 0; i < 10; i++ {
+        fmt.Println(i)
+    }
+}
+""",
+    "ruby: each": """
+def greet(names)
+  names.each do |name|
+    puts "Hello #{name}"
+  end
+end
+""",
+    "sql: join": """
+SELECT students.name, grades.score
+FROM students JOIN grades ON grades.student_id = students.id
+WHERE grades.score > 90
+""",
+    # Too deeply nested to parse; these go to the model rather than failing the question
+    "python: deep expression": "x = " + "1+" * 5000 + "1",
+    "python: deep unary": "x = " + "-" * 100000 + "1",
+}
+
+async def review_all(iterations: int) -> list:
+    latencies = []
+    for _ in range(iterations):
+        for code in SNIPPETS.values():
+            started = time.perf_counter()
+            await cs_agent.analyze_code(code)
+            latencies.append(time.perf_counter() - started)
+    return latencies
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--iterations", type=int, default=200, help="local analyzer passes over the corpus")
+    parser.add_argument("--latency-ms", default="lognormal:900,0.3", help="fake LLM latency of a code review call")
+    args = parser.parse_args()
+
+    print(f"{'snippet':<30} {'language':<11} {'errors':>6} {'improvements':>13}  complexity")
+    handled = 0
+    for name, code in SNIPPETS.items():
+        review = analyze_code_locally(code)
+        if review is None:
+            print(f"{name:<30} {'(model)':<11}")
+            continue
+        handled += 1
+        print(f"{name:<30} {review['language']:<11} {len(review['errors']):>6} {len(review['improvements']):>13}  {review['complexity']}")
+
+    started = time.perf_counter()
+    for _ in range(args.iterations):
+        for code in SNIPPETS.values():
+            analyze_code_locally(code)
+    per_snippet = (time.perf_counter() - started) / (args.iterations * len(SNIPPETS))
+    print(f"\nLocal analyzer: {per_snippet * 1000:.3f} ms per snippet, {handled}/{len(SNIPPETS)} snippets handled without the model")
+
+    print(f"\nanalyze_code against the fake model ({args.latency_ms}):")
+    print(f"{'local pre-pass':<15} {'mean (ms)':>10} {'p95 (ms)':>9} {'LLM calls':>10}")
+    for local in (False, True):
+        cs_agent.LOCAL_CODE_ANALYSIS = local
+        backend = FakeBackend(latency_ms=args.latency_ms)
+        set_backend(backend)
+        latencies = sorted(asyncio.run(review_all(1)))
+        print(f"{'on' if local else 'off':<15} {statistics.mean(latencies) * 1000:>10.1f} {latencies[int(0.95 * (len(latencies) - 1))] * 1000:>9.1f} {backend.calls:>10}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,113 @@
+"""
+Cold start of the server, as on a Render free instance waking from sleep.
+
+Each run starts a fresh interpreter that imports main, runs the app's
+startup (lifespan) hook, answers /health (the port is open and the page can
+load) and then, after the student's "think time", a first and a second
+question. The Gemini backend is created for real (SDK import and
+configuration included); only its network calls are replaced by the fake
+model's instant replies, so the numbers are the server's own cold cost.
+
+Runs every STARTUP_PRELOAD mode and reports the median of each stage. With
+--budget-ms the script exits non-zero when the default ("background") mode's
+cold start (import + startup + first question) exceeds the budget, so it can
+be tracked in CI.
+
+Usage:
+    python -m benchmarks.cold_start --runs 5 --budget-ms 1000
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+MODES = ("off", "background", "eager")
+
+def child(think_seconds: float):
+    """Measure one cold start in this (fresh) interpreter and print the timings as JSON"""
+    started = time.perf_counter()
+    since_start = lambda: (time.perf_counter() - started) * 1000
+
+    import main
+    import_ms = since_start()
+
+    import asyncio
+    import llm.client
+    from llm.fake_backend import FakeBackend
+
+    create_backend = llm.client.create_backend
+
+    def create_backend_offline(name):
+        backend = create_backend(name)
+        fake = FakeBackend()
+        backend.generate, backend.generate_stream = fake.generate, fake.generate_stream
+        return backend
+
+    llm.client.create_backend = create_backend_offline
+
+    async def serve():
+        timings = {"import_ms": import_ms}
+        async with main.lifespan(main.app):
+            timings["startup_ms"] = since_start() - import_ms
+            await main.health_check()
+            timings["health_ready_ms"] = since_start()
+            await asyncio.sleep(think_seconds)
+            for name, query in (("first_question_ms", "What is 12 * 7?"), ("second_question_ms", "What is 13 * 7?")):
+                asked = time.perf_counter()
+                await main.ask_question(main.Question(query=query))
+                timings[name] = (time.perf_counter() - asked) * 1000
+        return timings
+
+    print(json.dumps(asyncio.run(serve())))
+
+def run_once(mode: str, think_seconds: float) -> dict:
+    env = {
+        **os.environ,
+        "STARTUP_PRELOAD": mode,
+        "LLM_BACKEND": "gemini",
+        "GEMINI_API_KEY": os.getenv("GEMINI_API_KEY", "cold-start-benchmark"),
+        "ANSWER_CACHE": "off",
+        "ADMISSION_CONTROL": "off",
+    }
+    output = subprocess.run(
+        [sys.executable, "-m", "benchmarks.cold_start", "--child", "--think", str(think_seconds)],
+        cwd=ROOT, env=env, capture_output=True, text=True, check=True,
+    ).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=5, help="fresh interpreters per mode")
+    parser.add_argument("--think", type=float, default=1.0, help="seconds between the page loading and the first question")
+    parser.add_argument("--budget-ms", type=float, default=None, help="fail if the background mode's cold start exceeds this")
+    parser.add_argument("--child", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        child(args.think)
+        return
+
+    columns = ("import_ms", "startup_ms", "health_ready_ms", "first_question_ms", "second_question_ms")
+    print(f"Median of {args.runs} cold starts, {args.think:g}s think time (ms)")
+    print(f"{'preload':<11}" + "".join(f"{column[:-3]:>17}" for column in columns) + f"{'cold start':>12}")
+    cold_starts = {}
+    for mode in MODES:
+        runs = [run_once(mode, args.think) for _ in range(args.runs)]
+        medians = {column: statistics.median(run[column] for run in runs) for column in columns}
+        cold_starts[mode] = statistics.median(run["import_ms"] + run["startup_ms"] + run["first_question_ms"] for run in runs)
+        print(f"{mode:<11}" + "".join(f"{medians[column]:>17.1f}" for column in columns) + f"{cold_starts[mode]:>12.1f}")
+
+    if args.budget_ms is not None:
+        cold_start = cold_starts["background"]
+        verdict = "within" if cold_start <= args.budget_ms else "OVER"
+        print(f"\nCold start {cold_start:.0f} ms is {verdict} the {args.budget_ms:g} ms budget")
+        if cold_start > args.budget_ms:
+            sys.exit(1)
+
+if __name__ == "__main__":
+    sys.path.insert(0, ROOT)
+    main()
@@ -0,0 +1,98 @@
+"""
+Compare the unit-aware quantity extractor with the original regex loop.
+
+The original extract_values ran seven separate patterns per call and kept only
+the first match of each. The new extractor makes one pass with a precompiled
+pattern and converts units to SI. This script times both over a corpus of
+physics problems and counts how many quantities each recovers.
+
+Usage:
+    python -m benchmarks.extractor_benchmark --iterations 2000
+"""
+import argparse
+import os
+import re
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from tools.quantity_extractor import extract_quantities
+
+CORPUS = [
+    "A 5 kg box accelerates at 2 m/s². What force is needed?",
+    "A car accelerates from 10 m/s to 30 m/s in 5 s. Find the acceleration.",
+    "A ball is dropped from a height of 20 m. How long does it take to hit the ground?",
+    "A 2 kg ball is 10 m high and moving at 3 m/s. What is its total mechanical energy?",
+    "A car travelling at 72 km/h brakes to a stop over 50 m. What is its deceleration?",
+    "A train starts from rest and reaches 25 m/s after 2 min. How far does it travel?",
+    "An electron of mass 9.11e-31 kg moves at 3 × 10^6 m/s. Find its kinetic energy.",
+    "A 500 g cart moving at -4 m/s collides with a 1.5 kg cart at rest.",
+    "A 12 V battery drives a current of 2 A through a resistor. What is its resistance?",
+    "A 1,200 kg car has momentum 24000 kg m/s. What is its speed?",
+    "A runner covers 400 meters in 52.5 seconds. What is the average speed?",
+    "A 60 kg skier slides down a 30 m high slope. What is the speed at the bottom?",
+    "How much work is done lifting a 15 kg crate 2.5 m off the ground?",
+    "A 75 W bulb runs for 3 hours. How much energy in kWh does it use?",
+    "A force of 250 N pushes a 50 kg sled for 8 m across frictionless ice.",
+    "A cyclist slows from 36 km/h to 18 km/h in 4 seconds.",
+    "A stone is thrown upward at 15 m/s from a 45 m tall cliff.",
+    "A 0.145 kg baseball leaves the bat at 40 m/s after 0.7 ms of contact.",
+    "A spring launches a 200 g block at 3.5 m/s across 120 cm of floor.",
+    "Explain why the sky is blue.",
+]
+
+def legacy_extract_values(text):
+    """The original implementation, kept verbatim for comparison"""
+    patterns = {
+        'mass': r'(\d+(?:\.\d+)?)\s*(?:kg|kilograms?)',
+        'velocity': r'(\d+(?:\.\d+)?)\s*(?:m/s|meters? per second)',
+        'acceleration': r'(\d+(?:\.\d+)?)\s*(?:m/s²|meters? per second squared)',
+        'time': r'(\d+(?:\.\d+)?)\s*(?:s|seconds?)',
+        'displacement': r'(\d+(?:\.\d+)?)\s*(?:m|meters?)',
+        'height': r'(\d+(?:\.\d+)?)\s*(?:m|meters?) high',
+        'force': r'(\d+(?:\.\d+)?)\s*(?:N|newtons?)',
+    }
+
+    extracted = {}
+    for key, pattern in patterns.items():
+        match = re.search(pattern, text)
+        if match:
+            extracted[key] = float(match.group(1))
+
+    return extracted
+
+def time_corpus(func, iterations: int) -> float:
+    started = time.perf_counter()
+    for _ in range(iterations):
+        for problem in CORPUS:
+            func(problem)
+    return time.perf_counter() - started
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--iterations", type=int, default=2000, help="passes over the corpus")
+    parser.add_argument("--show", action="store_true", help="print what each extractor found per problem")
+    args = parser.parse_args()
+
+    legacy_seconds = time_corpus(legacy_extract_values, args.iterations)
+    new_seconds = time_corpus(extract_quantities, args.iterations)
+    problems = len(CORPUS) * args.iterations
+
+    legacy_found = sum(len(legacy_extract_values(p)) for p in CORPUS)
+    new_found = sum(len(values) for p in CORPUS for values in extract_quantities(p).values())
+
+    if args.show:
+        for problem in CORPUS:
+            print(problem)
+            print(f"  legacy: {legacy_extract_values(problem)}")
+            print(f"  new:    {extract_quantities(problem)}")
+        print()
+
+    print(f"{'extractor':<12} {'problems/s':>12} {'us/problem':>11} {'values found':>13}")
+    print(f"{'legacy':<12} {problems / legacy_seconds:>12,.0f} {legacy_seconds / problems * 1e6:>11.2f} {legacy_found:>13}")
+    print(f"{'unit-aware':<12} {problems / new_seconds:>12,.0f} {new_seconds / problems * 1e6:>11.2f} {new_found:>13}")
+    print(f"\nSpeed-up: {legacy_seconds / new_seconds:.2f}x")
+
+if __name__ == "__main__":
+    main()
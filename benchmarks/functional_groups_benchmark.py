@@ -0,0 +1,83 @@
+"""
+Local functional-group detector vs. asking the model.
+
+Detects the functional groups of a corpus of compounds given by common
+name, systematic name, condensed formula and SMILES with
+find_functional_groups and reports its per-compound latency and the
+groups it found. Compounds it can't parse would go to the model. The same
+compounds are also looked up through chemistry_agent.identify_functional_groups
+against the fake model, with and without the local detector, for the
+end-to-end time and number of LLM calls.
+
+Usage:
+    python -m benchmarks.functional_groups_benchmark --iterations 200 --latency-ms lognormal:350,0.3
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+# Every model lookup is a fresh upstream call
+os.environ.setdefault("TOOL_CACHE", "off")
+
+import agents.chemistry_agent as chemistry_agent
+from llm.client import set_backend
+from llm.fake_backend import FakeBackend
+from tools.functional_groups import find_functional_groups, parse_compound, parse_smiles
+
+COMPOUNDS = [
+    "ethanol", "acetic acid", "aspirin", "paracetamol", "glycine", "ethyl acetate", "benzaldehyde", "nitrobenzene",
+    "propan-2-ol", "2-methylpropan-1-ol", "but-2-ene", "cyclohexanone", "ethane-1,2-diol", "3-chloropropanoic acid",
+    "methyl propanoate", "propanenitrile", "hex-1-yne", "2-aminopropanoic acid",
+    "CH3CH2OH", "(CH3)2CHOH", "CH3COOCH2CH3", "CH3CH2NHCH3", "CH2=CHCl", "HCOOH", "CH3CONH2", "C6H5OH",
+    "CC(=O)Oc1ccccc1C(=O)O", "OCC(O)CO", "NCC(=O)O", "C=CC#N",
+    "4-nitrophenol", "C2H6O",
+]
+
+async def identify_all() -> list:
+    latencies = []
+    for compound in COMPOUNDS:
+        started = time.perf_counter()
+        await chemistry_agent.identify_functional_groups(compound)
+        latencies.append(time.perf_counter() - started)
+    return latencies
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--iterations", type=int, default=200, help="local detector passes over the corpus")
+    parser.add_argument("--latency-ms", default="lognormal:350,0.3", help="fake LLM latency of a functional-group call")
+    args = parser.parse_args()
+
+    handled = 0
+    for compound in COMPOUNDS:
+        groups = find_functional_groups(compound)
+        if groups is None:
+            print(f"{compound:<24} (model)")
+            continue
+        handled += 1
+        print(f"{compound:<24} {', '.join(groups) or '-'}")
+
+    # The parsers' caches would otherwise turn every pass after the first into a dictionary lookup
+    started = time.perf_counter()
+    for _ in range(args.iterations):
+        parse_compound.cache_clear()
+        parse_smiles.cache_clear()
+        for compound in COMPOUNDS:
+            find_functional_groups(compound)
+    per_compound = (time.perf_counter() - started) / (args.iterations * len(COMPOUNDS))
+    print(f"\nLocal detector: {per_compound * 1000:.3f} ms per compound (uncached), {handled}/{len(COMPOUNDS)} compounds handled without the model")
+
+    print(f"\nidentify_functional_groups against the fake model ({args.latency_ms}):")
+    print(f"{'local detector':<15} {'mean (ms)':>10} {'p95 (ms)':>9} {'LLM calls':>10}")
+    for local in (False, True):
+        chemistry_agent.LOCAL_FUNCTIONAL_GROUPS = local
+        backend = FakeBackend(latency_ms=args.latency_ms)
+        set_backend(backend)
+        latencies = sorted(asyncio.run(identify_all()))
+        print(f"{'on' if local else 'off':<15} {statistics.mean(latencies) * 1000:>10.1f} {latencies[int(0.95 * (len(latencies) - 1))] * 1000:>9.1f} {backend.calls:>10}")
+
+if __name__ == "__main__":
+    main()
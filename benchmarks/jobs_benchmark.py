@@ -0,0 +1,94 @@
+"""
+Answering with POST /ask vs. submitting POST /jobs and collecting the result.
+
+Sends a burst of questions both ways against the fake model. With /ask
+each client holds its connection until the answer is ready. With /jobs a
+client holds it only while the job is queued, then collects the answer with
+GET /jobs/{id}?wait=... (a long poll, which a client may drop and repeat
+without losing the work). For each worker-pool size it reports how long
+submissions held a connection, the time to each answer and the throughput
+of the pool.
+
+Usage:
+    python -m benchmarks.jobs_benchmark --questions 40 --workers 1,4,8 --latency-ms lognormal:900,0.3
+"""
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+# Every question is answered from scratch, by the pipeline rather than the answer cache
+os.environ.setdefault("ANSWER_CACHE", "off")
+os.environ.setdefault("ADMISSION_CONTROL", "off")
+os.environ.setdefault("JOB_QUEUE_PATH", os.path.join(tempfile.mkdtemp(), "jobs_benchmark.sqlite3"))
+
+from llm.client import set_backend
+from llm.fake_backend import FakeBackend
+from jobs.job_queue import JobWorkers, get_job_queue
+from benchmarks.load_test import QUESTIONS
+
+def percentile(samples: list, p: float) -> float:
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(p * len(ordered)))] if ordered else 0.0
+
+async def run_ask(questions: list) -> list:
+    import main
+
+    async def one(question):
+        started = time.perf_counter()
+        await main.ask_question(main.Question(query=question))
+        return time.perf_counter() - started
+
+    return await asyncio.gather(*(one(question) for question in questions))
+
+async def run_jobs(questions: list, workers: int) -> tuple:
+    import main
+    main._job_workers = JobWorkers(get_job_queue(), main._answer_job, workers=workers, poll_interval=0.05)
+    main._job_workers.start()
+    try:
+        async def one(question):
+            started = time.perf_counter()
+            response = await main.submit_job(main.Question(query=question))
+            submitted = time.perf_counter()
+            job = json.loads(response.body)
+            while job["status"] not in ("done", "failed", "cancelled"):
+                job = await main.get_job(job["id"], wait=main.JOB_MAX_WAIT)
+            return submitted - started, time.perf_counter() - started, job["status"]
+
+        started = time.perf_counter()
+        results = await asyncio.gather(*(one(question) for question in questions))
+        return results, time.perf_counter() - started
+    finally:
+        await main._job_workers.stop()
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--questions", type=int, default=40, help="questions sent at once")
+    parser.add_argument("--workers", default="1,4,8", help="comma-separated job worker pool sizes")
+    parser.add_argument("--latency-ms", default="lognormal:900,0.3", help="fake LLM latency distribution")
+    args = parser.parse_args()
+
+    # Vary the wording so identical questions aren't coalesced onto one run
+    questions = [f"{QUESTIONS[i % len(QUESTIONS)]}{' ' * (i // len(QUESTIONS))}" for i in range(args.questions)]
+
+    set_backend(FakeBackend(latency_ms=args.latency_ms))
+    held = asyncio.run(run_ask(questions))
+    print(f"/ask: connection held {statistics.mean(held) * 1000:.0f} ms on average (p95 {percentile(held, 0.95) * 1000:.0f} ms) per question")
+
+    print(f"\n{'workers':>7} {'submit p50 (ms)':>16} {'submit p95 (ms)':>16} {'answer mean (s)':>16} {'answer p95 (s)':>15} {'questions/s':>12} {'failed':>7}")
+    for workers in (int(size) for size in args.workers.split(",")):
+        set_backend(FakeBackend(latency_ms=args.latency_ms))
+        results, seconds = asyncio.run(run_jobs(questions, workers))
+        submits = [submit for submit, _, _ in results]
+        answers = [answer for _, answer, _ in results]
+        failed = sum(1 for _, _, status in results if status != "done")
+        print(f"{workers:>7} {percentile(submits, 0.5) * 1000:>16.1f} {percentile(submits, 0.95) * 1000:>16.1f} "
+              f"{statistics.mean(answers):>16.2f} {percentile(answers, 0.95):>15.2f} {len(results) / seconds:>12.1f} {failed:>7}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,88 @@
+"""
+Load test for the /ask pipeline against a local fake Gemini model.
+
+Installs the in-process FakeBackend with a configurable latency distribution,
+then fires the same batch of questions through main.ask_question
+at increasing client concurrency. With a non-blocking pipeline, throughput
+should scale roughly linearly until MAX_CONCURRENT_LLM_CALLS is reached, and the
+event loop should stay responsive (low loop lag) the whole time.
+
+Usage:
+    python -m benchmarks.load_test --requests 64 --latency-ms lognormal:50,0.3
+"""
+import argparse
+import asyncio
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+# Repeated questions would otherwise be served from the answer cache
+os.environ.setdefault("ANSWER_CACHE", "off")
+# Measure the pipeline itself, not the admission queue and rate limits in front of it
+os.environ.setdefault("ADMISSION_CONTROL", "off")
+
+from llm.client import set_backend
+from llm.fake_backend import FakeBackend
+
+QUESTIONS = [
+    "What is 12 * 7 + 3?",
+    "A 5 kg box accelerates at 2 m/s². What is the force?",
+    "Balance H2 + O2 -> H2O",
+    "Explain the binary search algorithm",
+    "Hello, who are you?",
+]
+
+async def measure_loop_lag(stop: asyncio.Event, interval: float = 0.005) -> float:
+    """Return the worst delay seen while waiting on the event loop"""
+    worst = 0.0
+    while not stop.is_set():
+        started = time.perf_counter()
+        await asyncio.sleep(interval)
+        worst = max(worst, time.perf_counter() - started - interval)
+    return worst
+
+async def run_level(concurrency: int, total_requests: int) -> dict:
+    from main import ask_question, Question
+
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def one(i):
+        async with semaphore:
+            await ask_question(Question(query=QUESTIONS[i % len(QUESTIONS)]))
+
+    stop = asyncio.Event()
+    lag_task = asyncio.create_task(measure_loop_lag(stop))
+    started = time.perf_counter()
+    await asyncio.gather(*(one(i) for i in range(total_requests)))
+    elapsed = time.perf_counter() - started
+    stop.set()
+    worst_lag = await lag_task
+
+    return {
+        "concurrency": concurrency,
+        "elapsed_s": elapsed,
+        "throughput_rps": total_requests / elapsed,
+        "max_loop_lag_ms": worst_lag * 1000,
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=64, help="requests per concurrency level")
+    parser.add_argument("--latency-ms", default="constant:50", help="fake time-to-first-token distribution in ms")
+    parser.add_argument("--tokens-per-second", default="constant:0", help="fake output token rate distribution (0 = instant)")
+    parser.add_argument("--levels", default="1,2,4,8,16,32", help="comma-separated client concurrency levels")
+    args = parser.parse_args()
+
+    backend = FakeBackend(latency_ms=args.latency_ms, tokens_per_second=args.tokens_per_second)
+    set_backend(backend)
+
+    print(f"{'clients':>8} {'elapsed (s)':>12} {'req/s':>10} {'LLM calls/req':>14} {'max loop lag (ms)':>18}")
+    for level in [int(x) for x in args.levels.split(",")]:
+        calls_before = backend.calls
+        result = asyncio.run(run_level(level, args.requests))
+        calls_per_request = (backend.calls - calls_before) / args.requests
+        print(f"{result['concurrency']:>8} {result['elapsed_s']:>12.3f} {result['throughput_rps']:>10.1f} {calls_per_request:>14.2f} {result['max_loop_lag_ms']:>18.2f}")
+
+if __name__ == "__main__":
+    main()
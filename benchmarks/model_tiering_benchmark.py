@@ -0,0 +1,84 @@
+"""
+Per-stage model tiering: routing overhead with one model vs. a fast model for short stages.
+
+Runs the replay corpus through tutor_agent twice against the fake model:
+once with every stage on the answer model, and once with classification,
+tool decisions and tool extraction on the fast model with their output
+token caps (the default). The two models get their own latency
+distributions. For each run it reports the mean/p95 question latency, and
+the calls, p50/p95 latency and tokens per call of each stage.
+
+Usage:
+    python -m benchmarks.model_tiering_benchmark --answer-latency-ms lognormal:450,0.4 --fast-latency-ms lognormal:200,0.3
+"""
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+# Measure the pipeline itself: every pass answers every question from scratch
+os.environ.setdefault("ANSWER_CACHE", "off")
+os.environ.setdefault("TOOL_CACHE", "off")
+
+import llm.client as client
+import llm.models as models
+from agents.tutor_agent import tutor_agent
+from llm.fake_backend import FakeBackend
+
+CORPUS = os.path.join(os.path.dirname(os.path.abspath(__file__)), "corpus", "questions-v1.jsonl")
+
+def percentile(samples: list, p: float) -> float:
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(p * len(ordered)))] if ordered else 0.0
+
+async def run(questions: list, concurrency: int) -> list:
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies = []
+
+    async def one(question):
+        async with semaphore:
+            started = time.perf_counter()
+            await tutor_agent(question)
+            latencies.append(time.perf_counter() - started)
+
+    await asyncio.gather(*(one(question) for question in questions))
+    return latencies
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--concurrency", type=int, default=4)
+    parser.add_argument("--passes", type=int, default=3, help="times the corpus is answered per run")
+    parser.add_argument("--answer-latency-ms", default="lognormal:450,0.4", help=f"fake latency of {models.ANSWER_MODEL}")
+    parser.add_argument("--fast-latency-ms", default="lognormal:200,0.3", help=f"fake latency of {models.FAST_MODEL}")
+    parser.add_argument("--tokens-per-second", default="lognormal:120,0.2", help="fake output token rate")
+    args = parser.parse_args()
+
+    with open(CORPUS, encoding="utf-8") as file:
+        corpus = [json.loads(line)["question"] for line in file if line.strip()]
+    # Vary each pass's wording slightly so every question is a fresh upstream call
+    questions = [question + " " * i for i in range(args.passes) for question in corpus]
+    print(f"{len(questions)} questions, {models.ANSWER_MODEL} {args.answer_latency_ms}, {models.FAST_MODEL} {args.fast_latency_ms}")
+
+    tiered_models, tiered_caps = dict(models.STAGE_MODELS), dict(models.STAGE_MAX_OUTPUT_TOKENS)
+    for label, stage_models, stage_caps in (("one model", {}, {}), ("tiered", tiered_models, tiered_caps)):
+        models.STAGE_MODELS, models.STAGE_MAX_OUTPUT_TOKENS = stage_models, stage_caps
+        client._stage_usage.clear()
+        client.set_backend(FakeBackend(
+            latency_ms=args.answer_latency_ms,
+            tokens_per_second=args.tokens_per_second,
+            model_latency_ms={models.FAST_MODEL: args.fast_latency_ms},
+        ))
+
+        latencies = asyncio.run(run(questions, args.concurrency))
+        print(f"\n{label}: mean {statistics.mean(latencies) * 1000:.0f} ms, p95 {percentile(latencies, 0.95) * 1000:.0f} ms per question")
+        print(f"  {'stage':<18} {'model':<24} {'calls':>6} {'p50 (ms)':>9} {'p95 (ms)':>9} {'in tok/call':>12} {'out tok/call':>13}")
+        for stage, row in client.llm_stage_stats().items():
+            print(f"  {stage:<18} {','.join(row['models_used']):<24} {row['latency']['count']:>6} {row['latency']['p50_ms']:>9.0f} "
+                  f"{row['latency']['p95_ms']:>9.0f} {row['prompt_tokens_per_call']:>12.0f} {row['output_tokens_per_call']:>13.0f}")
+
+if __name__ == "__main__":
+    main()
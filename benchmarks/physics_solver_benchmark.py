@@ -0,0 +1,84 @@
+"""
+Measure the equation-graph physics solver on worksheet-style inputs.
+
+Generates a worksheet whose rows are drawn from a handful of problem shapes,
+each knowing a different set of quantities. Unknown cells are NaN. It then
+times solving it row by row with solve() against solve_table(), which groups
+rows by their known set and, when NumPy is installed, solves each group as
+arrays. It also reports how often plans were served from the cache.
+
+Usage:
+    python -m benchmarks.physics_solver_benchmark --rows 100000
+"""
+import argparse
+import math
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from tools.physics_solver import plan, solve, solve_table, _numpy
+
+SHAPES = [
+    ("initial_velocity", "acceleration", "time"),
+    ("initial_velocity", "final_velocity", "time"),
+    ("initial_velocity", "final_velocity", "displacement"),
+    ("mass", "acceleration"),
+    ("mass", "height", "velocity"),
+    ("voltage", "resistance"),
+    ("power", "current"),
+    ("force", "displacement", "time"),
+]
+
+def make_worksheet(rows: int, seed: int) -> dict:
+    rng = random.Random(seed)
+    names = sorted({name for shape in SHAPES for name in shape})
+    table = {name: [math.nan] * rows for name in names}
+    for row in range(rows):
+        for name in rng.choice(SHAPES):
+            table[name][row] = round(rng.uniform(1, 50), 2)
+    return table
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=100000, help="worksheet rows")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    table = make_worksheet(args.rows, args.seed)
+
+    plan.cache_clear()
+    started = time.perf_counter()
+    row_results = [
+        solve({name: values[row] for name, values in table.items() if not math.isnan(values[row])})
+        for row in range(args.rows)
+    ]
+    row_seconds = time.perf_counter() - started
+    row_cache = plan.cache_info()
+
+    numpy = _numpy()
+    if numpy is not None:
+        table = {name: numpy.array(values) for name, values in table.items()}
+    plan.cache_clear()
+    started = time.perf_counter()
+    table_results = solve_table(table)
+    table_seconds = time.perf_counter() - started
+
+    mismatches = 0
+    for row, expected in enumerate(row_results):
+        for name, values in table_results.items():
+            value = float(values[row])
+            if (name in expected) != (not math.isnan(value)) or (name in expected and not math.isclose(value, expected[name])):
+                mismatches += 1
+
+    print(f"Rows: {args.rows:,} across {len(SHAPES)} problem shapes")
+    print(f"Plan cache (row by row): {row_cache.hits:,} hits, {row_cache.misses} misses")
+    print(f"Row by row:  {row_seconds * 1000:9.1f} ms ({args.rows / row_seconds:,.0f} rows/s)")
+    print(f"solve_table: {table_seconds * 1000:9.1f} ms ({args.rows / table_seconds:,.0f} rows/s)"
+          f" [{'NumPy' if numpy else 'no NumPy: per-row fallback'}]")
+    print(f"Cells differing between the two: {mismatches}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,58 @@
+"""
+Measure the time tutor_agent spends outside the LLM.
+
+Runs a fixed set of questions through tutor_agent against a zero-latency
+FakeBackend, so every microsecond reported is pipeline overhead: prompt
+building, parsing, local tools and routing.
+
+Usage:
+    python -m benchmarks.pipeline_overhead --iterations 200
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+# Repeated questions would otherwise be served from the answer cache
+os.environ.setdefault("ANSWER_CACHE", "off")
+
+from llm.client import set_backend
+from llm.fake_backend import FakeBackend
+from benchmarks.load_test import QUESTIONS
+from agents.router import router_stats
+
+async def run(iterations: int) -> dict:
+    from agents.tutor_agent import tutor_agent
+
+    results = {}
+    for question in QUESTIONS:
+        timings = []
+        for _ in range(iterations):
+            started = time.perf_counter()
+            await tutor_agent(question)
+            timings.append(time.perf_counter() - started)
+        results[question] = timings
+    return results
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--iterations", type=int, default=200, help="runs per question")
+    args = parser.parse_args()
+
+    backend = FakeBackend()
+    set_backend(backend)
+    results = asyncio.run(run(args.iterations))
+
+    print(f"{'question':<55} {'median (us)':>12} {'p95 (us)':>10}")
+    for question, timings in results.items():
+        timings.sort()
+        p95 = timings[int(len(timings) * 0.95) - 1]
+        print(f"{question[:55]:<55} {statistics.median(timings) * 1e6:>12.1f} {p95 * 1e6:>10.1f}")
+    print(f"\nLLM calls per question: {backend.calls / (args.iterations * len(QUESTIONS)):.2f}")
+    print(f"Router fast-path hit rate: {router_stats()['fast_path_hit_rate']:.0%}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,231 @@
+"""
+Replay a recorded question corpus and check for performance regressions.
+
+Every question in the versioned corpus (benchmarks/corpus/questions-*.jsonl)
+is answered through tutor_agent and through the FastAPI app (POST /ask),
+at several concurrency levels. Upstream calls are answered from recorded
+fixtures with their recorded latency, so runs are repeatable and need no
+API key. For each target and concurrency level the harness reports
+p50/p95/p99 latency, LLM calls and tokens per question, and throughput. It
+then compares them with the stored baseline and exits non-zero on a
+regression. Corpus questions that name a "tool" must also get a result from
+that local tool (e.g. the balancing questions must reach the equation
+balancer rather than fall through to a generic prompt).
+
+Recorded latencies are scaled by --latency-scale (0.1 by default, to keep a
+run short); use 1 for wall-clock realism. A prompt that has no fixture
+means the fixtures are out of date, and the run fails until they are
+re-recorded.
+
+Usage:
+    python -m benchmarks.replay_benchmark                     # run and check against the baseline
+    python -m benchmarks.replay_benchmark --update-baseline   # accept the current numbers
+    python -m benchmarks.replay_benchmark --record            # re-record fixtures against Gemini
+    python -m benchmarks.replay_benchmark --record --record-from fake   # synthetic fixtures
+"""
+import argparse
+import asyncio
+import json
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+# Measure the pipeline itself: every pass answers every question from scratch
+os.environ.setdefault("ANSWER_CACHE", "off")
+os.environ.setdefault("TOOL_CACHE", "off")
+os.environ.setdefault("ADMISSION_CONTROL", "off")
+
+import llm.resilience as resilience
+from agents.tutor_agent import tutor_agent
+from llm.client import create_backend, set_backend
+from llm.fake_backend import FakeBackend
+from llm.models import FAST_MODEL
+from llm.replay_backend import ReplayBackend, RecordingBackend, load_fixtures
+from telemetry.metrics import tool_seconds, tool_errors_total
+
+CORPUS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "corpus")
+LATENCY_METRICS = ("p50_ms", "p95_ms", "p99_ms")
+COUNT_METRICS = ("llm_calls_per_question", "tokens_per_question")
+
+def load_corpus(path: str) -> list:
+    with open(path, encoding="utf-8") as file:
+        return [json.loads(line) for line in file if line.strip()]
+
+def percentile(samples: list, p: float) -> float:
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(p * len(ordered)))] if ordered else 0.0
+
+async def ask_tutor_agent(question: str) -> None:
+    await tutor_agent(question)
+
+async def replay(questions: list, concurrency: int, target: str) -> list:
+    """Answer the questions at the given concurrency, returning each one's latency in seconds"""
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies = []
+
+    if target == "app":
+        import httpx
+        import main
+        client = httpx.AsyncClient(transport=httpx.ASGITransport(app=main.app), base_url="http://replay")
+
+        async def ask(question):
+            response = await client.post("/ask", json={"query": question})
+            response.raise_for_status()
+    else:
+        client, ask = None, ask_tutor_agent
+
+    async def one(question):
+        async with semaphore:
+            started = time.perf_counter()
+            await ask(question)
+            latencies.append(time.perf_counter() - started)
+
+    try:
+        await asyncio.gather(*(one(question) for question in questions))
+    finally:
+        if client is not None:
+            await client.aclose()
+    return latencies
+
+def run(fixtures: dict, questions: list, concurrency: int, target: str, latency_scale: float) -> dict:
+    backend = ReplayBackend(fixtures, latency_scale=latency_scale, fallback=FakeBackend())
+    set_backend(backend)
+    # Hedging adapts to the latencies seen so far; start every run from the same state
+    resilience._stage_latency.clear()
+    resilience.breaker = resilience.CircuitBreaker()
+
+    started = time.perf_counter()
+    latencies = asyncio.run(replay(questions, concurrency, target))
+    elapsed = time.perf_counter() - started
+    return {
+        "p50_ms": round(percentile(latencies, 0.50) * 1000, 1),
+        "p95_ms": round(percentile(latencies, 0.95) * 1000, 1),
+        "p99_ms": round(percentile(latencies, 0.99) * 1000, 1),
+        "llm_calls_per_question": round(backend.calls / len(questions), 3),
+        "tokens_per_question": round((backend.prompt_tokens + backend.output_tokens) / len(questions), 1),
+        "questions_per_second": round(len(questions) / elapsed, 2),
+        "fixture_misses": backend.misses,
+    }
+
+def tool_results(tool: str) -> float:
+    """Calls of a local tool that returned rather than raised"""
+    return tool_seconds.count(tool=tool) - tool_errors_total.value(tool=tool)
+
+def check_tools(fixtures: dict, corpus: list) -> list:
+    """Answer each question that names a "tool" once, returning the ones that got no result from it"""
+    set_backend(ReplayBackend(fixtures, latency_scale=0, fallback=FakeBackend()))
+    missed = []
+    for item in corpus:
+        tool = item.get("tool")
+        if tool is None:
+            continue
+        before = tool_results(tool)
+        asyncio.run(tutor_agent(item["question"]))
+        if tool_results(tool) <= before:
+            missed.append(f"{item['id']}: {item['question']!r} never got a result from {tool}")
+    return missed
+
+def compare(results: dict, baseline: dict, tolerance: float, count_tolerance: float) -> list:
+    """Return a description of every metric that regressed beyond its tolerance"""
+    regressions = []
+    for name, current in results.items():
+        reference = baseline.get(name)
+        if reference is None:
+            continue
+        for metric in LATENCY_METRICS + COUNT_METRICS:
+            allowed = reference[metric] * (1 + (tolerance if metric in LATENCY_METRICS else count_tolerance))
+            if current[metric] > allowed:
+                regressions.append(f"{name} {metric}: {current[metric]:g} > {reference[metric]:g} (allowed {allowed:.4g})")
+        floor = reference["questions_per_second"] * (1 - tolerance)
+        if current["questions_per_second"] < floor:
+            regressions.append(f"{name} questions_per_second: {current['questions_per_second']:g} < {reference['questions_per_second']:g} (allowed {floor:.4g})")
+    return regressions
+
+def record(corpus: list, fixtures_path: str, source: str, concurrency: int):
+    """Answer the corpus once through a recording backend and save the fixtures"""
+    if source == "fake":
+        # Synthetic stand-in: lognormal time to first token (shorter on the fast model) plus output at a token rate
+        inner = FakeBackend(latency_ms="lognormal:450,0.4", tokens_per_second="lognormal:120,0.2", seed=1,
+                            model_latency_ms={FAST_MODEL: "lognormal:200,0.3"})
+    else:
+        inner = create_backend(source)
+    recorder = RecordingBackend(inner)
+    set_backend(recorder)
+    asyncio.run(replay([item["question"] for item in corpus], concurrency, "tutor"))
+    recorder.save(fixtures_path)
+    print(f"Recorded {len(recorder.fixtures)} calls from '{source}' to {fixtures_path}")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--corpus", default=os.path.join(CORPUS_DIR, "questions-v1.jsonl"))
+    parser.add_argument("--fixtures", default=os.path.join(CORPUS_DIR, "fixtures-v1.jsonl"))
+    parser.add_argument("--baseline", default=os.path.join(CORPUS_DIR, "baseline-v1.json"))
+    parser.add_argument("--targets", default="tutor,app", help="comma-separated: tutor (tutor_agent) and/or app (POST /ask)")
+    parser.add_argument("--concurrency", default="1,8,32", help="comma-separated concurrency levels")
+    parser.add_argument("--passes", type=int, default=1, help="times the corpus is replayed per run")
+    parser.add_argument("--latency-scale", type=float, default=0.1, help="multiplier for recorded latencies")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="allowed relative slowdown in latency and throughput")
+    parser.add_argument("--count-tolerance", type=float, default=0.02, help="allowed relative growth in calls and tokens per question")
+    parser.add_argument("--update-baseline", action="store_true", help="store this run as the new baseline")
+    parser.add_argument("--record", action="store_true", help="re-record the fixtures instead of replaying them")
+    parser.add_argument("--record-from", default="gemini", help="backend to record from (gemini or fake)")
+    args = parser.parse_args()
+
+    corpus = load_corpus(args.corpus)
+    if args.record:
+        record(corpus, args.fixtures, args.record_from, concurrency=4)
+        return
+
+    fixtures = load_fixtures(args.fixtures)
+    missed = check_tools(fixtures, corpus)
+    if missed:
+        print("Questions that should be answered with a local tool but weren't:")
+        for line in missed:
+            print(f"  {line}")
+        sys.exit(1)
+
+    questions = [item["question"] for item in corpus] * args.passes
+    print(f"Replaying {len(corpus)} questions x {args.passes} from {os.path.basename(args.corpus)} "
+          f"({len(fixtures)} fixtures, latency x{args.latency_scale:g})")
+    print(f"{'target':<7} {'conc':>5} {'p50 (ms)':>9} {'p95 (ms)':>9} {'p99 (ms)':>9} {'calls/q':>8} {'tokens/q':>9} {'q/s':>8} {'misses':>7}")
+
+    results = {}
+    for target in args.targets.split(","):
+        for concurrency in (int(level) for level in args.concurrency.split(",")):
+            result = results[f"{target}@{concurrency}"] = run(fixtures, questions, concurrency, target, args.latency_scale)
+            print(f"{target:<7} {concurrency:>5} {result['p50_ms']:>9.1f} {result['p95_ms']:>9.1f} {result['p99_ms']:>9.1f} "
+                  f"{result['llm_calls_per_question']:>8.2f} {result['tokens_per_question']:>9.0f} {result['questions_per_second']:>8.1f} {result['fixture_misses']:>7}")
+
+    misses = sum(result["fixture_misses"] for result in results.values())
+    if misses:
+        print(f"\n{misses} calls had no recorded response; the prompts changed since recording. Re-record with --record.")
+        sys.exit(2)
+
+    settings = {"corpus": os.path.basename(args.corpus), "latency_scale": args.latency_scale, "passes": args.passes}
+    if args.update_baseline:
+        with open(args.baseline, "w", encoding="utf-8") as file:
+            json.dump({**settings, "results": results}, file, indent=2)
+            file.write("\n")
+        print(f"\nBaseline written to {args.baseline}")
+        return
+
+    if not os.path.exists(args.baseline):
+        print(f"\nNo baseline at {args.baseline}; create one with --update-baseline")
+        return
+    with open(args.baseline, encoding="utf-8") as file:
+        baseline = json.load(file)
+    if any(baseline.get(key) != value for key, value in settings.items()):
+        print(f"\nBaseline was recorded with different settings ({ {key: baseline.get(key) for key in settings} }); not comparing")
+        sys.exit(2)
+
+    regressions = compare(results, baseline["results"], args.tolerance, args.count_tolerance)
+    if regressions:
+        print("\nRegressions against the baseline:")
+        for regression in regressions:
+            print(f"  {regression}")
+        sys.exit(1)
+    print(f"\nNo regressions against the baseline (tolerance {args.tolerance:.0%} latency/throughput, {args.count_tolerance:.0%} calls/tokens)")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,126 @@
+"""
+Check the resilient LLM call layer against a fault-injecting FakeBackend.
+
+Runs the same questions through tutor_agent with and without the
+resilience policy in four scenarios:
+
+  errors   a share of calls fail with retryable 503s (retries recover them)
+  stalls   a share of calls hang (stage deadlines cut them short)
+  outage   every call fails (the circuit breaker fails fast, answers degrade)
+  tail     long-tailed classification latency (hedging trims routing's tail)
+
+For each run it reports full answers, degraded answers, failed requests,
+p50/p99 request latency and backend calls.
+
+Usage:
+    python -m benchmarks.resilience_benchmark --requests 400
+"""
+import argparse
+import asyncio
+import math
+import os
+import sys
+import time
+from contextlib import contextmanager
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+# Repeated questions would otherwise be served from the answer cache
+os.environ.setdefault("ANSWER_CACHE", "off")
+
+import llm.resilience as resilience
+from agents.degraded import UNAVAILABLE_ANSWER, UNAVAILABLE_NOTE
+from agents.tutor_agent import tutor_agent, route_subject
+from benchmarks.load_test import QUESTIONS
+from llm.client import set_backend
+from llm.fake_backend import FakeBackend
+
+# Questions the keyword router is unsure about, so each one is classified by the LLM
+AMBIGUOUS = [
+    "Why is the sky blue?",
+    "What makes a good study schedule?",
+    "How do rainbows form?",
+    "What is the meaning of entropy?",
+    "Why do cats purr?",
+    "What should I read next?",
+]
+
+@contextmanager
+def policy(enabled: bool, **overrides):
+    """Apply the resilience policy (with overrides), or switch it off, for the duration of a run"""
+    names = {"MAX_RETRIES", "HEDGE_STAGES", "DEFAULT_TIMEOUT_SECONDS", "STAGE_TIMEOUT_SECONDS", "breaker", *overrides}
+    saved = {name: getattr(resilience, name) for name in names}
+    resilience.breaker = resilience.CircuitBreaker()
+    if not enabled:
+        resilience.MAX_RETRIES = 0
+        resilience.HEDGE_STAGES = set()
+        resilience.DEFAULT_TIMEOUT_SECONDS = math.inf
+        resilience.STAGE_TIMEOUT_SECONDS = {}
+        resilience.breaker = resilience.CircuitBreaker(failure_threshold=math.inf)
+    else:
+        for name, value in overrides.items():
+            setattr(resilience, name, value)
+    resilience._stage_latency.clear()
+    try:
+        yield
+    finally:
+        for name, value in saved.items():
+            setattr(resilience, name, value)
+
+def percentile(samples: list, p: float) -> float:
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(p * len(ordered)))] if ordered else 0.0
+
+async def run(answer, questions: list, concurrency: int, warmup: int = 0) -> dict:
+    semaphore = asyncio.Semaphore(concurrency)
+    outcomes = {"full": 0, "degraded": 0, "failed": 0}
+    latencies = []
+
+    async def one(question, measured):
+        async with semaphore:
+            started = time.perf_counter()
+            try:
+                text = await answer(question)
+                outcome = "degraded" if text == UNAVAILABLE_ANSWER or UNAVAILABLE_NOTE in text else "full"
+            except Exception:
+                outcome = "failed"
+            if measured:
+                latencies.append(time.perf_counter() - started)
+                outcomes[outcome] += 1
+
+    # Warm-up requests give the hedging policy a latency baseline
+    await asyncio.gather(*(one(question, False) for question in questions[:warmup]))
+    await asyncio.gather(*(one(question, True) for question in questions[warmup:]))
+    return {**outcomes, "p50": percentile(latencies, 0.5), "p99": percentile(latencies, 0.99)}
+
+def scenario(name: str, questions: list, concurrency: int, backend_options: dict, answer=tutor_agent, warmup: int = 0, **overrides):
+    print(f"\n{name}: {backend_options}")
+    print(f"{'policy':<8} {'full':>6} {'degraded':>9} {'failed':>7} {'p50 (ms)':>9} {'p99 (ms)':>9} {'calls':>6}")
+    for enabled in (False, True):
+        backend = FakeBackend(**backend_options)
+        set_backend(backend)
+        with policy(enabled, **overrides):
+            result = asyncio.run(run(answer, questions, concurrency, warmup))
+        print(f"{'on' if enabled else 'off':<8} {result['full']:>6} {result['degraded']:>9} {result['failed']:>7} "
+              f"{result['p50'] * 1000:>9.0f} {result['p99'] * 1000:>9.0f} {backend.calls:>6}")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=400, help="questions per run")
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    mixed = [QUESTIONS[i % len(QUESTIONS)] + " " * (i // len(QUESTIONS)) for i in range(args.requests)]
+    ambiguous = [AMBIGUOUS[i % len(AMBIGUOUS)] + " " * (i // len(AMBIGUOUS)) for i in range(args.requests)]
+
+    scenario("errors", mixed, args.concurrency, {"latency_ms": "lognormal:50,0.3", "error_rate": 0.2, "seed": args.seed},
+             RETRY_BASE_SECONDS=0.02)
+    scenario("stalls", mixed, args.concurrency, {"latency_ms": "lognormal:50,0.3", "stall_rate": 0.05, "stall_ms": 3000, "seed": args.seed},
+             DEFAULT_TIMEOUT_SECONDS=0.5, RETRY_BASE_SECONDS=0.02)
+    scenario("outage", mixed, args.concurrency, {"latency_ms": "lognormal:50,0.3", "error_rate": 1.0, "seed": args.seed})
+    # Only routing is timed here, since hedging applies to the classification call
+    scenario("tail", ambiguous, args.concurrency, {"latency_ms": "lognormal:100,0.9", "seed": args.seed},
+             answer=route_subject, warmup=min(40, args.requests // 4))
+
+if __name__ == "__main__":
+    main()
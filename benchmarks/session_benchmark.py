@@ -0,0 +1,113 @@
+"""
+Prompt size and memory of conversations: full history vs. the session store.
+
+Simulates students holding long conversations (a problem, then follow-ups
+like "now do it for 20 kg") against a FakeBackend that writes tutor-length
+answers. Each follow-up is answered three ways:
+
+  stateless   no context at all (what /ask did before sessions)
+  full        the whole transcript prepended to every prompt
+  session     the token-budgeted, summarised context of SessionStore
+
+and the benchmark reports prompt tokens per question as the conversation
+grows, plus the bytes each approach keeps per session.
+
+Usage:
+    python -m benchmarks.session_benchmark --sessions 20 --turns 40
+"""
+import argparse
+import asyncio
+import json
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+# Follow-ups bypass the cache anyway; keep first questions comparable too
+os.environ.setdefault("ANSWER_CACHE", "off")
+
+from agents.tutor_agent import tutor_agent
+from cache.stores import MemoryStore
+from llm.client import set_backend, conversation_context
+from llm.fake_backend import FakeBackend, default_responder
+from sessions.session_store import SessionStore
+
+CONVERSATION = [
+    "A 10 kg box is pushed with an acceleration of 2 m/s^2. What is the net force on it?",
+    "Now do it for 20 kg.",
+    "What if the acceleration doubles as well?",
+    "Why does the force grow with the mass?",
+    "How would friction change the answer?",
+    "Can you solve 3x + 5 = 20 for x?",
+    "And what if it were 3x + 5 = 50?",
+    "Explain how you isolated x.",
+]
+
+EXPLANATION = (
+    "\n\nFirst, recall the relevant principle and write down what we know. "
+    "Substituting the given values, we get a result of 20 = 10 * 2 in consistent units. "
+    "It helps to check the units at every step, since a mismatch is the most common mistake. "
+    "Notice how the answer scales with each input: doubling one quantity doubles the result. "
+    "In everyday terms, this is why heavier objects are harder to get moving. "
+    "Try changing one value at a time and predicting the new result before calculating it."
+)
+
+def tutor_length_responder(prompt: str) -> str:
+    """default_responder, with answers padded to a typical tutoring length (JSON and labels untouched)"""
+    reply = default_responder(prompt)
+    return reply + EXPLANATION * 2 if "\n" in reply else reply
+
+async def converse(mode: str, sessions: int, turns: int, backend: FakeBackend) -> tuple:
+    """Return (prompt tokens per question at each turn, bytes kept per session)"""
+    store = SessionStore(MemoryStore(max_entries=sessions, max_bytes=1 << 30, ttl_seconds=0))
+    transcripts = [[] for _ in range(sessions)]
+    tokens_per_turn = []
+
+    async def ask(session, question):
+        if mode == "session":
+            context = await store.context(str(session))
+        elif mode == "full":
+            context = "\n".join(f"Student: {q}\nTutor: {a}" for q, a in transcripts[session])
+        else:
+            context = None
+        with conversation_context(context):
+            answer = await tutor_agent(question)
+        transcripts[session].append((question, answer))
+        if mode == "session":
+            await store.add_turn(str(session), question, answer)
+
+    for turn in range(turns):
+        question = CONVERSATION[turn % len(CONVERSATION)]
+        before = backend.prompt_tokens
+        await asyncio.gather(*(ask(session, question) for session in range(sessions)))
+        tokens_per_turn.append((backend.prompt_tokens - before) / sessions)
+
+    if mode == "session":
+        kept = store.stats()["bytes"] / sessions
+    elif mode == "full":
+        kept = sum(len(json.dumps(transcript)) for transcript in transcripts) / sessions
+    else:
+        kept = 0
+    return tokens_per_turn, kept
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sessions", type=int, default=20, help="concurrent conversations")
+    parser.add_argument("--turns", type=int, default=40, help="questions per conversation")
+    args = parser.parse_args()
+
+    results = {}
+    for mode in ("stateless", "full", "session"):
+        backend = FakeBackend(responder=tutor_length_responder)
+        set_backend(backend)
+        results[mode] = asyncio.run(converse(mode, args.sessions, args.turns, backend))
+
+    print(f"Prompt tokens per question ({args.sessions} sessions, {args.turns} turns each)")
+    print(f"{'turn':>5} {'stateless':>10} {'full':>10} {'session':>10}")
+    for turn in sorted({1, 2, 5, 10, 20, 40, 80, args.turns}):
+        if turn <= args.turns:
+            print(f"{turn:>5} " + " ".join(f"{results[mode][0][turn - 1]:>10.0f}" for mode in ("stateless", "full", "session")))
+    print(f"\n{'total':>5} " + " ".join(f"{sum(results[mode][0]):>10.0f}" for mode in ("stateless", "full", "session")))
+    print(f"\nBytes kept per session after {args.turns} turns: full transcript {results['full'][1]:.0f}, session store {results['session'][1]:.0f}")
+
+if __name__ == "__main__":
+    main()
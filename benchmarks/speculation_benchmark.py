@@ -0,0 +1,90 @@
+"""
+Speculative routing: latency saved vs. extra upstream calls spent.
+
+Runs questions the keyword router is unsure about (so each one is
+classified by the LLM) through tutor_agent with speculation off, and with
+the top one or two likely subjects' agents started alongside
+classification. For each run it reports mean/p50/p95 latency, LLM calls
+and prompt tokens per question, and how many speculative runs were
+confirmed or cancelled.
+
+Usage:
+    python -m benchmarks.speculation_benchmark --requests 200 --latency-ms lognormal:300,0.3
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+# Repeated questions would otherwise be served from the answer cache
+os.environ.setdefault("ANSWER_CACHE", "off")
+
+import agents.tutor_agent as tutor
+from agents.speculation import speculation_stats
+from llm.client import set_backend
+from llm.fake_backend import FakeBackend
+
+# Low-confidence questions with keyword hints; the fake classifier agrees with the hint for some of them only
+AMBIGUOUS = [
+    "What is the energy of a molecule?",
+    "Why does a loop run forever?",
+    "What is the speed of light?",
+    "What is the power of a computer?",
+    "Explain the mass of an electron",
+    "How fast does a sorting network run?",
+    "What is the weight of one mole of water?",
+    "Why is my code slow?",
+    "How does a stack work?",
+    "What is a function?",
+    "How does heat flow in a solution?",
+    "How much energy does a computer use?",
+    "How do waves carry energy?",
+    "Is the speed of an algorithm measured in seconds?",
+    "How much work is needed to lift a box?",
+]
+
+def percentile(samples: list, p: float) -> float:
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(p * len(ordered)))] if ordered else 0.0
+
+async def run(questions: list, concurrency: int) -> list:
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies = []
+
+    async def one(question):
+        async with semaphore:
+            started = time.perf_counter()
+            await tutor.tutor_agent(question)
+            latencies.append(time.perf_counter() - started)
+
+    await asyncio.gather(*(one(question) for question in questions))
+    return latencies
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--latency-ms", default="lognormal:300,0.3", help="fake LLM latency distribution")
+    args = parser.parse_args()
+
+    questions = [AMBIGUOUS[i % len(AMBIGUOUS)] + " " * (i // len(AMBIGUOUS)) for i in range(args.requests)]
+    print(f"{args.requests} ambiguous questions, fake LLM latency {args.latency_ms}")
+    print(f"{'speculation':<12} {'mean (ms)':>10} {'p50 (ms)':>9} {'p95 (ms)':>9} {'calls/q':>8} {'tokens/q':>9} {'confirmed':>10} {'cancelled':>10} {'wasted calls':>13}")
+    for enabled, subjects in ((False, 0), (True, 1), (True, 2)):
+        tutor.SPECULATIVE_ROUTING, tutor.SPECULATIVE_SUBJECTS = enabled, subjects
+        backend = FakeBackend(latency_ms=args.latency_ms)
+        set_backend(backend)
+        before = speculation_stats()
+        latencies = asyncio.run(run(questions, args.concurrency))
+        after = speculation_stats()
+        label = f"top {subjects}" if enabled else "off"
+        print(f"{label:<12} {statistics.mean(latencies) * 1000:>10.0f} {percentile(latencies, 0.5) * 1000:>9.0f} {percentile(latencies, 0.95) * 1000:>9.0f} "
+              f"{backend.calls / len(questions):>8.2f} {backend.prompt_tokens / len(questions):>9.0f} "
+              f"{after['hits'] - before['hits']:>10.0f} {after['misses'] - before['misses']:>10.0f} "
+              f"{after['wasted_llm_calls'] - before['wasted_llm_calls']:>13.0f}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,138 @@
+import hashlib
+import math
+import os
+import re
+import threading
+import unicodedata
+from cache.stores import create_store, call_store
+
+FILLER_WORDS = re.compile(r"\b(?:please|pls|can you|could you|kindly)\b")
+NUMBER_PATTERN = re.compile(r"\d+(?:\.\d+)?")
+
+def normalize_question(question: str) -> str:
+    """Canonical form used as the cache key: case, spacing and filler words removed"""
+    text = unicodedata.normalize("NFKC", question).lower()
+    text = FILLER_WORDS.sub(" ", text)
+    text = re.sub(r"\s+", " ", text)
+    return text.strip(" ?!.,;:")
+
+def embed_text(text: str) -> dict:
+    """
+    Cheap local embedding: L2-normalised counts of character trigrams.
+
+    Good enough to spot re-worded duplicates ("explain binary search" vs
+    "can you explain the binary search algorithm") without a network call.
+    """
+    padded = f"  {text} "
+    counts = {}
+    for i in range(len(padded) - 2):
+        gram = padded[i:i + 3]
+        counts[gram] = counts.get(gram, 0) + 1
+    norm = math.sqrt(sum(c * c for c in counts.values())) or 1.0
+    return {gram: count / norm for gram, count in counts.items()}
+
+def cosine_similarity(a: dict, b: dict) -> float:
+    if len(a) > len(b):
+        a, b = b, a
+    return sum(weight * b.get(gram, 0.0) for gram, weight in a.items())
+
+class AnswerCache:
+    """
+    Cache of final answers keyed on normalised question text plus subject.
+
+    Exact lookups hash the normalised text. When similarity_threshold is set,
+    a miss falls back to comparing the question's trigram embedding against
+    cached questions of the same subject; a near-duplicate is only accepted
+    if it mentions exactly the same numbers, so "2+3" never answers "2+4".
+    """
+
+    def __init__(self, store, similarity_threshold: float = 0.0):
+        self.store = store
+        self.similarity_threshold = similarity_threshold
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.similar_hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def _key(subject: str, normalized: str) -> str:
+        digest = hashlib.sha256(normalized.encode("utf-8")).hexdigest()
+        return f"{subject}:{digest}"
+
+    def _count(self, counter: str):
+        with self._lock:
+            setattr(self, counter, getattr(self, counter) + 1)
+
+    def _find_similar(self, subject: str, normalized: str):
+        embedding = embed_text(normalized)
+        numbers = NUMBER_PATTERN.findall(normalized)
+        best_answer, best_score = None, self.similarity_threshold
+        for _, entry in self.store.scan(subject):
+            if entry.get("numbers") != numbers:
+                continue
+            score = cosine_similarity(embedding, entry["embedding"])
+            if score >= best_score:
+                best_answer, best_score = entry["answer"], score
+        return best_answer
+
+    async def get(self, subject: str, question: str, count_miss: bool = True):
+        """
+        Return a cached answer for this question, or None.
+
+        count_miss=False is for speculative lookups that are followed by a
+        regular one on a miss, so each question counts as one miss.
+        """
+        normalized = normalize_question(question)
+        entry = await call_store(self.store, self.store.get, self._key(subject, normalized))
+        if entry is not None:
+            self._count("hits")
+            return entry["answer"]
+
+        if self.similarity_threshold > 0:
+            answer = await call_store(self.store, self._find_similar, subject, normalized)
+            if answer is not None:
+                self._count("similar_hits")
+                return answer
+
+        if count_miss:
+            self._count("misses")
+        return None
+
+    async def set(self, subject: str, question: str, answer: str):
+        normalized = normalize_question(question)
+        entry = {"question": normalized, "answer": answer}
+        if self.similarity_threshold > 0:
+            entry["embedding"] = embed_text(normalized)
+            entry["numbers"] = NUMBER_PATTERN.findall(normalized)
+        await call_store(self.store, self.store.set, self._key(subject, normalized), entry, subject)
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.similar_hits + self.misses
+            counters = {
+                "hits": self.hits,
+                "similar_hits": self.similar_hits,
+                "misses": self.misses,
+                "hit_rate": round((self.hits + self.similar_hits) / lookups, 4) if lookups else 0.0,
+            }
+        return {**counters, "similarity_threshold": self.similarity_threshold, **self.store.stats()}
+
+_answer_cache = None
+
+def get_answer_cache():
+    """Return the process-wide answer cache configured from ANSWER_CACHE_*, or None when disabled"""
+    global _answer_cache
+    kind = os.getenv("ANSWER_CACHE", "memory")
+    if kind == "off":
+        return None
+    if _answer_cache is None:
+        store = create_store(
+            kind,
+            path=os.getenv("ANSWER_CACHE_PATH", "tutor_cache.sqlite3"),
+            table="answers",
+            max_entries=int(os.getenv("ANSWER_CACHE_MAX_ENTRIES", "5000")),
+            max_bytes=int(float(os.getenv("ANSWER_CACHE_MAX_MB", "32")) * 1024 * 1024),
+            ttl_seconds=float(os.getenv("ANSWER_CACHE_TTL", "86400")),
+        )
+        _answer_cache = AnswerCache(store, similarity_threshold=float(os.getenv("ANSWER_CACHE_SIMILARITY", "0")))
+    return _answer_cache
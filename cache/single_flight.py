@@ -0,0 +1,54 @@
+import asyncio
+import weakref
+
+class SingleFlight:
+    """
+    Coalesce concurrent calls that share a key onto one execution.
+
+    The first caller for a key starts the work; anyone asking for the same key
+    while it is still running awaits that same result instead of repeating the
+    upstream calls. Callers are shielded from each other, so one caller being
+    cancelled does not cancel the work others are waiting on.
+    """
+
+    def __init__(self):
+        # Tasks belong to an event loop, so in-flight calls are tracked per loop
+        self._in_flight = weakref.WeakKeyDictionary()
+        self.leaders = 0
+        self.followers = 0
+
+    async def run(self, key, func):
+        """Return await func(), sharing the result with concurrent callers using the same key"""
+        calls = self._in_flight.setdefault(asyncio.get_running_loop(), {})
+        task = calls.get(key)
+        if task is None:
+            task = asyncio.ensure_future(func())
+            calls[key] = task
+            self.leaders += 1
+
+            def finished(done):
+                if calls.get(key) is done:
+                    del calls[key]
+                # Mark the exception as retrieved even if every caller went away
+                if not done.cancelled():
+                    done.exception()
+            task.add_done_callback(finished)
+        else:
+            self.followers += 1
+        return await asyncio.shield(task)
+
+    def is_running(self, key) -> bool:
+        """True if a call for key is in flight on the running loop, so run() would join it"""
+        return key in self._in_flight.get(asyncio.get_running_loop(), {})
+
+    def in_flight(self) -> int:
+        return sum(len(calls) for calls in self._in_flight.values())
+
+    def stats(self) -> dict:
+        total = self.leaders + self.followers
+        return {
+            "leaders": self.leaders,
+            "coalesced": self.followers,
+            "coalesce_rate": round(self.followers / total, 4) if total else 0.0,
+            "in_flight": self.in_flight(),
+        }
@@ -0,0 +1,215 @@
+import asyncio
+import json
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+class MemoryStore:
+    """
+    In-process key/value store with TTL expiry and LRU eviction.
+
+    Values must be JSON-serialisable; their serialised size counts towards
+    max_bytes. Entries can be tagged with a group so callers can scan a
+    subset (e.g. all answers for one subject).
+    """
+
+    blocking = False
+
+    def __init__(self, max_entries: int = 5000, max_bytes: int = 32 * 1024 * 1024, ttl_seconds: float = 86400):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttl_seconds = ttl_seconds
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.bytes = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def _expired(self, created: float, now: float) -> bool:
+        return self.ttl_seconds > 0 and now - created > self.ttl_seconds
+
+    def _remove(self, key):
+        _, _, _, size = self._entries.pop(key)
+        self.bytes -= size
+
+    def get(self, key: str):
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            value, _, created, _ = entry
+            if self._expired(created, now):
+                self._remove(key)
+                self.expirations += 1
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key: str, value, group: str = ""):
+        size = len(key) + len(json.dumps(value))
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = (value, group, time.time(), size)
+            self.bytes += size
+            while len(self._entries) > self.max_entries or self.bytes > self.max_bytes:
+                self._remove(next(iter(self._entries)))
+                self.evictions += 1
+
+    def scan(self, group: str = ""):
+        """Return (key, value) pairs in a group, most recently used first"""
+        now = time.time()
+        with self._lock:
+            return [
+                (key, value)
+                for key, (value, entry_group, created, _) in reversed(self._entries.items())
+                if entry_group == group and not self._expired(created, now)
+            ]
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.bytes = 0
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "store": "memory",
+                "entries": len(self._entries),
+                "bytes": self.bytes,
+                "max_bytes": self.max_bytes,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+            }
+
+class SQLiteStore:
+    """
+    Key/value store in a local SQLite file, shared by every worker on the host.
+
+    Same semantics as MemoryStore: TTL expiry on read, and least-recently-used
+    eviction once max_entries or max_bytes is exceeded. Calls block on disk,
+    so async callers should run them in a thread (see the blocking flag).
+    """
+
+    blocking = True
+
+    def __init__(self, path: str, max_entries: int = 5000, max_bytes: int = 32 * 1024 * 1024, ttl_seconds: float = 86400, table: str = "cache"):
+        self.path = path
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttl_seconds = ttl_seconds
+        self.table = table
+        self._local = threading.local()
+        self.evictions = 0
+        self.expirations = 0
+        with self._connect() as conn:
+            conn.execute(
+                f"""CREATE TABLE IF NOT EXISTS {table} (
+                    key TEXT PRIMARY KEY,
+                    grp TEXT NOT NULL,
+                    value TEXT NOT NULL,
+                    size INTEGER NOT NULL,
+                    created REAL NOT NULL,
+                    last_access REAL NOT NULL
+                )"""
+            )
+            conn.execute(f"CREATE INDEX IF NOT EXISTS {table}_grp ON {table} (grp)")
+            conn.execute(f"CREATE INDEX IF NOT EXISTS {table}_last_access ON {table} (last_access)")
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=5, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def _cutoff(self, now: float) -> float:
+        return now - self.ttl_seconds if self.ttl_seconds > 0 else float("-inf")
+
+    def get(self, key: str):
+        now = time.time()
+        conn = self._connect()
+        row = conn.execute(f"SELECT value, created FROM {self.table} WHERE key = ?", (key,)).fetchone()
+        if row is None:
+            return None
+        value, created = row
+        if created < self._cutoff(now):
+            conn.execute(f"DELETE FROM {self.table} WHERE key = ?", (key,))
+            self.expirations += 1
+            return None
+        conn.execute(f"UPDATE {self.table} SET last_access = ? WHERE key = ?", (now, key))
+        return json.loads(value)
+
+    def set(self, key: str, value, group: str = ""):
+        serialised = json.dumps(value)
+        size = len(key) + len(serialised)
+        if size > self.max_bytes:
+            return
+        now = time.time()
+        conn = self._connect()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            conn.execute(
+                f"INSERT OR REPLACE INTO {self.table} (key, grp, value, size, created, last_access) VALUES (?, ?, ?, ?, ?, ?)",
+                (key, group, serialised, size, now, now),
+            )
+            self.expirations += conn.execute(f"DELETE FROM {self.table} WHERE created < ?", (self._cutoff(now),)).rowcount
+            count, total = conn.execute(f"SELECT COUNT(*), COALESCE(SUM(size), 0) FROM {self.table}").fetchone()
+            if count > self.max_entries or total > self.max_bytes:
+                excess_rows, excess_bytes = count - self.max_entries, total - self.max_bytes
+                removed = 0
+                for old_key, old_size in conn.execute(f"SELECT key, size FROM {self.table} ORDER BY last_access").fetchall():
+                    if excess_rows <= 0 and excess_bytes <= 0:
+                        break
+                    conn.execute(f"DELETE FROM {self.table} WHERE key = ?", (old_key,))
+                    excess_rows -= 1
+                    excess_bytes -= old_size
+                    removed += 1
+                self.evictions += removed
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+
+    def scan(self, group: str = ""):
+        """Return (key, value) pairs in a group, most recently used first"""
+        rows = self._connect().execute(
+            f"SELECT key, value FROM {self.table} WHERE grp = ? AND created >= ? ORDER BY last_access DESC",
+            (group, self._cutoff(time.time())),
+        ).fetchall()
+        return [(key, json.loads(value)) for key, value in rows]
+
+    def clear(self):
+        self._connect().execute(f"DELETE FROM {self.table}")
+
+    def stats(self) -> dict:
+        count, total = self._connect().execute(f"SELECT COUNT(*), COALESCE(SUM(size), 0) FROM {self.table}").fetchone()
+        return {
+            "store": "sqlite",
+            "path": self.path,
+            "entries": count,
+            "bytes": total,
+            "max_bytes": self.max_bytes,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+        }
+
+def create_store(kind: str, path: str, table: str, max_entries: int, max_bytes: int, ttl_seconds: float):
+    """Build a cache store ("memory" or "sqlite")"""
+    if kind == "memory":
+        return MemoryStore(max_entries=max_entries, max_bytes=max_bytes, ttl_seconds=ttl_seconds)
+    if kind == "sqlite":
+        return SQLiteStore(path, max_entries=max_entries, max_bytes=max_bytes, ttl_seconds=ttl_seconds, table=table)
+    raise ValueError(f"Unknown cache store '{kind}'")
+
+async def call_store(store, func, *args):
+    """Call a store operation, off the event loop when the store blocks on disk"""
+    if store.blocking:
+        return await asyncio.to_thread(func, *args)
+    return func(*args)
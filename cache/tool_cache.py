@@ -0,0 +1,91 @@
+import functools
+import os
+import threading
+from cache.stores import create_store, call_store
+from llm.client import conversation_context
+
+def collapse_whitespace(argument: str) -> str:
+    return " ".join(argument.split())
+
+def lowercase(argument: str) -> str:
+    return collapse_whitespace(argument).lower()
+
+def strip_whitespace(argument: str) -> str:
+    """For chemical formulas, where spacing is irrelevant but case is not (CO vs Co)"""
+    return "".join(argument.split())
+
+class ToolCache:
+    """Memoised results of LLM-backed tools, grouped by tool name"""
+
+    def __init__(self, store):
+        self.store = store
+        self._lock = threading.Lock()
+        self._counters = {}
+
+    def _count(self, tool: str, counter: str):
+        with self._lock:
+            counters = self._counters.setdefault(tool, {"hits": 0, "misses": 0})
+            counters[counter] += 1
+
+    async def get(self, tool: str, key: str) -> tuple:
+        """Return (found, value) for a tool call"""
+        entry = await call_store(self.store, self.store.get, f"{tool}:{key}")
+        self._count(tool, "hits" if entry is not None else "misses")
+        return (True, entry["value"]) if entry is not None else (False, None)
+
+    async def set(self, tool: str, key: str, value):
+        await call_store(self.store, self.store.set, f"{tool}:{key}", {"value": value}, tool)
+
+    def stats(self) -> dict:
+        with self._lock:
+            tools = {tool: dict(counters) for tool, counters in self._counters.items()}
+        return {"tools": tools, **self.store.stats()}
+
+_tool_cache = None
+
+def get_tool_cache():
+    """Return the process-wide tool cache configured from TOOL_CACHE_*, or None when disabled"""
+    global _tool_cache
+    kind = os.getenv("TOOL_CACHE", "memory")
+    if kind == "off":
+        return None
+    if _tool_cache is None:
+        store = create_store(
+            kind,
+            path=os.getenv("TOOL_CACHE_PATH", "tutor_cache.sqlite3"),
+            table="tool_results",
+            max_entries=int(os.getenv("TOOL_CACHE_MAX_ENTRIES", "2000")),
+            max_bytes=int(float(os.getenv("TOOL_CACHE_MAX_MB", "16")) * 1024 * 1024),
+            ttl_seconds=float(os.getenv("TOOL_CACHE_TTL", str(7 * 86400))),
+        )
+        _tool_cache = ToolCache(store)
+    return _tool_cache
+
+def memoize_tool(tool: str, normalize=collapse_whitespace, should_cache=bool):
+    """
+    Cache an async single-argument tool on its normalised argument.
+
+    should_cache decides whether a result is worth keeping, so fallback
+    results produced when the LLM call failed are never memoised. The tool
+    runs outside any session's conversation: its result is shared by every
+    user asking about the same argument, so it must not depend on (or
+    reveal) one user's earlier questions.
+    """
+    def decorator(func):
+        @functools.wraps(func)
+        async def wrapper(argument: str):
+            cache = get_tool_cache()
+            if cache is None:
+                with conversation_context(None):
+                    return await func(argument)
+            key = normalize(argument)
+            found, value = await cache.get(tool, key)
+            if found:
+                return value
+            with conversation_context(None):
+                result = await func(argument)
+            if should_cache(result):
+                await cache.set(tool, key, result)
+            return result
+        return wrapper
+    return decorator
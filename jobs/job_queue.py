@@ -0,0 +1,405 @@
+import asyncio
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from admission.queue import Overloaded
+from cache.stores import call_store
+from telemetry.metrics import registry
+
+QUEUED = "queued"
+RUNNING = "running"
+DONE = "done"
+FAILED = "failed"
+CANCELLED = "cancelled"
+FINISHED = (DONE, FAILED, CANCELLED)
+
+# How often a client waiting on a job checks its status, for jobs answered by another process
+STATUS_POLL_INTERVAL = 1.0
+
+_jobs_total = registry.counter("tutor_jobs_total", "Question jobs by outcome (submitted, done, failed, cancelled, requeued)", ("outcome",))
+_job_wait_seconds = registry.histogram("tutor_job_wait_seconds", "Time jobs spent queued before a worker claimed them")
+_job_run_seconds = registry.histogram("tutor_job_run_seconds", "Time workers spent answering a job")
+
+class JobQueue:
+    """
+    Question jobs in a local SQLite file, shared by every worker process on the host.
+
+    A job is queued, then claimed by one worker (running), then done, failed
+    or cancelled. A running job holds a lease that its worker renews with
+    heartbeat(); if the worker dies, the job is claimed again once the lease
+    lapses, up to max_attempts times. Finished jobs are kept for
+    retention_seconds so clients can fetch the result, and deleted by the
+    next purge() after that. Calls
+    block on disk, so async callers should run them in a thread (see the
+    blocking flag).
+    """
+
+    blocking = True
+
+    def __init__(self, path: str, max_queued: int = 1000, retention_seconds: float = 3600,
+                 lease_seconds: float = 60, max_attempts: int = 3, table: str = "jobs"):
+        self.path = path
+        self.max_queued = max_queued
+        self.retention_seconds = retention_seconds
+        self.lease_seconds = lease_seconds
+        self.max_attempts = max_attempts
+        self.table = table
+        self._local = threading.local()
+        self.expirations = 0
+        with self._connect() as conn:
+            conn.execute(
+                f"""CREATE TABLE IF NOT EXISTS {table} (
+                    id TEXT PRIMARY KEY,
+                    query TEXT NOT NULL,
+                    session_id TEXT,
+                    status TEXT NOT NULL,
+                    answer TEXT,
+                    error TEXT,
+                    llm_calls INTEGER,
+                    attempts INTEGER NOT NULL DEFAULT 0,
+                    created REAL NOT NULL,
+                    started REAL,
+                    finished REAL,
+                    heartbeat REAL,
+                    expires REAL
+                )"""
+            )
+            conn.execute(f"CREATE INDEX IF NOT EXISTS {table}_status_created ON {table} (status, created)")
+            conn.execute(f"CREATE INDEX IF NOT EXISTS {table}_expires ON {table} (expires)")
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=5, isolation_level=None)
+            conn.row_factory = sqlite3.Row
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def _transaction(self, work):
+        """Run work(conn) in a write transaction, so concurrent workers never claim the same job"""
+        conn = self._connect()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            result = work(conn)
+            conn.execute("COMMIT")
+            return result
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+
+    @staticmethod
+    def _public(row) -> dict:
+        """The job as clients see it"""
+        if row is None:
+            return None
+        job = {"id": row["id"], "status": row["status"], "query": row["query"], "created": row["created"]}
+        if row["session_id"] is not None:
+            job["session_id"] = row["session_id"]
+        if row["status"] in FINISHED:
+            job["finished"] = row["finished"]
+            job["expires"] = row["expires"]
+        if row["status"] == DONE:
+            job["answer"] = row["answer"]
+            job["llm_calls"] = row["llm_calls"]
+        elif row["status"] == FAILED:
+            job["error"] = row["error"]
+        return job
+
+    def purge(self):
+        """Delete finished jobs past their retention"""
+        self.expirations += self._connect().execute(f"DELETE FROM {self.table} WHERE expires < ?", (time.time(),)).rowcount
+
+    def submit(self, query: str, session_id: str = None) -> dict:
+        """Queue a question, raising Overloaded when max_queued jobs are already waiting"""
+        def work(conn):
+            now = time.time()
+            queued = conn.execute(f"SELECT COUNT(*) FROM {self.table} WHERE status = ?", (QUEUED,)).fetchone()[0]
+            if queued >= self.max_queued:
+                raise Overloaded("job_queue_full", self.lease_seconds)
+            job_id = uuid.uuid4().hex
+            conn.execute(
+                f"INSERT INTO {self.table} (id, query, session_id, status, created) VALUES (?, ?, ?, ?, ?)",
+                (job_id, query, session_id, QUEUED, now),
+            )
+            return conn.execute(f"SELECT * FROM {self.table} WHERE id = ?", (job_id,)).fetchone()
+
+        job = self._public(self._transaction(work))
+        _jobs_total.inc(outcome="submitted")
+        return job
+
+    def claim(self):
+        """
+        Take the oldest queued job, or one whose worker stopped renewing its lease.
+
+        Returns {"id", "query", "session_id", "created"} for the worker, or None
+        when there is nothing to do. A lapsed job that has used up its attempts
+        is failed instead of being retried.
+        """
+        # Idle workers poll; only take the write lock when there is something to claim
+        claimable = self._connect().execute(
+            f"SELECT 1 FROM {self.table} WHERE status = ? OR (status = ? AND heartbeat < ?) LIMIT 1",
+            (QUEUED, RUNNING, time.time() - self.lease_seconds),
+        ).fetchone()
+        if claimable is None:
+            return None
+
+        def work(conn):
+            now = time.time()
+            lapsed = now - self.lease_seconds
+            exhausted = conn.execute(
+                f"UPDATE {self.table} SET status = ?, error = ?, finished = ?, expires = ? "
+                f"WHERE status = ? AND heartbeat < ? AND attempts >= ?",
+                (FAILED, "The job was interrupted too many times", now, now + self.retention_seconds, RUNNING, lapsed, self.max_attempts),
+            ).rowcount
+            row = conn.execute(
+                f"SELECT id, query, session_id, created, status FROM {self.table} "
+                f"WHERE status = ? OR (status = ? AND heartbeat < ?) ORDER BY created LIMIT 1",
+                (QUEUED, RUNNING, lapsed),
+            ).fetchone()
+            if row is not None:
+                conn.execute(
+                    f"UPDATE {self.table} SET status = ?, started = ?, heartbeat = ?, attempts = attempts + 1 WHERE id = ?",
+                    (RUNNING, now, now, row["id"]),
+                )
+            return row, exhausted
+
+        row, exhausted = self._transaction(work)
+        if exhausted:
+            _jobs_total.inc(exhausted, outcome="failed")
+        if row is None:
+            return None
+        if row["status"] == RUNNING:
+            _jobs_total.inc(outcome="requeued")
+        else:
+            _job_wait_seconds.observe(max(0.0, time.time() - row["created"]))
+        return {"id": row["id"], "query": row["query"], "session_id": row["session_id"], "created": row["created"]}
+
+    def heartbeat(self, job_ids: list) -> list:
+        """Renew the leases of running jobs; returns the ones that were cancelled meanwhile"""
+        if not job_ids:
+            return []
+        placeholders = ",".join("?" * len(job_ids))
+
+        def work(conn):
+            conn.execute(
+                f"UPDATE {self.table} SET heartbeat = ? WHERE status = ? AND id IN ({placeholders})",
+                (time.time(), RUNNING, *job_ids),
+            )
+            rows = conn.execute(f"SELECT id FROM {self.table} WHERE status != ? AND id IN ({placeholders})", (RUNNING, *job_ids))
+            return [row["id"] for row in rows]
+
+        return self._transaction(work)
+
+    def _finish(self, job_id: str, status: str, **fields) -> bool:
+        """Record a running job's outcome; False if it was cancelled (or reclaimed) in the meantime"""
+        now = time.time()
+        columns = ", ".join(f"{name} = ?" for name in fields)
+        updated = self._connect().execute(
+            f"UPDATE {self.table} SET status = ?, {columns}, finished = ?, expires = ? WHERE id = ? AND status = ?",
+            (status, *fields.values(), now, now + self.retention_seconds, job_id, RUNNING),
+        ).rowcount
+        if updated:
+            _jobs_total.inc(outcome=status)
+        return bool(updated)
+
+    def complete(self, job_id: str, answer: str, llm_calls: int) -> bool:
+        return self._finish(job_id, DONE, answer=answer, llm_calls=llm_calls)
+
+    def fail(self, job_id: str, error: str) -> bool:
+        return self._finish(job_id, FAILED, error=error)
+
+    def release(self, job_ids: list):
+        """Put running jobs back in the queue (a worker shutting down cleanly) without charging an attempt"""
+        if job_ids:
+            placeholders = ",".join("?" * len(job_ids))
+            self._connect().execute(
+                f"UPDATE {self.table} SET status = ?, attempts = MAX(attempts - 1, 0) WHERE status = ? AND id IN ({placeholders})",
+                (QUEUED, RUNNING, *job_ids),
+            )
+
+    def cancel(self, job_id: str):
+        """Cancel a queued or running job; returns the job (unchanged if it had already finished), or None"""
+        def work(conn):
+            now = time.time()
+            updated = conn.execute(
+                f"UPDATE {self.table} SET status = ?, finished = ?, expires = ? WHERE id = ? AND status IN (?, ?)",
+                (CANCELLED, now, now + self.retention_seconds, job_id, QUEUED, RUNNING),
+            ).rowcount
+            return updated, conn.execute(f"SELECT * FROM {self.table} WHERE id = ?", (job_id,)).fetchone()
+
+        updated, row = self._transaction(work)
+        if updated:
+            _jobs_total.inc(outcome=CANCELLED)
+        return self._public(row)
+
+    def get(self, job_id: str):
+        row = self._connect().execute(f"SELECT * FROM {self.table} WHERE id = ?", (job_id,)).fetchone()
+        if row is not None and row["expires"] is not None and row["expires"] < time.time():
+            return None
+        return self._public(row)
+
+    def stats(self) -> dict:
+        rows = self._connect().execute(f"SELECT status, COUNT(*) AS jobs FROM {self.table} GROUP BY status").fetchall()
+        return {
+            "path": self.path,
+            "jobs": {status: 0 for status in (QUEUED, RUNNING, *FINISHED)} | {row["status"]: row["jobs"] for row in rows},
+            "max_queued": self.max_queued,
+            "retention_seconds": self.retention_seconds,
+            "expirations": self.expirations,
+        }
+
+class JobWorkers:
+    """
+    A bounded pool of asyncio workers answering jobs from a JobQueue.
+
+    Each worker claims a job, runs handler(job) -> (answer, llm_calls) and
+    records the outcome. Idle workers wake as soon as a job is submitted in
+    this process, and otherwise poll every poll_interval for jobs submitted
+    by other processes or left behind by a restart. A maintenance task
+    renews the leases of running jobs, cancels the ones a client cancelled
+    and purges expired jobs every purge_interval. On shutdown, running jobs
+    go back to the queue.
+    """
+
+    def __init__(self, queue: JobQueue, handler, workers: int = 2, poll_interval: float = 30.0, purge_interval: float = 300.0):
+        self.queue = queue
+        self.handler = handler
+        self.workers = workers
+        self.poll_interval = poll_interval
+        self.purge_interval = purge_interval
+        self._tasks = []
+        self._running = {}
+        self._wakeup = None
+        self._changed = None
+
+    def start(self):
+        self._wakeup = asyncio.Event()
+        self._changed = asyncio.Event()
+        self._tasks = [asyncio.create_task(self._work()) for _ in range(self.workers)]
+        self._tasks.append(asyncio.create_task(self._maintain()))
+
+    async def stop(self):
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+        await call_store(self.queue, self.queue.release, list(self._running))
+        self._running.clear()
+
+    def _notify(self):
+        """Wake everyone waiting on a job's status"""
+        if self._changed is not None:
+            self._changed.set()
+            self._changed = asyncio.Event()
+
+    async def submit(self, query: str, session_id: str = None) -> dict:
+        job = await call_store(self.queue, self.queue.submit, query, session_id)
+        if self._wakeup is not None:
+            self._wakeup.set()
+        return job
+
+    async def cancel(self, job_id: str):
+        job = await call_store(self.queue, self.queue.cancel, job_id)
+        task = self._running.get(job_id)
+        if task is not None:
+            task.cancel()
+        self._notify()
+        return job
+
+    async def wait(self, job_id: str, timeout: float, seen_status: str = None):
+        """Return the job once its status differs from seen_status (or it has finished), or after timeout"""
+        deadline = time.monotonic() + timeout
+        while True:
+            changed = self._changed
+            job = await call_store(self.queue, self.queue.get, job_id)
+            remaining = deadline - time.monotonic()
+            if job is None or job["status"] in FINISHED or job["status"] != seen_status or remaining <= 0:
+                return job
+            # Jobs run by another process only show up by polling
+            wait = min(remaining, STATUS_POLL_INTERVAL)
+            if changed is None:
+                await asyncio.sleep(wait)
+            else:
+                try:
+                    await asyncio.wait_for(changed.wait(), wait)
+                except asyncio.TimeoutError:
+                    pass
+
+    async def _work(self):
+        while True:
+            # Cleared before claiming, so a job submitted during the claim still wakes this worker
+            self._wakeup.clear()
+            job = await call_store(self.queue, self.queue.claim)
+            if job is None:
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), self.poll_interval)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+
+            self._notify()
+            task = asyncio.create_task(self._answer(job))
+            self._running[job["id"]] = task
+            started = time.perf_counter()
+            try:
+                answer, llm_calls = await asyncio.shield(task)
+                await call_store(self.queue, self.queue.complete, job["id"], answer, llm_calls)
+            except asyncio.CancelledError:
+                if not task.cancelled():
+                    # The pool is stopping; stop() puts the job back in the queue
+                    task.cancel()
+                    raise
+                # The client cancelled the job, which is already marked as such
+            except Exception as e:
+                await call_store(self.queue, self.queue.fail, job["id"], str(e) or type(e).__name__)
+            finally:
+                _job_run_seconds.observe(time.perf_counter() - started)
+                if task.done():
+                    self._running.pop(job["id"], None)
+                self._notify()
+
+    async def _answer(self, job: dict) -> tuple:
+        while True:
+            try:
+                return await self.handler(job)
+            except Overloaded as e:
+                # Jobs have no caller waiting on a 429; wait for capacity instead
+                await asyncio.sleep(e.retry_after)
+
+    async def _maintain(self):
+        interval = min(self.queue.lease_seconds / 3, self.purge_interval)
+        purged = time.monotonic()
+        while True:
+            await asyncio.sleep(interval)
+            cancelled = await call_store(self.queue, self.queue.heartbeat, list(self._running))
+            for job_id in cancelled:
+                task = self._running.get(job_id)
+                if task is not None:
+                    task.cancel()
+            if time.monotonic() - purged >= self.purge_interval:
+                await call_store(self.queue, self.queue.purge)
+                purged = time.monotonic()
+
+    def stats(self) -> dict:
+        return {"workers": self.workers, "running_here": len(self._running), **self.queue.stats()}
+
+_job_queue = None
+
+def get_job_queue():
+    """Return the process-wide job queue configured from JOB_*, or None when the job API is disabled"""
+    global _job_queue
+    if os.getenv("JOB_QUEUE", "on") == "off":
+        return None
+    if _job_queue is None:
+        _job_queue = JobQueue(
+            path=os.getenv("JOB_QUEUE_PATH", "tutor_cache.sqlite3"),
+            max_queued=int(os.getenv("JOB_MAX_QUEUED", "1000")),
+            retention_seconds=float(os.getenv("JOB_RETENTION", "3600")),
+            lease_seconds=float(os.getenv("JOB_LEASE", "60")),
+            max_attempts=int(os.getenv("JOB_MAX_ATTEMPTS", "3")),
+        )
+    return _job_queue
@@ -0,0 +1,36 @@
+class LLMBackend:
+    """Interface every text-generation backend implements"""
+
+    name = "base"
+
+    async def generate(self, prompt: str, model_name: str, generation_config: dict = None) -> str:
+        """Return the model's text response to a single prompt"""
+        raise NotImplementedError
+
+    async def generate_stream(self, prompt: str, model_name: str, generation_config: dict = None):
+        """Yield the response in chunks as they arrive; backends without streaming yield it whole"""
+        yield await self.generate(prompt, model_name, generation_config)
+
+    def stats(self) -> dict:
+        """Return backend usage counters for the /stats endpoint"""
+        return {"backend": self.name}
+
+def estimate_tokens(text: str) -> int:
+    """Rough token count (about four characters per token for English text)"""
+    return max(1, len(text) // 4) if text else 0
+
+class LLMError(Exception):
+    """Base class for failures of the LLM layer"""
+
+class TransientLLMError(LLMError):
+    """An upstream failure worth retrying (rate limit, 5xx, dropped connection)"""
+
+class LLMTimeoutError(TransientLLMError):
+    """A call did not finish within its stage's deadline"""
+
+class CircuitOpenError(LLMError):
+    """Calls are being refused because the backend kept failing"""
+
+    def __init__(self, retry_after: float):
+        super().__init__(f"LLM backend unavailable, retry in {retry_after:.0f}s")
+        self.retry_after = retry_after
@@ -0,0 +1,288 @@
+import asyncio
+import contextvars
+import os
+import threading
+import weakref
+from contextlib import contextmanager
+import time
+from dotenv import load_dotenv
+from llm.backend import estimate_tokens
+from llm.models import stage_model, stage_config, stage_max_output_tokens
+from llm.resilience import call_with_resilience, within_deadline
+from telemetry.latency import LatencyWindow
+from telemetry.metrics import llm_call_seconds, llm_calls_total, llm_errors_total, llm_tokens_total
+from telemetry.tracing import current_trace
+
+# Upper bound on LLM calls in flight per process, shared by every agent
+MAX_CONCURRENT_LLM_CALLS = int(os.getenv("MAX_CONCURRENT_LLM_CALLS", "16"))
+
+_semaphores = weakref.WeakKeyDictionary()
+_backend = None
+_backend_lock = threading.Lock()
+_request_usage = contextvars.ContextVar("llm_request_usage", default=None)
+_answer_stream = contextvars.ContextVar("llm_answer_stream", default=None)
+_conversation = contextvars.ContextVar("llm_conversation", default=None)
+_speculation = contextvars.ContextVar("llm_speculation", default=None)
+# Per-stage latency, models and estimated tokens of LLM calls, for llm_stage_stats()
+_stage_usage = {}
+
+class LLMUsage:
+    """Per-request LLM usage, collected while inside track_usage()"""
+
+    def __init__(self):
+        self.calls = 0
+
+def _get_semaphore() -> asyncio.Semaphore:
+    """Return the concurrency limiter bound to the running event loop"""
+    loop = asyncio.get_running_loop()
+    semaphore = _semaphores.get(loop)
+    if semaphore is None:
+        semaphore = asyncio.Semaphore(MAX_CONCURRENT_LLM_CALLS)
+        _semaphores[loop] = semaphore
+    return semaphore
+
+def create_backend(name: str):
+    """Build the backend registered under the given name ("gemini", "fake" or "replay")"""
+    if name == "gemini":
+        from llm.gemini_backend import GeminiBackend
+        return GeminiBackend()
+    if name == "fake":
+        from llm.fake_backend import FakeBackend
+        return FakeBackend.from_env()
+    if name == "replay":
+        from llm.replay_backend import ReplayBackend
+        return ReplayBackend.from_env()
+    raise ValueError(f"Unknown LLM backend '{name}'")
+
+def get_backend():
+    """Return the process-wide backend, creating it from LLM_BACKEND on first use"""
+    global _backend
+    if _backend is None:
+        # Creating the Gemini backend imports and configures the SDK, so make sure it happens once
+        with _backend_lock:
+            if _backend is None:
+                load_dotenv()
+                _backend = create_backend(os.getenv("LLM_BACKEND", "gemini"))
+    return _backend
+
+async def load_backend():
+    """get_backend() for async callers: a first, slow creation runs off the event loop"""
+    if _backend is not None:
+        return _backend
+    return await asyncio.to_thread(get_backend)
+
+def set_backend(backend):
+    """Replace the process-wide backend (used by benchmarks and local runs)"""
+    global _backend
+    _backend = backend
+
+@contextmanager
+def track_usage():
+    """Count the LLM calls made by the current request (including its child tasks)"""
+    usage = LLMUsage()
+    token = _request_usage.set(usage)
+    try:
+        yield usage
+    finally:
+        _request_usage.reset(token)
+
+@contextmanager
+def conversation_context(context: str):
+    """Prepend a session's conversation so far (or nothing, when None) to every prompt of the current request"""
+    token = _conversation.set(context or None)
+    try:
+        yield
+    finally:
+        _conversation.reset(token)
+
+def current_conversation():
+    """The conversation context of the current request, or None outside a session"""
+    return _conversation.get()
+
+def _with_conversation(prompt: str) -> str:
+    context = _conversation.get()
+    if context is None:
+        return prompt
+    return (
+        "You are continuing a tutoring conversation. Use it to resolve references in the new request "
+        "(\"it\", \"the same\", \"now for 20 kg\"), but respond only to the new request.\n\n"
+        f"{context}\n\n---\n{prompt}"
+    )
+
+class SpeculationGate:
+    """
+    Holds back the answer call of a speculative run until its subject is confirmed.
+
+    Calls made under the gate (the analysis steps before the answer) are
+    counted, so the cost of runs that turn out wrong can be reported.
+    """
+
+    def __init__(self):
+        self._confirmed = asyncio.Event()
+        self._aborted = False
+        self.calls = 0
+        self.prompt_tokens = 0
+        # When the run finished its analysis and had to wait for confirmation
+        self.reached_at = None
+
+    def confirm(self):
+        self._confirmed.set()
+
+    def abort(self):
+        """Make the run stop at the gate, even if its task swallowed a cancellation (as wait_for can)"""
+        self._aborted = True
+        self._confirmed.set()
+
+    async def wait(self):
+        if not self._confirmed.is_set():
+            self.reached_at = time.perf_counter()
+            await self._confirmed.wait()
+        if self._aborted:
+            raise asyncio.CancelledError()
+
+@contextmanager
+def speculative(gate: SpeculationGate):
+    """Run the current request's LLM calls (in tasks created inside the block) behind a SpeculationGate"""
+    token = _speculation.set(gate)
+    try:
+        yield gate
+    finally:
+        _speculation.reset(token)
+
+def _count_speculative_call(prompt: str):
+    gate = _speculation.get()
+    if gate is not None:
+        gate.calls += 1
+        gate.prompt_tokens += estimate_tokens(prompt)
+
+def _record_call(stage: str, backend, model_name: str, prompt: str, started: float, output: str = None):
+    """Record latency, call and token counts of one LLM call; output is None when the call failed"""
+    elapsed = time.perf_counter() - started
+    llm_call_seconds.observe(elapsed, stage=stage, backend=backend.name, model=model_name)
+    llm_calls_total.inc(stage=stage, backend=backend.name, model=model_name)
+    prompt_tokens, output_tokens = estimate_tokens(prompt), estimate_tokens(output or "")
+    llm_tokens_total.inc(prompt_tokens, stage=stage, direction="prompt")
+    if output is None:
+        llm_errors_total.inc(stage=stage, backend=backend.name)
+    else:
+        llm_tokens_total.inc(output_tokens, stage=stage, direction="output")
+    usage = _stage_usage.get(stage)
+    if usage is None:
+        usage = _stage_usage.setdefault(stage, {"latency": LatencyWindow(size=500), "models": set(), "prompt_tokens": 0, "output_tokens": 0})
+    usage["latency"].observe(elapsed)
+    usage["models"].add(model_name)
+    usage["prompt_tokens"] += prompt_tokens
+    usage["output_tokens"] += output_tokens
+    trace = current_trace()
+    if trace is not None:
+        trace.add(f"llm_{stage}", elapsed)
+
+def llm_stage_stats() -> dict:
+    """Calls, latency and estimated tokens of each stage so far, with the model and output cap it uses"""
+    stages = {}
+    for stage, usage in sorted(_stage_usage.items()):
+        calls = usage["latency"].count
+        stages[stage] = {
+            "model": stage_model(stage),
+            "models_used": sorted(usage["models"]),
+            "max_output_tokens": stage_max_output_tokens(stage),
+            "latency": usage["latency"].summary(),
+            "prompt_tokens_per_call": round(usage["prompt_tokens"] / calls, 1),
+            "output_tokens_per_call": round(usage["output_tokens"] / calls, 1),
+        }
+    return stages
+
+async def generate(prompt: str, model_name: str = None, generation_config: dict = None, stage: str = "generate") -> str:
+    """
+    Generate a response without blocking the event loop.
+
+    stage names the pipeline step making the call ("classify", "tool_decision",
+    ...); it picks the call's model and output token cap (see llm.models),
+    its timeout and hedging policy (see llm.resilience) and labels its
+    latency and token metrics. model_name overrides the stage's model.
+    """
+    model_name = model_name or stage_model(stage)
+    generation_config = stage_config(stage, generation_config)
+    backend = await load_backend()
+    usage = _request_usage.get()
+    prompt = _with_conversation(prompt)
+
+    async def attempt():
+        if usage is not None:
+            usage.calls += 1
+        _count_speculative_call(prompt)
+        async with _get_semaphore():
+            started = time.perf_counter()
+            output = None
+            try:
+                output = await within_deadline(stage, backend.generate(prompt, model_name, generation_config))
+                return output
+            finally:
+                _record_call(stage, backend, model_name, prompt, started, output)
+
+    return await call_with_resilience(stage, attempt)
+
+@contextmanager
+def stream_answers_to(queue: asyncio.Queue):
+    """Forward chunks of final-answer calls made by the current request into a queue"""
+    token = _answer_stream.set(queue)
+    try:
+        yield queue
+    finally:
+        _answer_stream.reset(token)
+
+async def generate_answer(prompt: str, model_name: str = None, generation_config: dict = None, stage: str = "answer", visible=None) -> str:
+    """
+    Generate the user-facing answer of a request.
+
+    Behaves like generate(), but when the request is streaming (see
+    stream_answers_to) the chunks are forwarded to the client as they arrive.
+    A speculative run (see speculative) waits here until it is confirmed.
+
+    visible, for replies that aren't plain text, maps the reply received so
+    far to the part of it the client may see; only that part is forwarded.
+    """
+    gate = _speculation.get()
+    if gate is not None:
+        await gate.wait()
+
+    queue = _answer_stream.get()
+    if queue is None:
+        return await generate(prompt, model_name, generation_config, stage=stage)
+
+    model_name = model_name or stage_model(stage)
+    generation_config = stage_config(stage, generation_config)
+    backend = await load_backend()
+    usage = _request_usage.get()
+    prompt = _with_conversation(prompt)
+    chunks = []
+    shown = 0
+
+    async def stream():
+        nonlocal shown
+        async for chunk in backend.generate_stream(prompt, model_name, generation_config):
+            chunks.append(chunk)
+            if visible is None:
+                await queue.put(chunk)
+                continue
+            text = visible("".join(chunks))
+            if len(text) > shown:
+                await queue.put(text[shown:])
+                shown = len(text)
+        return "".join(chunks)
+
+    async def attempt():
+        if usage is not None:
+            usage.calls += 1
+        _count_speculative_call(prompt)
+        async with _get_semaphore():
+            started = time.perf_counter()
+            output = None
+            try:
+                output = await within_deadline(stage, stream())
+                return output
+            finally:
+                _record_call(stage, backend, model_name, prompt, started, output)
+
+    # Once text has reached the client a retry would repeat it, so only retry before the first chunk
+    return await call_with_resilience(stage, attempt, can_retry=lambda: not chunks, hedge=False)
@@ -0,0 +1,275 @@
+import asyncio
+import json
+import math
+import os
+import re
+import time
+from collections import deque
+from random import Random
+from llm.backend import LLMBackend, TransientLLMError, estimate_tokens
+
+class Distribution:
+    """
+    A small parametric distribution used to draw fake latencies and token rates.
+
+    Specs are written as "kind:param1,param2", for example:
+        "constant:200"        always 200
+        "uniform:100,300"     uniformly between 100 and 300
+        "normal:200,40"       mean 200, standard deviation 40
+        "lognormal:200,0.5"   median 200, log-space sigma 0.5 (long right tail)
+        "exponential:200"     mean 200
+    Samples are clamped at zero.
+    """
+
+    KINDS = {"constant": 1, "uniform": 2, "normal": 2, "lognormal": 2, "exponential": 1}
+
+    def __init__(self, kind: str = "constant", *params: float):
+        if kind not in self.KINDS:
+            raise ValueError(f"Unknown distribution '{kind}'")
+        if len(params) != self.KINDS[kind]:
+            raise ValueError(f"Distribution '{kind}' takes {self.KINDS[kind]} parameter(s)")
+        self.kind = kind
+        self.params = params
+
+    @classmethod
+    def parse(cls, spec) -> "Distribution":
+        if isinstance(spec, Distribution):
+            return spec
+        if isinstance(spec, (int, float)):
+            return cls("constant", float(spec))
+        kind, _, params = str(spec).partition(":")
+        if not params:
+            return cls("constant", float(kind))
+        return cls(kind.strip(), *[float(p) for p in params.split(",")])
+
+    def sample(self, rng: Random) -> float:
+        if self.kind == "constant":
+            value = self.params[0]
+        elif self.kind == "uniform":
+            value = rng.uniform(*self.params)
+        elif self.kind == "normal":
+            value = rng.gauss(*self.params)
+        elif self.kind == "lognormal":
+            median, sigma = self.params
+            value = rng.lognormvariate(math.log(median), sigma) if median > 0 else 0.0
+        else:
+            mean = self.params[0]
+            value = rng.expovariate(1 / mean) if mean > 0 else 0.0
+        return max(0.0, value)
+
+    def __repr__(self):
+        return f"{self.kind}:{','.join(f'{p:g}' for p in self.params)}"
+
+SUBJECT_KEYWORDS = {
+    "math": ["calculate", "solve", "equation", "integral", "derivative", "algebra", "sum of", "*", "+", "sqrt", "percent"],
+    "physics": ["force", "velocity", "acceleration", "energy", "newton", "momentum", "gravity", "m/s", "kg", "circuit"],
+    "chemistry": ["->", "reaction", "molecule", "compound", "acid", "functional group", "ethanol", "mole", "balance"],
+    "cs": ["algorithm", "code", "python", "function", "binary search", "sort", "data structure", "complexity", "def "],
+}
+
+def _extract_question(prompt: str) -> str:
+    match = re.search(r'(?:question was|question is|general question|Question):?\s*"?([^\n"]+)"?', prompt)
+    return match.group(1).strip() if match else prompt
+
+def _guess_subject(question: str) -> str:
+    text = question.lower()
+    scores = {subject: sum(keyword in text for keyword in keywords) for subject, keywords in SUBJECT_KEYWORDS.items()}
+    subject, score = max(scores.items(), key=lambda item: item[1])
+    return subject if score else "general"
+
+def default_responder(prompt: str) -> str:
+    """Produce a plausible, deterministic reply for each of the agents' prompt shapes"""
+    question = _extract_question(prompt)
+
+    if "Classify the subject of each numbered question" in prompt:
+        questions = [json.loads(q) for q in re.findall(r"^\s*\d+\. (\".*\")\s*$", prompt, re.MULTILINE)]
+        return json.dumps({"labels": [_guess_subject(q) for q in questions]})
+    if "Classify the subject" in prompt:
+        return _guess_subject(question)
+    if "[[TOOL_RESULT]]" in prompt:
+        answer = f"Let's work through this step by step: {question[:200]}"
+        if '"calculator"' in prompt and re.search(r"\d", question):
+            expression = re.sub(r"[^0-9+\-*/(). ]", "", question).strip()
+            return json.dumps({"tool": "calculator", "arguments": {"expression": expression}, "answer": f"{answer}\n\nThe result is [[TOOL_RESULT]]."})
+        if '"balance_equation"' in prompt and "->" in question:
+            equation = question.split(" ", 1)[-1]
+            return json.dumps({"tool": "balance_equation", "arguments": {"equation": equation}, "answer": f"{answer}\n\nBalanced: [[TOOL_RESULT]]"})
+        return json.dumps({"tool": "none", "arguments": {}, "answer": answer})
+    if "needs_calculator" in prompt:
+        expression = re.sub(r"[^0-9+\-*/(). ]", "", question).strip()
+        return json.dumps({"needs_calculator": bool(re.search(r"\d", expression)), "expression": expression})
+    if "needs_calculation" in prompt:
+        needs_calculation = bool(re.search(r"\d", question))
+        return json.dumps({"needs_calculation": needs_calculation, "problem_type": "kinematics", "conceptual_elements": ["motion"]})
+    if "equation_balancing/functional_groups/general" in prompt:
+        question_type = "equation_balancing" if "->" in question else "functional_groups" if "group" in question.lower() else "general"
+        return json.dumps({"question_type": question_type, "extract": ""})
+    if "code_analysis/algorithm/general" in prompt:
+        question_type = "code_analysis" if "```" in question or "def " in question else "algorithm" if "algorithm" in question.lower() or "search" in question.lower() or "sort" in question.lower() else "general"
+        return json.dumps({"question_type": question_type, "extract": ""})
+    if "Balance this chemical equation" in prompt:
+        return prompt.split("Balance this chemical equation:", 1)[1].split("\n", 1)[0].strip()
+    if "Identify all functional groups" in prompt:
+        return json.dumps({"functional_groups": ["hydroxyl"]})
+    if "Analyze this code" in prompt:
+        return json.dumps({"language": "python", "errors": [], "improvements": ["add docstrings"], "complexity": "O(n)"})
+
+    return (
+        f"Here is a step-by-step explanation for: {question[:200]}\n\n"
+        "1. Identify the key concepts involved.\n"
+        "2. Apply the relevant principles carefully.\n"
+        "3. Check the result and interpret what it means."
+    )
+
+class FakeBackend(LLMBackend):
+    """
+    Deterministic in-process stand-in for Gemini.
+
+    Each call waits for a sampled time-to-first-token plus the time needed to
+    emit the response at a sampled token rate, then returns the responder's
+    text. Samples are seeded by (seed, prompt, repetition), so a run is fully
+    reproducible regardless of how concurrent calls interleave.
+
+    For resilience testing it can also inject faults: error_rate is the
+    share of calls that fail with a retryable TransientLLMError after their
+    latency, and stall_rate the share that hang for stall_ms before answering.
+    quota_per_second mimics the upstream quota: calls beyond that many in any
+    one-second window are refused with a retryable "429 quota exceeded".
+
+    model_latency_ms gives some models their own time-to-first-token
+    distribution (e.g. a faster small model); other models use latency_ms.
+    Replies are cut off at the call's max_output_tokens, as Gemini's are.
+    """
+
+    name = "fake"
+
+    def __init__(self, latency_ms="constant:0", tokens_per_second="constant:0", seed: int = 0, responder=default_responder,
+                 error_rate: float = 0.0, stall_rate: float = 0.0, stall_ms: float = 60000, quota_per_second: float = 0,
+                 model_latency_ms: dict = None):
+        self.latency_ms = Distribution.parse(latency_ms)
+        self.model_latency_ms = {model: Distribution.parse(spec) for model, spec in (model_latency_ms or {}).items()}
+        self.tokens_per_second = Distribution.parse(tokens_per_second)
+        self.seed = seed
+        self.responder = responder
+        self.error_rate = error_rate
+        self.stall_rate = stall_rate
+        self.stall_ms = stall_ms
+        self._seen = {}
+        self.calls = 0
+        self.injected_errors = 0
+        self.injected_stalls = 0
+        self.quota_per_second = quota_per_second
+        self._recent_calls = deque()
+        self.quota_rejections = 0
+        self.prompt_tokens = 0
+        self.output_tokens = 0
+        self.simulated_seconds = 0.0
+
+    @classmethod
+    def from_env(cls) -> "FakeBackend":
+        return cls(
+            latency_ms=os.getenv("FAKE_LLM_LATENCY_MS", "constant:0"),
+            tokens_per_second=os.getenv("FAKE_LLM_TOKENS_PER_SECOND", "constant:0"),
+            seed=int(os.getenv("FAKE_LLM_SEED", "0")),
+            error_rate=float(os.getenv("FAKE_LLM_ERROR_RATE", "0")),
+            stall_rate=float(os.getenv("FAKE_LLM_STALL_RATE", "0")),
+            stall_ms=float(os.getenv("FAKE_LLM_STALL_MS", "60000")),
+            quota_per_second=float(os.getenv("FAKE_LLM_QUOTA_QPS", "0")),
+            # e.g. "gemini-2.0-flash-lite=lognormal:200,0.3;gemini-2.0-flash=lognormal:450,0.4"
+            model_latency_ms=dict(
+                entry.split("=", 1) for entry in os.getenv("FAKE_LLM_MODEL_LATENCY_MS", "").split(";") if "=" in entry
+            ),
+        )
+
+    def _sample_timing(self, prompt: str, model_name: str = None) -> tuple:
+        """Return (seconds to first token, tokens per second, injected fault or None) for this call"""
+        repetition = self._seen.get(prompt, 0)
+        self._seen[prompt] = repetition + 1
+        rng = Random(f"{self.seed}:{repetition}:{prompt}")
+        latency_ms = self.model_latency_ms.get(model_name, self.latency_ms)
+        first_token_delay, rate = latency_ms.sample(rng) / 1000, self.tokens_per_second.sample(rng)
+
+        fault = None
+        if self.error_rate or self.stall_rate:
+            draw = rng.random()
+            if draw < self.error_rate:
+                fault = "error"
+                self.injected_errors += 1
+            elif draw < self.error_rate + self.stall_rate:
+                fault = "stall"
+                self.injected_stalls += 1
+        return first_token_delay, rate, fault
+
+    async def _inject(self, fault: str, first_token_delay: float):
+        """Wait out the call's latency and then fail, or hang, as the fault requires"""
+        if fault == "error":
+            if first_token_delay:
+                await asyncio.sleep(first_token_delay)
+            raise TransientLLMError("Injected upstream error (503 Service Unavailable)")
+        if fault == "stall":
+            await asyncio.sleep(self.stall_ms / 1000)
+
+    def _check_quota(self):
+        if not self.quota_per_second:
+            return
+        now = time.monotonic()
+        while self._recent_calls and now - self._recent_calls[0] >= 1.0:
+            self._recent_calls.popleft()
+        if len(self._recent_calls) >= self.quota_per_second:
+            self.quota_rejections += 1
+            raise TransientLLMError("429 Resource exhausted: quota exceeded")
+        self._recent_calls.append(now)
+
+    def _respond(self, prompt: str, generation_config: dict = None) -> str:
+        text = self.responder(prompt)
+        limit = (generation_config or {}).get("max_output_tokens")
+        return text[:limit * 4] if limit else text
+
+    def _record(self, prompt: str, text: str, delay: float):
+        self.calls += 1
+        self.prompt_tokens += estimate_tokens(prompt)
+        self.output_tokens += estimate_tokens(text)
+        self.simulated_seconds += delay
+
+    async def generate(self, prompt: str, model_name: str, generation_config: dict = None) -> str:
+        self._check_quota()
+        text = self._respond(prompt, generation_config)
+        first_token_delay, rate, fault = self._sample_timing(prompt, model_name)
+        delay = first_token_delay + (estimate_tokens(text) / rate if rate > 0 else 0)
+        self._record(prompt, text, delay)
+        if fault:
+            await self._inject(fault, first_token_delay)
+
+        if delay:
+            await asyncio.sleep(delay)
+        return text
+
+    async def generate_stream(self, prompt: str, model_name: str, generation_config: dict = None):
+        self._check_quota()
+        text = self._respond(prompt, generation_config)
+        first_token_delay, rate, fault = self._sample_timing(prompt, model_name)
+        self._record(prompt, text, first_token_delay + (estimate_tokens(text) / rate if rate > 0 else 0))
+        if fault:
+            await self._inject(fault, first_token_delay)
+
+        if first_token_delay:
+            await asyncio.sleep(first_token_delay)
+        # Emit a few words per chunk, paced at the sampled token rate
+        words = re.findall(r"\S+\s*|\s+", text)
+        for start in range(0, len(words), 4):
+            chunk = "".join(words[start:start + 4])
+            if rate > 0:
+                await asyncio.sleep(estimate_tokens(chunk) / rate)
+            yield chunk
+
+    def stats(self) -> dict:
+        return {
+            "backend": self.name,
+            "calls": self.calls,
+            "prompt_tokens": self.prompt_tokens,
+            "output_tokens": self.output_tokens,
+            "simulated_seconds": round(self.simulated_seconds, 6),
+            "injected_errors": self.injected_errors,
+            "injected_stalls": self.injected_stalls,
+            "quota_rejections": self.quota_rejections,
+        }
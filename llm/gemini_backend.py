@@ -0,0 +1,31 @@
+import os
+import google.generativeai as genai
+from llm.backend import LLMBackend
+from llm.pool import ModelPool
+
+def _build_model(model_name: str, generation_config: dict = None):
+    return genai.GenerativeModel(model_name, generation_config=generation_config)
+
+class GeminiBackend(LLMBackend):
+    """Backend that calls the hosted Gemini API"""
+
+    name = "gemini"
+
+    def __init__(self, api_key: str = None):
+        genai.configure(api_key=api_key or os.getenv("GEMINI_API_KEY"))
+        self.pool = ModelPool(_build_model)
+
+    async def generate(self, prompt: str, model_name: str, generation_config: dict = None) -> str:
+        with self.pool.lease(model_name, generation_config) as model:
+            response = await model.generate_content_async(prompt)
+        return response.text
+
+    async def generate_stream(self, prompt: str, model_name: str, generation_config: dict = None):
+        with self.pool.lease(model_name, generation_config) as model:
+            response = await model.generate_content_async(prompt, stream=True)
+            async for chunk in response:
+                if chunk.text:
+                    yield chunk.text
+
+    def stats(self) -> dict:
+        return {"backend": self.name, "pool": self.pool.stats()}
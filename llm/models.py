@@ -0,0 +1,38 @@
+import os
+
+# Model for final answers and for every stage not listed in STAGE_MODELS
+ANSWER_MODEL = os.getenv("LLM_MODEL", "gemini-2.0-flash")
+# Smaller, faster model for the short routing and tool-selection replies
+FAST_MODEL = os.getenv("LLM_FAST_MODEL", "gemini-2.0-flash-lite")
+
+# Model per stage; LLM_MODEL_<STAGE> overrides a single stage
+STAGE_MODELS = {
+    "classify": FAST_MODEL,
+    "classify_batch": FAST_MODEL,
+    "tool_decision": FAST_MODEL,
+    "functional_groups": FAST_MODEL,
+}
+
+# Most output tokens a stage's reply may use; LLM_MAX_OUTPUT_TOKENS_<STAGE> overrides a single stage (0 lifts the cap)
+STAGE_MAX_OUTPUT_TOKENS = {
+    "classify": 10,
+    "classify_batch": 256,
+    "tool_decision": 256,
+    "functional_groups": 128,
+}
+
+def stage_model(stage: str) -> str:
+    """Return the model a stage's calls go to"""
+    return os.getenv(f"LLM_MODEL_{stage.upper()}") or STAGE_MODELS.get(stage, ANSWER_MODEL)
+
+def stage_max_output_tokens(stage: str):
+    override = os.getenv(f"LLM_MAX_OUTPUT_TOKENS_{stage.upper()}")
+    limit = int(override) if override else STAGE_MAX_OUTPUT_TOKENS.get(stage)
+    return limit or None
+
+def stage_config(stage: str, generation_config: dict = None) -> dict:
+    """Add the stage's output token cap to a call's generation config; an explicit max_output_tokens wins"""
+    limit = stage_max_output_tokens(stage)
+    if limit is None:
+        return generation_config
+    return {"max_output_tokens": limit, **(generation_config or {})}
@@ -0,0 +1,65 @@
+import json
+import threading
+from contextlib import contextmanager
+
+class ModelPool:
+    """
+    Process-wide registry of model handles, keyed by model name and generation config.
+
+    Handles are built once by the factory and then shared by every request, so
+    a question no longer constructs a fresh client object per LLM call. For the
+    Gemini backend all handles also share the SDK's single async client, which
+    keeps one long-lived connection to the API instead of re-handshaking.
+    """
+
+    def __init__(self, factory):
+        self._factory = factory
+        self._models = {}
+        self._lock = threading.Lock()
+        self.handles_created = 0
+        self.handle_reuses = 0
+        self.active_leases = 0
+        self.peak_leases = 0
+        self.total_leases = 0
+
+    @staticmethod
+    def _key(model_name: str, generation_config: dict = None) -> tuple:
+        return (model_name, json.dumps(generation_config or {}, sort_keys=True))
+
+    def get(self, model_name: str, generation_config: dict = None):
+        """Return the shared handle for this configuration, creating it on first use"""
+        key = self._key(model_name, generation_config)
+        with self._lock:
+            model = self._models.get(key)
+            if model is None:
+                model = self._factory(model_name, generation_config)
+                self._models[key] = model
+                self.handles_created += 1
+            else:
+                self.handle_reuses += 1
+        return model
+
+    @contextmanager
+    def lease(self, model_name: str, generation_config: dict = None):
+        """Borrow a handle for the duration of one call, tracking concurrent use"""
+        model = self.get(model_name, generation_config)
+        with self._lock:
+            self.active_leases += 1
+            self.total_leases += 1
+            self.peak_leases = max(self.peak_leases, self.active_leases)
+        try:
+            yield model
+        finally:
+            with self._lock:
+                self.active_leases -= 1
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "handles": len(self._models),
+                "handles_created": self.handles_created,
+                "handle_reuses": self.handle_reuses,
+                "active_leases": self.active_leases,
+                "peak_leases": self.peak_leases,
+                "total_leases": self.total_leases,
+            }
@@ -0,0 +1,143 @@
+import asyncio
+import hashlib
+import json
+import os
+import re
+import time
+from llm.backend import LLMBackend, estimate_tokens
+
+def fixture_key(prompt: str, model_name: str, generation_config: dict = None) -> str:
+    """Identify a call by everything that is sent upstream"""
+    config = json.dumps(generation_config or {}, sort_keys=True)
+    return hashlib.sha256(f"{model_name}\n{config}\n{prompt}".encode("utf-8")).hexdigest()
+
+def load_fixtures(path: str) -> dict:
+    """Read recorded calls (one JSON object per line) keyed by fixture_key"""
+    fixtures = {}
+    with open(path, encoding="utf-8") as file:
+        for line in file:
+            if line.strip():
+                fixture = json.loads(line)
+                fixtures.setdefault(fixture["key"], fixture)
+    return fixtures
+
+class ReplayBackend(LLMBackend):
+    """
+    Answers calls from recorded fixtures, with their recorded latency.
+
+    A call with no fixture (because a prompt changed since recording) is
+    counted as a miss and passed to the fallback backend, or fails when
+    there is none. latency_scale stretches or shrinks the recorded timings.
+    """
+
+    name = "replay"
+
+    def __init__(self, fixtures: dict, latency_scale: float = 1.0, fallback: LLMBackend = None):
+        self.fixtures = fixtures
+        self.latency_scale = latency_scale
+        self.fallback = fallback
+        self.calls = 0
+        self.hits = 0
+        self.misses = 0
+        self.prompt_tokens = 0
+        self.output_tokens = 0
+
+    @classmethod
+    def from_env(cls) -> "ReplayBackend":
+        from llm.fake_backend import FakeBackend
+        return cls(
+            load_fixtures(os.getenv("REPLAY_FIXTURES", "benchmarks/corpus/fixtures-v1.jsonl")),
+            latency_scale=float(os.getenv("REPLAY_LATENCY_SCALE", "1")),
+            fallback=FakeBackend.from_env(),
+        )
+
+    def _lookup(self, prompt: str, model_name: str, generation_config: dict = None):
+        self.calls += 1
+        self.prompt_tokens += estimate_tokens(prompt)
+        fixture = self.fixtures.get(fixture_key(prompt, model_name, generation_config))
+        if fixture is None:
+            self.misses += 1
+            if self.fallback is None:
+                raise KeyError(f"No recorded response for prompt: {prompt.strip()[:80]!r}")
+        else:
+            self.hits += 1
+            self.output_tokens += estimate_tokens(fixture["output"])
+        return fixture
+
+    async def generate(self, prompt: str, model_name: str, generation_config: dict = None) -> str:
+        fixture = self._lookup(prompt, model_name, generation_config)
+        if fixture is None:
+            return await self.fallback.generate(prompt, model_name, generation_config)
+        await asyncio.sleep(fixture["latency_ms"] / 1000 * self.latency_scale)
+        return fixture["output"]
+
+    async def generate_stream(self, prompt: str, model_name: str, generation_config: dict = None):
+        fixture = self._lookup(prompt, model_name, generation_config)
+        if fixture is None:
+            async for chunk in self.fallback.generate_stream(prompt, model_name, generation_config):
+                yield chunk
+            return
+
+        first_token_ms = fixture.get("first_token_ms", fixture["latency_ms"])
+        await asyncio.sleep(first_token_ms / 1000 * self.latency_scale)
+        # Spread the rest of the recorded duration over chunks of a few words
+        words = re.findall(r"\S+\s*|\s+", fixture["output"]) or [""]
+        chunks = ["".join(words[start:start + 4]) for start in range(0, len(words), 4)]
+        pause = max(0.0, fixture["latency_ms"] - first_token_ms) / 1000 * self.latency_scale / len(chunks)
+        for chunk in chunks:
+            if pause:
+                await asyncio.sleep(pause)
+            yield chunk
+
+    def stats(self) -> dict:
+        return {
+            "backend": self.name,
+            "fixtures": len(self.fixtures),
+            "calls": self.calls,
+            "hits": self.hits,
+            "misses": self.misses,
+            "prompt_tokens": self.prompt_tokens,
+            "output_tokens": self.output_tokens,
+        }
+
+class RecordingBackend(LLMBackend):
+    """Passes calls to another backend and records each response and its latency as a fixture"""
+
+    name = "recording"
+
+    def __init__(self, inner: LLMBackend):
+        self.inner = inner
+        self.fixtures = {}
+
+    def _record(self, prompt: str, model_name: str, generation_config: dict, output: str, started: float, first_token_at: float = None):
+        now = time.perf_counter()
+        key = fixture_key(prompt, model_name, generation_config)
+        self.fixtures.setdefault(key, {
+            "key": key,
+            "prompt": prompt.strip()[:120],
+            "output": output,
+            "latency_ms": round((now - started) * 1000, 1),
+            "first_token_ms": round(((first_token_at or now) - started) * 1000, 1),
+        })
+
+    async def generate(self, prompt: str, model_name: str, generation_config: dict = None) -> str:
+        started = time.perf_counter()
+        output = await self.inner.generate(prompt, model_name, generation_config)
+        self._record(prompt, model_name, generation_config, output, started)
+        return output
+
+    async def generate_stream(self, prompt: str, model_name: str, generation_config: dict = None):
+        started, first_token_at, chunks = time.perf_counter(), None, []
+        async for chunk in self.inner.generate_stream(prompt, model_name, generation_config):
+            first_token_at = first_token_at or time.perf_counter()
+            chunks.append(chunk)
+            yield chunk
+        self._record(prompt, model_name, generation_config, "".join(chunks), started, first_token_at)
+
+    def save(self, path: str):
+        with open(path, "w", encoding="utf-8") as file:
+            for fixture in self.fixtures.values():
+                file.write(json.dumps(fixture) + "\n")
+
+    def stats(self) -> dict:
+        return {"backend": self.name, "recorded": len(self.fixtures), "inner": self.inner.stats()}
@@ -0,0 +1,223 @@
+import asyncio
+import os
+import random
+import threading
+import time
+from llm.backend import TransientLLMError, LLMTimeoutError, CircuitOpenError
+from telemetry.latency import LatencyWindow
+from telemetry.metrics import registry
+
+# Seconds one attempt may take, per stage; LLM_TIMEOUT_<STAGE> overrides a single stage
+DEFAULT_TIMEOUT_SECONDS = float(os.getenv("LLM_TIMEOUT_SECONDS", "30"))
+STAGE_TIMEOUT_SECONDS = {"classify": 8.0, "classify_batch": 12.0, "tool_decision": 15.0}
+
+# Retries after a retryable failure, with full-jitter exponential backoff
+MAX_RETRIES = int(os.getenv("LLM_MAX_RETRIES", "2"))
+RETRY_BASE_SECONDS = float(os.getenv("LLM_RETRY_BASE_MS", "250")) / 1000
+RETRY_MAX_SECONDS = float(os.getenv("LLM_RETRY_MAX_MS", "4000")) / 1000
+
+# Consecutive failures that open the circuit, and how long it stays open
+BREAKER_FAILURES = int(os.getenv("LLM_BREAKER_FAILURES", "5"))
+BREAKER_RESET_SECONDS = float(os.getenv("LLM_BREAKER_RESET_SECONDS", "30"))
+
+# Stages whose slow calls are duplicated; by default after the stage's recent p95 latency
+HEDGE_STAGES = {stage.strip() for stage in os.getenv("LLM_HEDGE_STAGES", "classify,classify_batch").split(",") if stage.strip()}
+HEDGE_AFTER_SECONDS = float(os.getenv("LLM_HEDGE_AFTER_MS", "0")) / 1000
+HEDGE_MIN_SAMPLES = 20
+
+# Gemini SDK (google.api_core) errors worth retrying, matched by name so the SDK stays optional
+RETRYABLE_ERROR_NAMES = {
+    "ServiceUnavailable", "TooManyRequests", "ResourceExhausted", "DeadlineExceeded",
+    "InternalServerError", "GatewayTimeout", "Aborted",
+}
+
+_retries_total = registry.counter("tutor_llm_retries_total", "LLM attempts retried after a retryable failure", ("stage",))
+_timeouts_total = registry.counter("tutor_llm_timeouts_total", "LLM attempts abandoned at the stage deadline", ("stage",))
+_hedges_total = registry.counter("tutor_llm_hedges_total", "Hedged LLM calls by which attempt finished first", ("stage", "winner"))
+_rejections_total = registry.counter("tutor_llm_circuit_rejections_total", "LLM calls refused while the circuit was open", ("stage",))
+
+def is_retryable(error: BaseException) -> bool:
+    return isinstance(error, (TransientLLMError, ConnectionError, TimeoutError, asyncio.TimeoutError)) or type(error).__name__ in RETRYABLE_ERROR_NAMES
+
+def is_unavailable(error: BaseException) -> bool:
+    """True when the LLM could not answer at all, so a degraded answer is appropriate"""
+    return isinstance(error, CircuitOpenError) or is_retryable(error)
+
+def stage_timeout(stage: str) -> float:
+    override = os.getenv(f"LLM_TIMEOUT_{stage.upper()}")
+    if override:
+        return float(override)
+    return min(STAGE_TIMEOUT_SECONDS.get(stage, DEFAULT_TIMEOUT_SECONDS), DEFAULT_TIMEOUT_SECONDS)
+
+class CircuitBreaker:
+    """
+    Fail fast while the backend keeps failing.
+
+    Closed: calls go through, and failure_threshold consecutive retryable
+    failures open the circuit. Open: calls raise CircuitOpenError at once
+    until reset_seconds have passed. Half-open: a single trial call goes
+    through; success closes the circuit, failure opens it again.
+    """
+
+    def __init__(self, failure_threshold: int = BREAKER_FAILURES, reset_seconds: float = BREAKER_RESET_SECONDS, clock=time.monotonic):
+        self.failure_threshold = failure_threshold
+        self.reset_seconds = reset_seconds
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._failures = 0
+        self._opened_at = None
+        self._trial_in_flight = False
+        self.times_opened = 0
+        self.rejected = 0
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            return self._state()
+
+    def _state(self) -> str:
+        if self._opened_at is None:
+            return "closed"
+        if self._clock() - self._opened_at < self.reset_seconds:
+            return "open"
+        return "half_open"
+
+    def before_call(self):
+        """Raise CircuitOpenError unless a call may go through now"""
+        with self._lock:
+            state = self._state()
+            if state == "closed":
+                return
+            if state == "half_open" and not self._trial_in_flight:
+                self._trial_in_flight = True
+                return
+            self.rejected += 1
+            retry_after = max(0.0, self._opened_at + self.reset_seconds - self._clock())
+        raise CircuitOpenError(retry_after)
+
+    def record_success(self):
+        with self._lock:
+            self._failures = 0
+            self._opened_at = None
+            self._trial_in_flight = False
+
+    def record_failure(self):
+        with self._lock:
+            self._failures += 1
+            if self._trial_in_flight or (self._opened_at is None and self._failures >= self.failure_threshold):
+                self._opened_at = self._clock()
+                self.times_opened += 1
+            self._trial_in_flight = False
+
+    def record_abandoned(self):
+        """A call was cancelled before it could tell us anything about the backend"""
+        with self._lock:
+            self._trial_in_flight = False
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "state": self._state(),
+                "consecutive_failures": self._failures,
+                "times_opened": self.times_opened,
+                "rejected": self.rejected,
+            }
+
+breaker = CircuitBreaker()
+_stage_latency = {}
+
+def _observed_latency(stage: str) -> LatencyWindow:
+    window = _stage_latency.get(stage)
+    if window is None:
+        window = _stage_latency.setdefault(stage, LatencyWindow(size=200))
+    return window
+
+def hedge_delay(stage: str):
+    """Seconds to wait before hedging a call of this stage, or None to not hedge"""
+    if stage not in HEDGE_STAGES:
+        return None
+    if HEDGE_AFTER_SECONDS > 0:
+        return HEDGE_AFTER_SECONDS
+    window = _observed_latency(stage)
+    if window.count < HEDGE_MIN_SAMPLES:
+        return None
+    return window.percentile(0.95)
+
+async def _hedged(stage: str, attempt, delay: float):
+    """Start a second attempt if the first is slower than delay; return whichever succeeds first"""
+    tasks = [asyncio.ensure_future(attempt())]
+    try:
+        done, _ = await asyncio.wait(tasks, timeout=delay)
+        if not done:
+            tasks.append(asyncio.ensure_future(attempt()))
+
+        pending, error = set(tasks), None
+        while pending:
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                if task.exception() is None:
+                    if len(tasks) > 1:
+                        _hedges_total.inc(stage=stage, winner="primary" if task is tasks[0] else "hedge")
+                    return task.result()
+                error = error or task.exception()
+        raise error
+    finally:
+        for task in tasks:
+            task.cancel()
+
+async def within_deadline(stage: str, awaitable):
+    """Await one backend call, raising LLMTimeoutError once it exceeds the stage's timeout"""
+    timeout = stage_timeout(stage)
+    try:
+        return await asyncio.wait_for(awaitable, timeout)
+    except asyncio.TimeoutError:
+        _timeouts_total.inc(stage=stage)
+        raise LLMTimeoutError(f"LLM call for stage '{stage}' took longer than {timeout:g}s") from None
+
+async def call_with_resilience(stage: str, attempt, can_retry=None, hedge: bool = True):
+    """
+    Run attempt() (one backend call) under the retry policy and the circuit breaker.
+
+    attempt should bound the backend call with within_deadline(). Retryable
+    failures are retried with jittered backoff while can_retry() allows it
+    (a stream that already sent text to the client must not be retried).
+    Stages in LLM_HEDGE_STAGES get a duplicate attempt when the first is
+    slower than usual. Non-retryable errors propagate unchanged.
+    """
+    delay = hedge_delay(stage) if hedge else None
+    for retry in range(MAX_RETRIES + 1):
+        try:
+            breaker.before_call()
+        except CircuitOpenError:
+            _rejections_total.inc(stage=stage)
+            raise
+
+        started = time.perf_counter()
+        try:
+            result = await (_hedged(stage, attempt, delay) if delay is not None else attempt())
+        except asyncio.CancelledError:
+            breaker.record_abandoned()
+            raise
+        except Exception as e:
+            if not is_retryable(e):
+                # The backend answered, just not usefully; that says nothing about its health
+                breaker.record_success()
+                raise
+            breaker.record_failure()
+            if retry == MAX_RETRIES or (can_retry is not None and not can_retry()):
+                raise
+            _retries_total.inc(stage=stage)
+            await asyncio.sleep(random.uniform(0, min(RETRY_MAX_SECONDS, RETRY_BASE_SECONDS * 2 ** retry)))
+            continue
+
+        breaker.record_success()
+        _observed_latency(stage).observe(time.perf_counter() - started)
+        return result
+
+def _collect_breaker_metrics():
+    state = breaker.state
+    yield ("tutor_llm_circuit_state", "gauge", "1 for the LLM circuit breaker's current state", [
+        ({"state": name}, int(name == state)) for name in ("closed", "open", "half_open")
+    ])
+
+registry.add_collector(_collect_breaker_metrics)
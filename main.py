@@ -1,12 +1,90 @@
 from fastapi import FastAPI, Request, HTTPException
-from fastapi.responses import HTMLResponse
+from fastapi.responses import HTMLResponse, JSONResponse, PlainTextResponse, StreamingResponse
 from fastapi.staticfiles import StaticFiles
 from fastapi.templating import Jinja2Templates
 from pydantic import BaseModel
-from agents.tutor_agent import tutor_agent
+from typing import Optional
+from agents.tutor_agent import tutor_agent, ask_tutor, tutor_agent_batch, answer_flights, answer_without_llm, preload_agents
+from admission.queue import get_admission, Overloaded, INTERACTIVE, BATCH, CALLS_PER_QUESTION
+from agents.router import router_stats
+from agents.speculation import speculation_stats
+from agents.structured import structured_output_stats
+from cache.answer_cache import get_answer_cache, normalize_question
+from cache.tool_cache import get_tool_cache
+from jobs.job_queue import get_job_queue, JobWorkers, FINISHED, CANCELLED
+from llm.client import get_backend, load_backend, llm_stage_stats, track_usage, stream_answers_to, conversation_context
+from llm.resilience import breaker
+from sessions.session_store import get_session_store
+from telemetry.latency import LatencyWindow
+from telemetry.metrics import registry
+from telemetry.tracing import TraceMiddleware
+import asyncio
+import json
+import math
 import os
+import re
+import time
+from contextlib import asynccontextmanager
 
-app = FastAPI(title="Gemini Tutor - Your AI Learning Companion")
+# How the LLM client and subject agents are loaded at startup: "background" (serve right away and
+# load them while the page is being read), "eager" (before serving) or "off" (on the first question)
+STARTUP_PRELOAD = os.getenv("STARTUP_PRELOAD", "background")
+
+_background_tasks = set()
+# Reported on /stats: how long preloading took, or why it failed
+_startup = {"preload": STARTUP_PRELOAD, "preload_ms": None, "preload_error": None}
+
+# Background workers answering /jobs in this process; 0 only queues jobs, for another process to answer
+JOB_WORKERS = int(os.getenv("JOB_WORKERS", "2"))
+JOB_POLL_INTERVAL = float(os.getenv("JOB_POLL_INTERVAL", "30"))
+# Longest a GET /jobs/{id}?wait=... long poll is held open
+JOB_MAX_WAIT = float(os.getenv("JOB_MAX_WAIT", "30"))
+_job_workers = None
+
+def _run_in_background(coroutine):
+    task = asyncio.create_task(coroutine)
+    _background_tasks.add(task)
+    task.add_done_callback(_background_tasks.discard)
+    return task
+
+def _preload():
+    """Configure the LLM client (importing its SDK is the slowest part of a cold start) and import the agents"""
+    started = time.perf_counter()
+    get_backend()
+    preload_agents()
+    _startup["preload_ms"] = round((time.perf_counter() - started) * 1000, 2)
+
+async def _preload_in_background():
+    try:
+        await asyncio.to_thread(_preload)
+    except Exception as e:
+        # The first question will try again and report the error to its caller
+        _startup["preload_error"] = str(e)
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    if STARTUP_PRELOAD == "eager":
+        await asyncio.to_thread(_preload)
+    elif STARTUP_PRELOAD == "background":
+        _run_in_background(_preload_in_background())
+
+    # Fill the tool cache in the background so startup isn't delayed
+    if os.getenv("TOOL_CACHE_WARM", "0") == "1" and get_tool_cache() is not None:
+        from agents.cs_agent import warm_algorithm_explanations
+        _run_in_background(warm_algorithm_explanations())
+
+    workers = _get_job_workers() if JOB_WORKERS > 0 and get_job_queue() is not None else None
+    if workers is not None:
+        workers.start()
+    yield
+    if workers is not None:
+        # Jobs still running go back to the queue for the next worker
+        await workers.stop()
+
+app = FastAPI(title="Gemini Tutor - Your AI Learning Companion", lifespan=lifespan)
+
+# Every response carries X-Trace-Id and a Server-Timing breakdown of its stages
+app.add_middleware(TraceMiddleware)
 
 # Mount static files directory
 app.mount("/static", StaticFiles(directory="static"), name="static")
@@ -14,17 +92,306 @@ app.mount("/static", StaticFiles(directory="static"), name="static")
 # Set up Jinja2 templates
 templates = Jinja2Templates(directory="templates")
 
+# Server-side latency of recent requests; streaming tracks time to first token separately
+_ask_latency = LatencyWindow()
+_stream_first_token_latency = LatencyWindow()
+_stream_total_latency = LatencyWindow()
+_END_OF_STREAM = object()
+
+# Questions answered concurrently per /ask/batch request, and the largest batch accepted
+BATCH_CONCURRENCY = int(os.getenv("BATCH_CONCURRENCY", "8"))
+BATCH_MAX_QUESTIONS = int(os.getenv("BATCH_MAX_QUESTIONS", "50"))
+
+# Proxies in front of the server (Render runs one, and sets RENDER); each appends the address it
+# saw to X-Forwarded-For, so the caller is that many entries from the right. Entries further left
+# were sent by the client and can't be trusted.
+TRUST_PROXY = int(os.getenv("RATE_LIMIT_TRUST_PROXY", "1" if os.getenv("RENDER") else "0"))
+# Browser-generated client and session IDs
+_CLIENT_ID = re.compile(r"^[A-Za-z0-9_\-]{1,64}$")
+
+@app.exception_handler(Overloaded)
+async def overloaded(request: Request, exc: Overloaded):
+    return JSONResponse(
+        status_code=429,
+        content={"detail": str(exc), "reason": exc.reason},
+        headers={"Retry-After": str(math.ceil(exc.retry_after))},
+    )
+
+def _client_address(request: Request) -> str:
+    """The caller's address: the peer, or the one our trusted proxies forwarded"""
+    host = request.client.host if request.client else "unknown"
+    if TRUST_PROXY > 0 and request.headers.get("x-forwarded-for"):
+        forwarded = [entry.strip() for entry in request.headers["x-forwarded-for"].split(",")]
+        host = forwarded[max(0, len(forwarded) - TRUST_PROXY)] or host
+    return host
+
+def _client_key(request: Request) -> tuple:
+    """
+    Rate-limit identity: the caller's address, and the browser's X-Client-Id or None.
+
+    The address is what the limit is keyed on. The unauthenticated X-Client-Id
+    only splits it into sub-buckets, so a classroom behind one NAT isn't one
+    client, while the address as a whole stays capped.
+    """
+    if request is None:
+        return "local", None
+    client_id = request.headers.get("x-client-id", "")
+    return _client_address(request), client_id if _CLIENT_ID.match(client_id) else None
+
+async def _answer_admitted(query: str, priority: int = INTERACTIVE) -> str:
+    """ask_tutor behind the admission queue; answers that need no LLM call skip the queue"""
+    admission = get_admission()
+    if admission is None:
+        return await ask_tutor(query)
+    answer = await answer_without_llm(query)
+    if answer is not None:
+        admission.record_bypass()
+        return answer
+    async with admission.admit(priority):
+        return await ask_tutor(query)
+
 class Question(BaseModel):
     query: str
+    # Questions sharing a session_id are answered as one conversation, so follow-ups can refer back
+    session_id: Optional[str] = None
+
+def _check_session_id(question: Question):
+    if question.session_id is not None and not _CLIENT_ID.match(question.session_id):
+        raise HTTPException(status_code=400, detail="session_id must be 1-64 letters, digits, '-' or '_'")
+
+async def _session_context(question: Question):
+    """The conversation so far in the question's session, or None for a first or session-less question"""
+    if question.session_id is None:
+        return None
+    _check_session_id(question)
+    sessions = get_session_store()
+    return await sessions.context(question.session_id) if sessions is not None else None
+
+async def _remember_turn(question: Question, answer: str):
+    sessions = get_session_store()
+    if question.session_id is not None and sessions is not None:
+        await sessions.add_turn(question.session_id, question.query, answer)
+
+class QuestionBatch(BaseModel):
+    queries: list[str]
 
 @app.post("/ask")
-async def ask_question(question: Question):
+async def ask_question(question: Question, request: Request = None):
+    started = time.perf_counter()
+    admission = get_admission()
+    if admission is not None:
+        admission.check_client(*_client_key(request))
+    context = await _session_context(question)
     try:
-        answer = tutor_agent(question.query)
-        return {"answer": answer}
+        with track_usage() as usage, conversation_context(context):
+            answer = await _answer_admitted(question.query)
+        await _remember_turn(question, answer)
+        _ask_latency.observe(time.perf_counter() - started)
+        return {"answer": answer, "llm_calls": usage.calls}
+    except Overloaded:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+@app.post("/ask/batch")
+async def ask_question_batch(batch: QuestionBatch, request: Request = None):
+    """
+    Answer a whole problem set in one request.
+
+    Results come back in the order of the queries, each with either an
+    "answer" or an "error", so one failing question does not fail the rest.
+    Batches queue behind interactive questions and are budgeted for every
+    distinct question they contain.
+    """
+    if not batch.queries:
+        raise HTTPException(status_code=400, detail="queries must not be empty")
+    if len(batch.queries) > BATCH_MAX_QUESTIONS:
+        raise HTTPException(status_code=400, detail=f"At most {BATCH_MAX_QUESTIONS} queries per batch")
+
+    started = time.perf_counter()
+    admission = get_admission()
+    with track_usage() as usage:
+        if admission is None:
+            outcomes = await tutor_agent_batch(batch.queries, concurrency=BATCH_CONCURRENCY)
+        else:
+            admission.check_client(*_client_key(request))
+            distinct = len({normalize_question(query) for query in batch.queries})
+            async with admission.admit(BATCH, cost=CALLS_PER_QUESTION * distinct):
+                outcomes = await tutor_agent_batch(batch.queries, concurrency=BATCH_CONCURRENCY)
+    return {
+        "results": [{"query": query, **outcome} for query, outcome in zip(batch.queries, outcomes)],
+        "llm_calls": usage.calls,
+        "total_ms": round((time.perf_counter() - started) * 1000, 2),
+    }
+
+def _sse_event(event: dict) -> str:
+    return f"data: {json.dumps(event)}\n\n"
+
+@app.post("/ask/stream")
+async def ask_question_stream(question: Question, request: Request = None):
+    """
+    Stream the answer as server-sent events.
+
+    Emits {"type": "token", "text": ...} for each chunk of the final answer
+    call, then {"type": "done", "answer": ...} with the complete answer (which
+    the client should render as authoritative, since cached or single-pass
+    answers arrive without tokens) or {"type": "error", "detail": ...}.
+    """
+    started = time.perf_counter()
+    queue = asyncio.Queue()
+
+    # Admission is decided before the stream starts, so overload is a plain 429
+    admission = get_admission()
+    cached_answer = None
+    if admission is not None:
+        admission.check_client(*_client_key(request))
+    context = await _session_context(question)
+    if admission is not None:
+        with conversation_context(context):
+            cached_answer = await answer_without_llm(question.query)
+        if cached_answer is None:
+            await admission.acquire(INTERACTIVE)
+        else:
+            admission.record_bypass()
+
+    async def answer_question():
+        admitted_at = time.perf_counter()
+        try:
+            if cached_answer is not None:
+                answer, llm_calls = cached_answer, 0
+            else:
+                with track_usage() as usage, stream_answers_to(queue), conversation_context(context):
+                    answer = await tutor_agent(question.query)
+                llm_calls = usage.calls
+            await _remember_turn(question, answer)
+            return answer, llm_calls
+        finally:
+            queue.put_nowait(_END_OF_STREAM)
+            if admission is not None and cached_answer is None:
+                admission.release(time.perf_counter() - admitted_at)
+
+    # Started here rather than in events(), so the admission slot is released even if the stream never starts
+    task = asyncio.create_task(answer_question())
+
+    async def events():
+        first_token_at = None
+        try:
+            while True:
+                chunk = await queue.get()
+                if chunk is _END_OF_STREAM:
+                    break
+                if first_token_at is None:
+                    first_token_at = time.perf_counter()
+                yield _sse_event({"type": "token", "text": chunk})
+
+            try:
+                answer, llm_calls = await task
+            except Exception as e:
+                yield _sse_event({"type": "error", "detail": str(e)})
+                return
+
+            finished = time.perf_counter()
+            first_token_at = first_token_at or finished
+            _stream_first_token_latency.observe(first_token_at - started)
+            _stream_total_latency.observe(finished - started)
+            yield _sse_event({
+                "type": "done",
+                "answer": answer,
+                "llm_calls": llm_calls,
+                "ttfb_ms": round((first_token_at - started) * 1000, 2),
+                "total_ms": round((finished - started) * 1000, 2),
+            })
+        finally:
+            # The client may disconnect mid-answer; stop the work it no longer needs
+            task.cancel()
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+async def _answer_job(job: dict) -> tuple:
+    """Answer a queued job as /ask would, queueing behind interactive questions"""
+    question = Question(query=job["query"], session_id=job["session_id"])
+    context = await _session_context(question)
+    with track_usage() as usage, conversation_context(context):
+        answer = await _answer_admitted(question.query, BATCH)
+    await _remember_turn(question, answer)
+    return answer, usage.calls
+
+def _get_job_workers() -> JobWorkers:
+    global _job_workers
+    queue = get_job_queue()
+    if queue is None:
+        raise HTTPException(status_code=404, detail="The job API is disabled")
+    if _job_workers is None:
+        _job_workers = JobWorkers(queue, _answer_job, workers=JOB_WORKERS, poll_interval=JOB_POLL_INTERVAL)
+    return _job_workers
+
+@app.post("/jobs", status_code=202)
+async def submit_job(question: Question, request: Request = None):
+    """
+    Queue a question and return its job right away, for answers too slow to hold a connection open.
+
+    Poll GET /jobs/{id} (optionally with ?wait=seconds) or subscribe to
+    GET /jobs/{id}/events for the answer. Jobs are kept in SQLite, so they
+    survive a restart, and finished jobs are kept for JOB_RETENTION seconds.
+    """
+    workers = _get_job_workers()
+    admission = get_admission()
+    if admission is not None:
+        admission.check_client(*_client_key(request))
+    _check_session_id(question)
+    job = await workers.submit(question.query, question.session_id)
+    return JSONResponse(status_code=202, content=job, headers={"Location": f"/jobs/{job['id']}"})
+
+@app.get("/jobs/{job_id}")
+async def get_job(job_id: str, wait: float = 0):
+    """The job's status, and its answer or error once finished; wait holds the request until it finishes"""
+    workers = _get_job_workers()
+    deadline = time.monotonic() + min(max(wait, 0), JOB_MAX_WAIT)
+    job = await workers.wait(job_id, 0)
+    while job is not None and job["status"] not in FINISHED and time.monotonic() < deadline:
+        job = await workers.wait(job_id, deadline - time.monotonic(), seen_status=job["status"])
+    if job is None:
+        raise HTTPException(status_code=404, detail="No such job (it may have expired)")
+    return job
+
+@app.get("/jobs/{job_id}/events")
+async def job_events(job_id: str):
+    """Server-sent {"type": "job", "job": ...} events on each status change, ending once the job finishes"""
+    workers = _get_job_workers()
+    job = await workers.wait(job_id, 0)
+    if job is None:
+        raise HTTPException(status_code=404, detail="No such job (it may have expired)")
+
+    async def events():
+        current = job
+        while True:
+            yield _sse_event({"type": "job", "job": current})
+            if current is None or current["status"] in FINISHED:
+                return
+            status = current["status"]
+            # Re-sent on timeout as a keep-alive through proxies
+            current = await workers.wait(job_id, JOB_MAX_WAIT, seen_status=status)
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+@app.delete("/jobs/{job_id}")
+async def cancel_job(job_id: str):
+    """Cancel a queued or running job; a job that already finished is left as it was (409)"""
+    job = await _get_job_workers().cancel(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="No such job (it may have expired)")
+    if job["status"] != CANCELLED:
+        raise HTTPException(status_code=409, detail=f"The job already finished ({job['status']})")
+    return job
+
 @app.get("/", response_class=HTMLResponse)
 async def root(request: Request):
     return templates.TemplateResponse("index.html", {"request": request})
@@ -33,3 +400,71 @@ async def root(request: Request):
 @app.get("/health")
 async def health_check():
     return {"status": "healthy"}
+
+def _collect_cache_metrics():
+    """Expose the cache, router and single-flight counters that /stats reports"""
+    answer_cache = get_answer_cache()
+    if answer_cache is not None:
+        counters = answer_cache.stats()
+        yield ("tutor_answer_cache_lookups_total", "counter", "Answer cache lookups by result", [
+            ({"result": "hit"}, counters["hits"]),
+            ({"result": "similar_hit"}, counters["similar_hits"]),
+            ({"result": "miss"}, counters["misses"]),
+        ])
+
+    tool_cache = get_tool_cache()
+    if tool_cache is not None:
+        samples = []
+        for tool, counters in tool_cache.stats()["tools"].items():
+            samples.append(({"tool": tool, "result": "hit"}, counters["hits"]))
+            samples.append(({"tool": tool, "result": "miss"}, counters["misses"]))
+        yield ("tutor_tool_cache_lookups_total", "counter", "Tool cache lookups by tool and result", samples)
+
+    decisions = router_stats()["decisions"]
+    yield ("tutor_router_decisions_total", "counter", "Routing decisions by source (local keyword router or LLM) and subject", [
+        ({"source": source, "subject": subject}, count)
+        for source, subjects in sorted(decisions.items())
+        for subject, count in sorted(subjects.items())
+    ])
+
+    flights = answer_flights.stats()
+    yield ("tutor_single_flight_calls_total", "counter", "Answer requests that started a pipeline run (leader) or joined one (coalesced)", [
+        ({"role": "leader"}, flights["leaders"]),
+        ({"role": "coalesced"}, flights["coalesced"]),
+    ])
+    yield ("tutor_single_flight_in_flight", "gauge", "Pipeline runs currently shared by single-flight", [({}, flights["in_flight"])])
+
+registry.add_collector(_collect_cache_metrics)
+
+@app.get("/metrics")
+async def metrics():
+    """Prometheus text exposition of latency histograms, LLM usage, fallbacks and cache counters"""
+    return PlainTextResponse(registry.render(), media_type="text/plain; version=0.0.4")
+
+@app.get("/stats")
+async def stats():
+    answer_cache = get_answer_cache()
+    tool_cache = get_tool_cache()
+    admission = get_admission()
+    sessions = get_session_store()
+    job_queue = get_job_queue()
+    return {
+        "llm": (await load_backend()).stats(),
+        "llm_stages": llm_stage_stats(),
+        "circuit_breaker": breaker.stats(),
+        "router": router_stats(),
+        "speculation": speculation_stats(),
+        "structured_outputs": structured_output_stats(),
+        "answer_cache": answer_cache.stats() if answer_cache else None,
+        "tool_cache": tool_cache.stats() if tool_cache else None,
+        "single_flight": answer_flights.stats(),
+        "admission": admission.stats() if admission else None,
+        "sessions": sessions.stats() if sessions else None,
+        "jobs": _get_job_workers().stats() if job_queue else None,
+        "startup": _startup,
+        "latency": {
+            "ask": _ask_latency.summary(),
+            "stream_first_token": _stream_first_token_latency.summary(),
+            "stream_total": _stream_total_latency.summary(),
+        },
+    }
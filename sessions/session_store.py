@@ -0,0 +1,142 @@
+import os
+import re
+import threading
+from cache.stores import create_store, call_store
+from llm.backend import estimate_tokens
+from telemetry.metrics import registry
+
+SENTENCE_BOUNDARY = re.compile(r"(?<=[.!?])\s+|\n+")
+MARKDOWN = re.compile(r"[*_`#>|]+")
+# Sentences with numbers or equations usually carry the result a follow-up refers to
+RESULT_HINT = re.compile(r"\d|=")
+
+_context_tokens = registry.histogram(
+    "tutor_session_context_tokens", "Estimated tokens of conversation context added to a follow-up's prompts",
+    buckets=(50, 100, 200, 400, 800, 1600, 3200),
+)
+
+def compact_text(text: str, max_tokens: int) -> str:
+    """
+    Shorten text to about max_tokens, keeping whole sentences where possible.
+
+    The first sentence is always kept, then sentences that mention numbers or
+    equations, then the rest, each in their original order. Markdown is dropped.
+    """
+    sentences = [MARKDOWN.sub("", sentence).strip() for sentence in SENTENCE_BOUNDARY.split(text)]
+    sentences = [sentence for sentence in sentences if sentence]
+    if not sentences:
+        return ""
+
+    budget = max_tokens * 4
+    chosen, used = {0}, len(sentences[0])
+    rest = range(1, len(sentences))
+    for index in [i for i in rest if RESULT_HINT.search(sentences[i])] + [i for i in rest if not RESULT_HINT.search(sentences[i])]:
+        if used + 1 + len(sentences[index]) <= budget:
+            chosen.add(index)
+            used += 1 + len(sentences[index])
+
+    compacted = " ".join(sentences[index] for index in sorted(chosen))
+    return compacted if len(compacted) <= budget else compacted[:budget - 1].rstrip() + "…"
+
+class SessionStore:
+    """
+    Conversation state per session, kept within a token budget.
+
+    Each session holds its most recent exchanges (question and a compacted
+    answer) plus one-line summaries of older ones. Once the recent exchanges
+    outgrow two thirds of context_tokens the oldest is folded into a summary
+    line, and the oldest summary lines are dropped when the whole context no
+    longer fits. Prompts therefore stay bounded however long a conversation
+    runs, and so does each session's footprint in the store.
+    """
+
+    def __init__(self, store, context_tokens: int = 600, turn_tokens: int = 150, summary_tokens: int = 40):
+        self.store = store
+        self.context_tokens = context_tokens
+        # A single exchange (question and answer) must fit in the recent share of the budget
+        self.turn_tokens = min(turn_tokens, context_tokens // 3)
+        self.summary_tokens = summary_tokens
+        self._lock = threading.Lock()
+        self.turns = 0
+        self.follow_ups = 0
+
+    @staticmethod
+    def _key(session_id: str) -> str:
+        return f"session:{session_id}"
+
+    @staticmethod
+    def render(record: dict) -> str:
+        """The context text prepended to a follow-up's prompts"""
+        parts = []
+        if record["summary"]:
+            parts.append("Earlier in this conversation:\n" + "\n".join(f"- {line}" for line in record["summary"]))
+        if record["turns"]:
+            parts.append("Most recent exchanges:\n" + "\n".join(f"Student: {question}\nTutor: {answer}" for question, answer in record["turns"]))
+        return "\n\n".join(parts)
+
+    def _append(self, session_id: str, question: str, answer: str):
+        # Read-modify-write under one lock, so concurrent questions in a session don't drop turns
+        with self._lock:
+            record = self.store.get(self._key(session_id)) or {"summary": [], "turns": []}
+            turns, summary = record["turns"], record["summary"]
+            turns.append([compact_text(question, self.turn_tokens), compact_text(answer, self.turn_tokens)])
+
+            recent_budget = self.context_tokens * 2 // 3
+            while len(turns) > 1 and estimate_tokens(self.render({"summary": [], "turns": turns})) > recent_budget:
+                old_question, old_answer = turns.pop(0)
+                summary.append(f"{compact_text(old_question, self.summary_tokens)} → {compact_text(old_answer, self.summary_tokens)}")
+            while summary and estimate_tokens(self.render(record)) > self.context_tokens:
+                summary.pop(0)
+
+            self.store.set(self._key(session_id), record)
+            self.turns += 1
+
+    async def context(self, session_id: str):
+        """Return the conversation so far as prompt text, or None for a new session"""
+        record = await call_store(self.store, self.store.get, self._key(session_id))
+        if not record:
+            return None
+        context = self.render(record)
+        with self._lock:
+            self.follow_ups += 1
+        _context_tokens.observe(estimate_tokens(context))
+        return context
+
+    async def add_turn(self, session_id: str, question: str, answer: str):
+        await call_store(self.store, self._append, session_id, question, answer)
+
+    def stats(self) -> dict:
+        store_stats = self.store.stats()
+        with self._lock:
+            counters = {"turns": self.turns, "follow_ups": self.follow_ups}
+        entries = store_stats["entries"]
+        return {
+            **counters,
+            "context_tokens": self.context_tokens,
+            "bytes_per_session": round(store_stats["bytes"] / entries, 1) if entries else 0.0,
+            **store_stats,
+        }
+
+_session_store = None
+
+def get_session_store():
+    """Return the process-wide session store configured from SESSION_*, or None when disabled"""
+    global _session_store
+    kind = os.getenv("SESSION_STORE", "memory")
+    if kind == "off":
+        return None
+    if _session_store is None:
+        store = create_store(
+            kind,
+            path=os.getenv("SESSION_STORE_PATH", "tutor_cache.sqlite3"),
+            table="sessions",
+            max_entries=int(os.getenv("SESSION_MAX_SESSIONS", "10000")),
+            max_bytes=int(float(os.getenv("SESSION_MAX_MB", "16")) * 1024 * 1024),
+            ttl_seconds=float(os.getenv("SESSION_TTL", "86400")),
+        )
+        _session_store = SessionStore(
+            store,
+            context_tokens=int(os.getenv("SESSION_CONTEXT_TOKENS", "600")),
+            turn_tokens=int(os.getenv("SESSION_TURN_TOKENS", "150")),
+        )
+    return _session_store
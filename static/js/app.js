@@ -24,6 +24,18 @@ let currentStudent = {
     chatHistory: JSON.parse(localStorage.getItem('chatHistory')) || []
 };
 
+// Identifies this browser to the server's per-student rate limit
+const clientId = localStorage.getItem('clientId') || Math.random().toString(36).slice(2, 14);
+localStorage.setItem('clientId', clientId);
+
+// Questions in one conversation share a session, so follow-ups can refer to earlier answers
+let sessionId = localStorage.getItem('sessionId') || newSessionId();
+localStorage.setItem('sessionId', sessionId);
+
+function newSessionId() {
+    return Math.random().toString(36).slice(2, 14) + Date.now().toString(36);
+}
+
 // No longer using subject tabs
 
 // Initialize the app
@@ -74,24 +86,19 @@ async function handleQuestionSubmit(e) {
     const typingIndicator = addTypingIndicator();
     
     try {
-        // Send question to API
-        const response = await fetch('/ask', {
-            method: 'POST',
-            headers: {
-                'Content-Type': 'application/json'
-            },
-            body: JSON.stringify({ query: question })
-        });
-        
-        const data = await response.json();
+        // Send question to the streaming API; tokens are rendered as they arrive
+        const data = await streamAnswer(question, typingIndicator);
         
-        // Remove typing indicator
+        // Remove typing indicator (already gone if any tokens were streamed)
         typingIndicator.remove();
         
         // Determine subject based on keywords in question and answer
         const subject = detectSubject(question, data.answer);
         
-        // Add bot message to chat
+        // Replace the streamed draft with the final answer and its metadata
+        if (data.streamedMessage) {
+            data.streamedMessage.remove();
+        }
         addMessageToChat('bot', data.answer, subject);
         
         // Update subject indicator
@@ -102,8 +109,77 @@ async function handleQuestionSubmit(e) {
     } catch (error) {
         console.error('Error:', error);
         typingIndicator.remove();
-        addMessageToChat('system', 'Sorry, I had trouble processing your question. Please try again.');
+        addMessageToChat('system', error.userMessage || 'Sorry, I had trouble processing your question. Please try again.');
+    }
+}
+
+async function streamAnswer(question, typingIndicator) {
+    // Reads server-sent events from /ask/stream and resolves with the final "done" event
+    const startedAt = performance.now();
+    const response = await fetch('/ask/stream', {
+        method: 'POST',
+        headers: {
+            'Content-Type': 'application/json',
+            'X-Client-Id': clientId
+        },
+        body: JSON.stringify({ query: question, session_id: sessionId })
+    });
+    
+    if (response.status === 429) {
+        // Too many questions at once; the server says when to try again
+        const error = new Error('Rate limited');
+        const retryAfter = response.headers.get('Retry-After') || 'a few';
+        error.userMessage = `Lots of questions are coming in right now. Please try again in ${retryAfter} seconds.`;
+        throw error;
     }
+    
+    if (!response.ok || !response.body) {
+        throw new Error(`Request failed with status ${response.status}`);
+    }
+    
+    const reader = response.body.getReader();
+    const decoder = new TextDecoder();
+    let buffer = '';
+    let streamedText = '';
+    let streamedMessage = null;
+    let firstTokenAt = null;
+    
+    while (true) {
+        const { value, done } = await reader.read();
+        if (done) break;
+        
+        buffer += decoder.decode(value, { stream: true });
+        const rawEvents = buffer.split('\n\n');
+        buffer = rawEvents.pop();
+        
+        for (const rawEvent of rawEvents) {
+            if (!rawEvent.startsWith('data: ')) continue;
+            const event = JSON.parse(rawEvent.slice(6));
+            
+            if (event.type === 'token') {
+                if (streamedMessage === null) {
+                    firstTokenAt = performance.now();
+                    typingIndicator.remove();
+                    streamedMessage = addMessageToChat('bot', '');
+                }
+                streamedText += event.text;
+                updateMessageContent(streamedMessage, streamedText);
+            } else if (event.type === 'done') {
+                const finishedAt = performance.now();
+                console.debug(
+                    `Time to first token: ${Math.round((firstTokenAt || finishedAt) - startedAt)} ms, ` +
+                    `total: ${Math.round(finishedAt - startedAt)} ms (server: ${event.ttfb_ms} / ${event.total_ms} ms)`
+                );
+                return { ...event, streamedMessage };
+            } else if (event.type === 'error') {
+                if (streamedMessage) streamedMessage.remove();
+                throw new Error(event.detail);
+            }
+        }
+    }
+    
+    if (streamedMessage) streamedMessage.remove();
+    throw new Error('The answer stream ended unexpectedly');
 }
 
 function openSettings() {
@@ -129,6 +205,9 @@ function clearHistory() {
     if (confirm('Are you sure you want to clear your chat history?')) {
         currentStudent.chatHistory = [];
         localStorage.removeItem('chatHistory');
+        // Start a new conversation on the server too
+        sessionId = newSessionId();
+        localStorage.setItem('sessionId', sessionId);
         chatMessages.innerHTML = '';
         
         // Add welcome message back
@@ -196,6 +275,11 @@ function addMessageToChat(sender, content, subject = null) {
     return messageDiv;
 }
 
+function updateMessageContent(messageDiv, content) {
+    messageDiv.querySelector('.message-content').innerHTML = `<p>${formatMessageContent(content)}</p>`;
+    chatMessages.scrollTop = chatMessages.scrollHeight;
+}
+
 function addTypingIndicator() {
     const indicator = document.createElement('div');
     indicator.className = 'message bot-message typing-indicator';
@@ -0,0 +1,33 @@
+import threading
+from collections import deque
+
+class LatencyWindow:
+    """Rolling window of recent latency samples with percentile summaries"""
+
+    def __init__(self, size: int = 1000):
+        self._samples = deque(maxlen=size)
+        self._lock = threading.Lock()
+        self.count = 0
+
+    def observe(self, seconds: float):
+        with self._lock:
+            self._samples.append(seconds)
+            self.count += 1
+
+    def percentile(self, p: float) -> float:
+        """Return the p-th percentile (0-1) of the window in seconds, or 0.0 when empty"""
+        with self._lock:
+            samples = sorted(self._samples)
+        return samples[min(len(samples) - 1, int(p * len(samples)))] if samples else 0.0
+
+    def summary(self) -> dict:
+        with self._lock:
+            samples = sorted(self._samples)
+            count = self.count
+        if not samples:
+            return {"count": count}
+
+        def percentile(p):
+            return round(samples[min(len(samples) - 1, int(p * len(samples)))] * 1000, 2)
+
+        return {"count": count, "p50_ms": percentile(0.50), "p95_ms": percentile(0.95), "p99_ms": percentile(0.99), "max_ms": round(samples[-1] * 1000, 2)}
@@ -0,0 +1,147 @@
+import contextvars
+import functools
+import inspect
+import re
+import time
+import uuid
+from contextlib import contextmanager
+from telemetry.metrics import stage_seconds, tool_seconds, tool_errors_total, request_seconds, agent_fallbacks_total
+
+TRACE_HEADER = "x-trace-id"
+
+# Incoming trace IDs are echoed back in headers and logs, so only accept plain tokens
+_VALID_TRACE_ID = re.compile(r"^[A-Za-z0-9_\-]{1,64}$")
+
+_current_trace = contextvars.ContextVar("request_trace", default=None)
+
+class Trace:
+    """Timings of the stages a single request went through"""
+
+    def __init__(self, trace_id: str):
+        self.trace_id = trace_id
+        self.spans = []
+
+    def add(self, stage: str, seconds: float):
+        self.spans.append((stage, seconds))
+
+    def server_timing(self) -> str:
+        """Render the spans as a Server-Timing header, summing repeated stages"""
+        totals = {}
+        for stage, seconds in self.spans:
+            totals[stage] = totals.get(stage, 0.0) + seconds
+        return ", ".join(f"{stage};dur={seconds * 1000:.2f}" for stage, seconds in totals.items())
+
+def current_trace():
+    """Return the Trace of the request being handled, or None outside a request"""
+    return _current_trace.get()
+
+def record_span(stage: str, seconds: float):
+    """Record a stage timing in the stage histogram and the current request's trace"""
+    stage_seconds.observe(seconds, stage=stage)
+    trace = _current_trace.get()
+    if trace is not None:
+        trace.add(stage, seconds)
+
+@contextmanager
+def span(stage: str):
+    """Time the enclosed block as a pipeline stage"""
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        record_span(stage, time.perf_counter() - started)
+
+def record_fallback(agent: str, reason: str):
+    """Count an agent falling back to a plainer path instead of failing silently"""
+    agent_fallbacks_total.inc(agent=agent, reason=reason)
+
+def timed_tool(name: str):
+    """Decorator recording the latency and failures of a local tool"""
+    def decorator(func):
+        def finish(started):
+            elapsed = time.perf_counter() - started
+            tool_seconds.observe(elapsed, tool=name)
+            trace = _current_trace.get()
+            if trace is not None:
+                trace.add(f"tool_{name}", elapsed)
+
+        if inspect.iscoroutinefunction(func):
+            @functools.wraps(func)
+            async def async_wrapper(*args, **kwargs):
+                started = time.perf_counter()
+                try:
+                    return await func(*args, **kwargs)
+                except Exception:
+                    tool_errors_total.inc(tool=name)
+                    raise
+                finally:
+                    finish(started)
+            return async_wrapper
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            started = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            except Exception:
+                tool_errors_total.inc(tool=name)
+                raise
+            finally:
+                finish(started)
+        return wrapper
+    return decorator
+
+def _path_label(scope: dict, status: int) -> str:
+    """Keep the path label low-cardinality: static files and unknown paths are grouped"""
+    path = scope.get("path", "")
+    if path.startswith("/static/"):
+        return "/static"
+    if status == 404:
+        return "unmatched"
+    return path
+
+class TraceMiddleware:
+    """
+    ASGI middleware giving each HTTP request a trace ID.
+
+    Uses the caller's X-Trace-Id when it is a plain token, otherwise generates
+    one, and returns it in the X-Trace-Id response header together with a
+    Server-Timing header listing the stages timed before the response started.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        incoming = dict(scope.get("headers") or []).get(TRACE_HEADER.encode(), b"").decode("latin-1")
+        trace = Trace(incoming if _VALID_TRACE_ID.match(incoming) else uuid.uuid4().hex)
+        token = _current_trace.set(trace)
+        started = time.perf_counter()
+        status = 500
+
+        async def send_with_trace(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                headers = list(message.get("headers") or [])
+                headers.append((TRACE_HEADER.encode(), trace.trace_id.encode()))
+                timing = trace.server_timing()
+                if timing:
+                    headers.append((b"server-timing", timing.encode()))
+                message = {**message, "headers": headers}
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_trace)
+        finally:
+            _current_trace.reset(token)
+            request_seconds.observe(
+                time.perf_counter() - started,
+                method=scope.get("method", ""),
+                path=_path_label(scope, status),
+                status=str(status),
+            )
@@ -1,8 +1,22 @@
+from tools.expression_engine import ExpressionError, evaluate, solve, format_number
+from telemetry.tracing import timed_tool
+
+@timed_tool("calculator")
 def solve_equation(equation: str) -> str:
+    """
+    Evaluate an expression ("2^10 + 3(4)") or solve equations ("2x+3=7",
+    "x^2-5x+6=0", "x+y=3, x-y=1") without eval().
+    """
     try:
-        # Only attempt if it’s a pure numeric expression like 2+5*3
-        cleaned = equation.replace(" ", "")
-        result = eval(cleaned, {"__builtins__": {}})
-        return f"The result is {result}"
-    except Exception as e:
+        if "=" not in equation:
+            return f"The result is {format_number(evaluate(equation))}"
+
+        solutions = solve(equation)
+        assignments = [
+            " or ".join(f"{name} = {format_number(value)}" for value in values)
+            for name, values in solutions.items()
+        ]
+        plural = any(len(values) > 1 for values in solutions.values())
+        return f"The solution{'s are' if plural else ' is'} {', '.join(assignments)}"
+    except ExpressionError:
         return f"Sorry, I couldn't calculate that directly. But I can still solve it symbolically!"
@@ -0,0 +1,195 @@
+import re
+from functools import lru_cache
+from math import gcd
+from telemetry.tracing import timed_tool
+
+ELEMENTS = frozenset("""
+H He Li Be B C N O F Ne Na Mg Al Si P S Cl Ar K Ca Sc Ti V Cr Mn Fe Co Ni Cu Zn
+Ga Ge As Se Br Kr Rb Sr Y Zr Nb Mo Tc Ru Rh Pd Ag Cd In Sn Sb Te I Xe Cs Ba La Ce
+Pr Nd Pm Sm Eu Gd Tb Dy Ho Er Tm Yb Lu Hf Ta W Re Os Ir Pt Au Hg Tl Pb Bi Po At Rn
+Fr Ra Ac Th Pa U Np Pu Am Cm Bk Cf Es Fm Md No Lr Rf Db Sg Bh Hs Mt Ds Rg Cn Nh Fl
+Mc Lv Ts Og
+""".split())
+
+ARROW_PATTERN = re.compile(r"\s*(?:->|→|⟶|=>|=)\s*")
+SPECIES_SEPARATOR = re.compile(r"\s+\+\s+|\s*\+\s*(?=\d*[A-Z(\[])")
+LEADING_COEFFICIENT = re.compile(r"^(\d+)\s*(?=[A-Z(\[])")
+HYDRATE_SEPARATOR = re.compile(r"\s*[·•*.]\s*")
+FORMULA_TOKEN = re.compile(r"[A-Z][a-z]?|\d+|[()\[\]]")
+
+class FormulaError(ValueError):
+    pass
+
+def _parse_group(tokens: list, position: int, closing: str = None) -> tuple:
+    """Parse tokens up to the matching bracket, returning (element counts, next position)"""
+    counts = {}
+    while position < len(tokens):
+        token = tokens[position]
+        if token in ")]":
+            if closing is None or token != closing:
+                raise FormulaError(f"Unexpected '{token}'")
+            return counts, position + 1
+        if token in "([":
+            inner, position = _parse_group(tokens, position + 1, ")" if token == "(" else "]")
+        elif token[0].isupper():
+            if token not in ELEMENTS:
+                raise FormulaError(f"Unknown element '{token}'")
+            inner, position = {token: 1}, position + 1
+        else:
+            raise FormulaError(f"Unexpected number '{token}'")
+
+        multiplier = 1
+        if position < len(tokens) and tokens[position].isdigit():
+            multiplier = int(tokens[position])
+            position += 1
+        for element, count in inner.items():
+            counts[element] = counts.get(element, 0) + count * multiplier
+
+    if closing is not None:
+        raise FormulaError(f"Missing '{closing}'")
+    return counts, position
+
+@lru_cache(maxsize=4096)
+def _parse_formula_cached(formula: str) -> tuple:
+    counts = {}
+    # Hydrates: CuSO4·5H2O (also written with '.' or '*')
+    for part in HYDRATE_SEPARATOR.split(formula.strip()):
+        multiplier_match = re.match(r"^(\d+)(?=[A-Z(\[])", part)
+        multiplier = int(multiplier_match.group(1)) if multiplier_match else 1
+        body = part[multiplier_match.end():] if multiplier_match else part
+        tokens = FORMULA_TOKEN.findall(body)
+        if not tokens or "".join(tokens) != body:
+            raise FormulaError(f"Cannot parse formula '{formula}'")
+        part_counts, _ = _parse_group(tokens, 0)
+        for element, count in part_counts.items():
+            counts[element] = counts.get(element, 0) + count * multiplier
+    return tuple(sorted(counts.items()))
+
+def parse_formula(formula: str) -> dict:
+    """Count the atoms of each element in a formula, e.g. Ca(OH)2 -> {"Ca": 1, "O": 2, "H": 2}"""
+    return dict(_parse_formula_cached(formula))
+
+def parse_equation(equation: str) -> tuple:
+    """Split an equation into (reactant formulas, product formulas), dropping any given coefficients"""
+    sides = ARROW_PATTERN.split(equation.strip().rstrip("."))
+    if len(sides) != 2:
+        raise FormulaError("An equation needs exactly one arrow")
+
+    def species(side):
+        formulas = [LEADING_COEFFICIENT.sub("", s.strip()) for s in SPECIES_SEPARATOR.split(side) if s.strip()]
+        if not formulas:
+            raise FormulaError("Each side of the equation needs at least one species")
+        return formulas
+
+    return species(sides[0]), species(sides[1])
+
+def _nullspace_vector(matrix: list, columns: int) -> list:
+    """
+    Return the smallest positive-integer vector x with matrix · x = 0.
+
+    Uses fraction-free Gauss-Jordan elimination on integer rows, so no
+    rational arithmetic is needed. Returns None unless the nullspace is
+    exactly one-dimensional (i.e. the balance is unique up to scaling).
+    """
+    rows = [row[:] for row in matrix if any(row)]
+    pivots = []
+    rank = 0
+    for column in range(columns):
+        pivot_row = next((r for r in range(rank, len(rows)) if rows[r][column]), None)
+        if pivot_row is None:
+            continue
+        rows[rank], rows[pivot_row] = rows[pivot_row], rows[rank]
+        pivot = rows[rank]
+        for r in range(len(rows)):
+            if r != rank and rows[r][column]:
+                factor, pivot_value = rows[r][column], pivot[column]
+                reduced = [pivot_value * a - factor * b for a, b in zip(rows[r], pivot)]
+                divisor = 0
+                for value in reduced:
+                    divisor = gcd(divisor, value)
+                rows[r] = [value // divisor for value in reduced] if divisor > 1 else reduced
+        pivots.append(column)
+        rank += 1
+        if rank == len(rows):
+            break
+
+    free_columns = [c for c in range(columns) if c not in pivots]
+    if len(free_columns) != 1:
+        return None
+    free = free_columns[0]
+
+    # Every pivot variable is -row[free] / row[pivot] times the free variable
+    scale = 1
+    for r, column in enumerate(pivots):
+        pivot_value = abs(rows[r][column])
+        scale = scale * pivot_value // gcd(scale, pivot_value)
+    solution = [0] * columns
+    solution[free] = scale
+    for r, column in enumerate(pivots):
+        solution[column] = -rows[r][free] * scale // rows[r][column]
+
+    divisor = 0
+    for value in solution:
+        divisor = gcd(divisor, value)
+    solution = [value // divisor for value in solution]
+    if all(value < 0 for value in solution):
+        solution = [-value for value in solution]
+    if any(value <= 0 for value in solution):
+        return None
+    return solution
+
+@timed_tool("chemical_balancer")
+def balance_equation(equation: str) -> tuple:
+    """
+    Balance a chemical equation.
+
+    Returns (reactants, products) as lists of (coefficient, formula) pairs,
+    or raises FormulaError if the equation cannot be parsed or has no unique
+    balance.
+    """
+    reactants, products = parse_equation(equation)
+    formulas = reactants + products
+    compositions = [parse_formula(formula) for formula in formulas]
+
+    reactant_elements = set().union(*compositions[:len(reactants)])
+    product_elements = set().union(*compositions[len(reactants):])
+    if reactant_elements != product_elements:
+        missing = sorted(reactant_elements ^ product_elements)
+        raise FormulaError(f"Elements appear on only one side: {', '.join(missing)}")
+
+    elements = sorted(reactant_elements)
+    matrix = [
+        [composition.get(element, 0) * (1 if i < len(reactants) else -1) for i, composition in enumerate(compositions)]
+        for element in elements
+    ]
+    coefficients = _nullspace_vector(matrix, len(formulas))
+    if coefficients is None:
+        raise FormulaError("The equation has no unique balance")
+
+    pairs = list(zip(coefficients, formulas))
+    return pairs[:len(reactants)], pairs[len(reactants):]
+
+def format_equation(reactants: list, products: list) -> str:
+    def side(pairs):
+        return " + ".join(f"{coefficient if coefficient != 1 else ''}{formula}" for coefficient, formula in pairs)
+    return f"{side(reactants)} -> {side(products)}"
+
+def is_balanced(equation: str) -> bool:
+    """Check that an equation (with its coefficients) conserves every element"""
+    sides = ARROW_PATTERN.split(equation.strip().rstrip("."))
+    if len(sides) != 2:
+        return False
+    totals = []
+    try:
+        for side in sides:
+            counts = {}
+            for term in SPECIES_SEPARATOR.split(side):
+                term = term.strip()
+                match = LEADING_COEFFICIENT.match(term)
+                coefficient = int(match.group(1)) if match else 1
+                for element, count in parse_formula(term[match.end():] if match else term).items():
+                    counts[element] = counts.get(element, 0) + coefficient * count
+            totals.append(counts)
+    except FormulaError:
+        return False
+    return totals[0] == totals[1]
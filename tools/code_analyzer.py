@@ -0,0 +1,525 @@
+import ast
+import re
+import textwrap
+from telemetry.tracing import timed_tool
+
+# Languages analyze_code_locally handles; snippets in any other language go to the LLM
+PYTHON = "python"
+BRACE_LANGUAGES = ("javascript", "typescript", "java", "c", "cpp", "csharp", "go", "rust", "php")
+
+# Weighted hints per language; the language with the highest total wins
+LANGUAGE_HINTS = {
+    "python": [
+        (r"^\s*def \w+\s*\(.*\)\s*(?:->\s*[\w\[\], .]+)?:?\s*(?:#.*)?$", 3),
+        (r"^\s*class \w+(?:\(.*\))?:\s*$", 3),
+        (r"^\s*(?:el)?if .+:\s*(?:#.*)?$|^\s*else:\s*$|^\s*elif\b", 2),
+        (r"^\s*for \w+(?:\s*,\s*\w+)* in .+:\s*$|^\s*while .+:\s*$", 2),
+        (r"^\s*(?:import [\w.]+|from [\w.]+ import)", 2),
+        (r"\bself\.|\bNone\b|\bTrue\b|\bFalse\b|\blambda\b|\bprint\(", 1),
+        (r"^\s*(?:try|except(?: .*)?|finally):\s*$", 2),
+    ],
+    "javascript": [
+        (r"\bfunction\b\s*\w*\s*\(", 2),
+        (r"\b(?:const|let|var)\s+\w+\s*=", 2),
+        (r"=>|===|!==", 2),
+        (r"\bconsole\.log\(|\bdocument\.|\brequire\(|\bmodule\.exports\b", 3),
+    ],
+    "typescript": [
+        (r"\b(?:const|let|var|function)\b.*:\s*(?:number|string|boolean|any|void)\b", 3),
+        (r"\binterface\s+\w+\s*\{|\btype\s+\w+\s*=", 2),
+    ],
+    "java": [
+        (r"\bpublic\s+(?:static\s+)?(?:final\s+)?(?:void|int|long|double|boolean|String|class)\b", 3),
+        (r"\bSystem\.out\.print", 3),
+        (r"\bString\[\]|\bArrayList<|\bnew\s+\w+(?:<.*>)?\(", 1),
+    ],
+    "c": [
+        (r"#include\s*<\w+\.h>", 3),
+        (r"\bprintf\s*\(|\bscanf\s*\(|\bmalloc\s*\(|\bfree\s*\(", 2),
+        (r"\bint\s+main\s*\(", 1),
+    ],
+    "cpp": [
+        (r"#include\s*<(?:iostream|vector|string|algorithm|map|set)>", 3),
+        (r"\bstd::|\bcout\s*<<|\bcin\s*>>", 3),
+        (r"\busing\s+namespace\s+std\b", 3),
+    ],
+    "csharp": [
+        (r"\bConsole\.Write(?:Line)?\(", 3),
+        (r"^\s*using\s+System\b|\bnamespace\s+\w+", 2),
+    ],
+    "go": [
+        (r"^\s*package\s+\w+", 3),
+        (r"\bfunc\s+(?:\(\w+ \*?\w+\)\s*)?\w*\(", 3),
+        (r":=|\bfmt\.Print", 2),
+    ],
+    "rust": [
+        (r"\bfn\s+\w+\s*\(", 3),
+        (r"\blet\s+mut\b|\bprintln!\(|\bimpl\b|\bVec<", 3),
+    ],
+    "php": [
+        (r"<\?php", 4),
+        (r"\$\w+\s*=|\becho\b", 2),
+    ],
+    "ruby": [
+        (r"^\s*def \w+[^:]*$", 1),
+        (r"^\s*end\s*$", 3),
+        (r"\bputs\b|\.each\s+do\b|\bdo\s*\|\w+\|", 3),
+    ],
+    "sql": [
+        (r"^\s*SELECT\b[\s\S]*\bFROM\b", 4),
+        (r"^\s*(?:INSERT\s+INTO|UPDATE\s+\w+\s+SET|CREATE\s+TABLE)\b", 4),
+    ],
+}
+_LANGUAGE_PATTERNS = {
+    language: [(re.compile(pattern, re.MULTILINE | (re.IGNORECASE if language == "sql" else 0)), weight) for pattern, weight in hints]
+    for language, hints in LANGUAGE_HINTS.items()
+}
+# Below this score a snippet's language is "unknown"
+MIN_LANGUAGE_SCORE = 2
+
+# Builtins whose call walks their whole argument, and list methods that scan the list
+_LINEAR_BUILTINS = {"sum", "min", "max", "any", "all", "sorted", "reversed", "list", "tuple", "set", "dict", "enumerate", "zip"}
+_LINEAR_METHODS = {"index", "count", "remove", "insert", "copy", "extend"}
+_SORTS = {"sorted", "sort"}
+_MEMOIZERS = {"cache", "lru_cache", "memoize", "cached"}
+_SHADOWABLE = {"list", "dict", "set", "str", "int", "float", "id", "input", "sum", "max", "min", "type", "len", "map", "filter", "range", "object", "file", "next", "iter"}
+# Findings beyond this many per list add noise rather than help
+MAX_FINDINGS = 8
+
+def detect_language(code: str) -> str:
+    """Guess a snippet's programming language from weighted syntax hints, or return "unknown" """
+    scores = {
+        language: sum(weight * len(pattern.findall(code)[:3]) for pattern, weight in patterns)
+        for language, patterns in _LANGUAGE_PATTERNS.items()
+    }
+    # TypeScript is JavaScript with types, and C++ usually looks like C as well
+    if scores["typescript"]:
+        scores["typescript"] += scores["javascript"]
+    if scores["cpp"]:
+        scores["cpp"] += scores["c"]
+    language, score = max(scores.items(), key=lambda item: item[1])
+    return language if score >= MIN_LANGUAGE_SCORE else "unknown"
+
+def _format_complexity(power: int, logs: int) -> str:
+    terms = []
+    if power == 1:
+        terms.append("n")
+    elif power > 1:
+        terms.append(f"n^{power}")
+    if logs == 1:
+        terms.append("log n")
+    elif logs > 1:
+        terms.append(f"log^{logs} n")
+    return f"O({' '.join(terms) or '1'})"
+
+def _halves(node: ast.AST) -> bool:
+    """True when the code divides something by two (binary search, divide and conquer)"""
+    for child in ast.walk(node):
+        if isinstance(child, (ast.BinOp, ast.AugAssign)):
+            operand = child.right if isinstance(child, ast.BinOp) else child.value
+            if isinstance(operand, ast.Constant) and (
+                (isinstance(child.op, (ast.FloorDiv, ast.Div)) and operand.value == 2)
+                or (isinstance(child.op, ast.RShift) and operand.value == 1)
+            ):
+                return True
+        if isinstance(child, ast.Name) and child.id in ("mid", "middle", "half"):
+            return True
+    return False
+
+def _calls_per_path(statements: list, calls: list) -> int:
+    """Most of the given calls one run through the statements can make; if/else branches are alternatives"""
+    total = 0
+    for statement in statements:
+        if isinstance(statement, ast.If):
+            in_test = sum(1 for child in ast.walk(statement.test) if child in calls)
+            total += in_test + max(_calls_per_path(statement.body, calls), _calls_per_path(statement.orelse, calls))
+        elif isinstance(statement, (ast.FunctionDef, ast.AsyncFunctionDef, ast.ClassDef)):
+            continue
+        else:
+            total += sum(1 for child in ast.walk(statement) if child in calls)
+    return total
+
+def _call_name(call: ast.Call) -> str:
+    if isinstance(call.func, ast.Name):
+        return call.func.id
+    if isinstance(call.func, ast.Attribute):
+        return call.func.attr
+    return ""
+
+class _PythonReview(ast.NodeVisitor):
+    """Walks a parsed snippet collecting likely bugs, style improvements and the costliest loop nest"""
+
+    def __init__(self):
+        self.errors = []
+        self.improvements = []
+        # Costliest (power of n, power of log n) reached, and why
+        self.cost = (0, 0)
+        self.cost_reason = "no loops or recursion"
+        self.exponential = None
+        self._levels = []
+        self._lists = set()
+        self._function = None
+
+    def _add(self, findings: list, node: ast.AST, message: str):
+        entry = f"Line {node.lineno}: {message}" if hasattr(node, "lineno") else message
+        if entry not in findings:
+            findings.append(entry)
+
+    def _reach(self, node: ast.AST, extra: tuple = (0, 0), reason: str = None):
+        """Record the cost of running node's work at the current loop nesting"""
+        power = sum(1 for level in self._levels if level == "n") + extra[0]
+        logs = sum(1 for level in self._levels if level == "log") + extra[1]
+        if (power, logs) > self.cost:
+            self.cost = (power, logs)
+            loops = len(self._levels)
+            self.cost_reason = reason or (f"{loops} nested loops" if loops > 1 else "a loop" if loops else "a single pass")
+            if hasattr(node, "lineno"):
+                self.cost_reason += f" (line {node.lineno})"
+
+    def _loop(self, node: ast.AST, level: str, body: list):
+        self._levels.append(level)
+        self._reach(node, reason="a loop that halves its range" if level == "log" and len(self._levels) == 1 else None)
+        for statement in body:
+            self.visit(statement)
+        self._levels.pop()
+
+    # Loops
+
+    def visit_For(self, node):
+        self.visit(node.iter)
+        self._check_range_len(node)
+        self._loop(node, "n", node.body)
+        for statement in node.orelse:
+            self.visit(statement)
+
+    visit_AsyncFor = visit_For
+
+    def visit_While(self, node):
+        self.visit(node.test)
+        if isinstance(node.test, ast.Constant) and node.test.value is True:
+            exits = any(isinstance(child, (ast.Break, ast.Return, ast.Raise)) for statement in node.body for child in ast.walk(statement))
+            if not exits:
+                self._add(self.errors, node, "`while True` loop has no break, return or raise, so it never ends")
+        self._loop(node, "log" if _halves(node) else "n", node.body)
+        for statement in node.orelse:
+            self.visit(statement)
+
+    def _comprehension(self, node):
+        depth = len(node.generators)
+        self._levels.extend(["n"] * depth)
+        self._reach(node)
+        self.generic_visit(node)
+        del self._levels[-depth:]
+
+    visit_ListComp = visit_SetComp = visit_DictComp = visit_GeneratorExp = _comprehension
+
+    def _check_range_len(self, node):
+        """Flag `for i in range(len(x))` indexing, including the off-by-one `range(len(x) + 1)`"""
+        call = node.iter
+        if not (isinstance(call, ast.Call) and _call_name(call) == "range" and call.args and isinstance(node.target, ast.Name)):
+            return
+        bound = call.args[-1] if len(call.args) <= 2 else None
+        off_by_one = isinstance(bound, ast.BinOp) and isinstance(bound.op, ast.Add) and isinstance(bound.right, ast.Constant) and bound.right.value == 1
+        length = bound.left if off_by_one else bound
+        if not (isinstance(length, ast.Call) and _call_name(length) == "len" and length.args and isinstance(length.args[0], ast.Name)):
+            return
+        sequence, index = length.args[0].id, node.target.id
+        indexed = any(
+            isinstance(child, ast.Subscript) and isinstance(child.value, ast.Name) and child.value.id == sequence
+            and isinstance(child.slice, ast.Name) and child.slice.id == index
+            for statement in node.body for child in ast.walk(statement)
+        )
+        if off_by_one and indexed:
+            self._add(self.errors, node, f"`range(len({sequence}) + 1)` makes `{sequence}[{index}]` read past the end of the list (IndexError)")
+        elif indexed and len(call.args) == 1:
+            self._add(self.improvements, node, f"Iterate over `{sequence}` directly, or use `enumerate({sequence})` when the index is needed")
+
+    # Functions
+
+    def visit_FunctionDef(self, node):
+        for default in node.args.defaults + [d for d in node.args.kw_defaults if d is not None]:
+            if isinstance(default, (ast.List, ast.Dict, ast.Set)):
+                self._add(self.errors, default, f"Mutable default argument in `{node.name}` is shared between calls; default to None and create it inside")
+        for argument in node.args.args + node.args.kwonlyargs:
+            if argument.arg in _SHADOWABLE:
+                self._add(self.improvements, argument, f"Parameter `{argument.arg}` shadows the built-in of the same name")
+        if len(node.body) >= 5 and ast.get_docstring(node) is None and not node.name.startswith("_"):
+            self._add(self.improvements, node, f"Add a docstring to `{node.name}` describing its inputs and result")
+
+        recursive_calls = [
+            child for statement in node.body for child in ast.walk(statement)
+            if isinstance(child, ast.Call) and _call_name(child) == node.name
+        ]
+        if recursive_calls:
+            self._review_recursion(node, recursive_calls)
+        self._review_unused(node)
+
+        outer, self._function = self._function, node
+        levels, self._levels = self._levels, []
+        lists, self._lists = self._lists, set()
+        for statement in node.body:
+            self.visit(statement)
+        self._function, self._levels, self._lists = outer, levels, lists
+
+    visit_AsyncFunctionDef = visit_FunctionDef
+
+    def _review_recursion(self, node, calls: list):
+        memoized = any(_call_name(d) in _MEMOIZERS if isinstance(d, ast.Call) else getattr(d, "id", getattr(d, "attr", "")) in _MEMOIZERS for d in node.decorator_list)
+        conditional = any(isinstance(child, (ast.If, ast.IfExp)) for statement in node.body for child in ast.walk(statement))
+        if not conditional:
+            self._add(self.errors, node, f"`{node.name}` calls itself with no base case, so it recurses until RecursionError")
+        per_call = _calls_per_path(node.body, calls)
+        halves = _halves(node)
+        if per_call > 1 and not halves and not memoized:
+            self.exponential = f"O(2^n) time: `{node.name}` calls itself {per_call} times per call (line {node.lineno})"
+            self._add(self.improvements, node, f"Memoize `{node.name}` (functools.lru_cache) or build the result bottom-up to avoid recomputing the same calls")
+        elif halves:
+            self._reach(node, (0, 1) if per_call <= 1 else (1, 1), f"`{node.name}` halves its input on each recursive call")
+        else:
+            self._reach(node, (1, 0), f"`{node.name}` recurses once per element")
+
+    def _review_unused(self, node):
+        """Flag locals that are assigned but never read"""
+        assigned, loaded, loop_targets = {}, set(), set()
+        for statement in node.body:
+            for child in ast.walk(statement):
+                if isinstance(child, (ast.For, ast.AsyncFor, ast.comprehension)):
+                    loop_targets.update(target.id for target in ast.walk(child.target) if isinstance(target, ast.Name))
+                if isinstance(child, ast.Name):
+                    if isinstance(child.ctx, ast.Store):
+                        assigned.setdefault(child.id, child)
+                    else:
+                        loaded.add(child.id)
+                elif isinstance(child, (ast.Global, ast.Nonlocal)):
+                    loaded.update(child.names)
+        for name, target in assigned.items():
+            if name not in loaded and name not in loop_targets and not name.startswith("_"):
+                self._add(self.improvements, target, f"`{name}` is assigned but never used")
+
+    # Statements and expressions
+
+    def visit_Assign(self, node):
+        if isinstance(node.value, (ast.List, ast.ListComp)):
+            self._lists.update(target.id for target in node.targets if isinstance(target, ast.Name))
+        for target in node.targets:
+            if isinstance(target, ast.Name) and target.id in _SHADOWABLE:
+                self._add(self.improvements, target, f"`{target.id}` shadows the built-in of the same name")
+        self.generic_visit(node)
+
+    def visit_AugAssign(self, node):
+        if self._levels and isinstance(node.op, ast.Add) and isinstance(node.value, (ast.JoinedStr, ast.Constant)) and isinstance(getattr(node.value, "value", ""), str):
+            self._add(self.improvements, node, "Building a string with += in a loop copies it each time; collect the parts in a list and ''.join() them")
+        self.generic_visit(node)
+
+    def visit_Call(self, node):
+        name = _call_name(node)
+        if name in _SORTS:
+            self._reach(node, (1, 1), "sorting" + (" inside a loop" if self._levels else ""))
+        elif (isinstance(node.func, ast.Name) and name in _LINEAR_BUILTINS and node.args) or (isinstance(node.func, ast.Attribute) and name in _LINEAR_METHODS):
+            if self._levels:
+                self._reach(node, (1, 0), f"`{name}()` scans a sequence inside a loop")
+        self.generic_visit(node)
+
+    def visit_Compare(self, node):
+        for operator, right in zip(node.ops, node.comparators):
+            if isinstance(operator, (ast.Is, ast.IsNot)) and isinstance(right, ast.Constant) and right.value is not None and not isinstance(right.value, bool):
+                self._add(self.errors, node, f"`is` compares identity, not value; use `{'==' if isinstance(operator, ast.Is) else '!='}` to compare with {right.value!r}")
+            elif isinstance(operator, (ast.Eq, ast.NotEq)) and isinstance(right, ast.Constant) and right.value is None:
+                self._add(self.improvements, node, "Compare with None using `is` / `is not`")
+            elif isinstance(operator, (ast.Eq, ast.NotEq)) and isinstance(right, ast.Constant) and isinstance(right.value, bool):
+                self._add(self.improvements, node, f"Use the condition itself instead of comparing it with {right.value}")
+            elif isinstance(operator, (ast.In, ast.NotIn)) and isinstance(right, ast.Name) and right.id in self._lists and self._levels:
+                self._add(self.improvements, node, f"`in {right.id}` scans the list on every iteration; make `{right.id}` a set for O(1) lookups")
+                self._reach(node, (1, 0), f"`in {right.id}` scans a list inside a loop")
+        self.generic_visit(node)
+
+    def visit_BinOp(self, node):
+        if isinstance(node.op, (ast.Div, ast.FloorDiv, ast.Mod)) and isinstance(node.right, ast.Constant) and node.right.value == 0:
+            self._add(self.errors, node, "Division by zero (ZeroDivisionError)")
+        self.generic_visit(node)
+
+    def visit_ExceptHandler(self, node):
+        if node.type is None:
+            self._add(self.improvements, node, "Bare `except:` also catches KeyboardInterrupt and SystemExit; catch specific exceptions")
+        if len(node.body) == 1 and isinstance(node.body[0], ast.Pass):
+            self._add(self.improvements, node, "The exception is silently ignored; handle or log it")
+        self.generic_visit(node)
+
+    def visit_Global(self, node):
+        self._add(self.improvements, node, f"Avoid `global {', '.join(node.names)}`; pass values in and return results instead")
+
+    def visit(self, node):
+        # Statements after return/raise/break/continue in the same block never run
+        for field in ("body", "orelse", "finalbody"):
+            block = getattr(node, field, None)
+            if isinstance(block, list):
+                for statement, following in zip(block, block[1:]):
+                    if isinstance(statement, (ast.Return, ast.Raise, ast.Break, ast.Continue)):
+                        self._add(self.improvements, following, f"Unreachable code after `{type(statement).__name__.lower()}`")
+                        break
+        return super().visit(node)
+
+def _review_imports(tree: ast.Module, improvements: list):
+    imported = {}
+    for node in ast.walk(tree):
+        if isinstance(node, (ast.Import, ast.ImportFrom)):
+            for alias in node.names:
+                name = (alias.asname or alias.name).split(".")[0]
+                if name != "*":
+                    imported.setdefault(name, node)
+    used = {node.id for node in ast.walk(tree) if isinstance(node, ast.Name)}
+    used |= {node.value.id for node in ast.walk(tree) if isinstance(node, ast.Attribute) and isinstance(node.value, ast.Name)}
+    for name, node in imported.items():
+        if name not in used:
+            improvements.append(f"Line {node.lineno}: `{name}` is imported but never used")
+
+# Nesting too deep for the parser or the review's recursion (e.g. "1+" * 5000), or null bytes;
+# such snippets go to the LLM rather than failing the question
+_UNPARSEABLE = (RecursionError, MemoryError, ValueError)
+
+def _analyze_python(code: str):
+    try:
+        tree = ast.parse(code)
+    except SyntaxError as error:
+        line = (error.text or "").strip()
+        location = f"Line {error.lineno}, column {error.offset}" if error.offset else f"Line {error.lineno}"
+        return {
+            "language": PYTHON,
+            "errors": [f"{location}: SyntaxError: {error.msg}" + (f" in `{line}`" if line else "")],
+            "improvements": [],
+            "complexity": "Not assessed: the code does not parse",
+        }
+    except _UNPARSEABLE:
+        return None
+
+    review = _PythonReview()
+    try:
+        review.visit(tree)
+        _review_imports(tree, review.improvements)
+    except _UNPARSEABLE:
+        return None
+    complexity = review.exponential or f"{_format_complexity(*review.cost)} time: {review.cost_reason}"
+    return {
+        "language": PYTHON,
+        "errors": review.errors[:MAX_FINDINGS],
+        "improvements": review.improvements[:MAX_FINDINGS],
+        "complexity": complexity,
+    }
+
+# Comments and string literals are blanked out before brace languages are scanned
+_BRACE_NOISE = re.compile(r'//[^\n]*|/\*[\s\S]*?\*/|"(?:\\.|[^"\\\n])*"|\'(?:\\.|[^\'\\\n])*\'|`(?:\\.|[^`\\])*`')
+_BRACE_TOKEN = re.compile(r"\b(?:for|foreach|while|loop|do)\b|[{}()\[\];]|\bsort\b")
+
+# (pattern, finding, is an error) per language family; matched against code with comments and strings blanked
+_BRACE_LINTS = {
+    "*": [
+        (r"\b(?:if|while)\s*\((?:[^()=!<>]|\([^()]*\))*[^=!<>]=[^=](?:[^()]|\([^()]*\))*\)", "Assignment `=` inside a condition; did you mean `==`?", True),
+        (r"<=\s*[\w.]+\.(?:length|size\(\)|Length|Count)\b", "Loop bound `<= length` reads one element past the end; use `<`", True),
+        (r"\b(?:if|for)\s*\((?:[^()]|\([^()]*\))*\)\s*;", "Stray `;` after the condition makes the loop or if body empty", True),
+    ],
+    "javascript": [
+        (r"[^=!]==[^=]|!=[^=]", "Use `===` / `!==`; `==` converts types before comparing", False),
+        (r"\bvar\s+\w+", "Use `let` or `const` instead of `var`", False),
+    ],
+    "java": [
+        (r"(?:==|!=)\s*\"|\"\s*(?:==|!=)", "Strings compared with `==` compare references; use `.equals()`", True),
+    ],
+    "c": [
+        (r"\bgets\s*\(", "`gets` cannot limit its input and overflows the buffer; use `fgets`", True),
+        (r"\bmalloc\s*\((?![\s\S]*\bfree\s*\()", "Memory from `malloc` is never freed", False),
+    ],
+}
+_BRACE_FAMILY = {"typescript": "javascript", "cpp": "c", "php": "javascript"}
+
+def _blank(match) -> str:
+    """Blank out a comment or string literal, keeping its newlines (so line numbers still match) and a string's quotes"""
+    text = match.group(0)
+    blanked = "".join("\n" if char == "\n" else " " for char in text)
+    return text[0] + blanked[1:-1] + text[-1] if text[0] in "\"'`" else blanked
+
+def _analyze_braces(code: str, language: str) -> dict:
+    cleaned = _BRACE_NOISE.sub(_blank, code)
+    line_of = lambda position: cleaned.count("\n", 0, position) + 1
+    errors, improvements = [], []
+
+    # Bracket balance and loop nesting in one pass
+    closing = {"}": "{", ")": "(", "]": "["}
+    stack, pending_loops, parens, deepest, sort_depth = [], 0, 0, 0, -1
+    loop_depth = lambda: sum(weight for _, _, weight in stack)
+    for match in _BRACE_TOKEN.finditer(cleaned):
+        token, position = match.group(0), match.start()
+        if token in ("for", "foreach", "while", "loop", "do"):
+            # "while" closing a do-while adds no level
+            if token == "while" and cleaned[:position].rstrip().endswith("}") and re.match(r"while\s*\([^)]*\)\s*;", cleaned[position:]):
+                continue
+            pending_loops += 1
+            deepest = max(deepest, loop_depth() + pending_loops)
+        elif token == "sort":
+            sort_depth = max(sort_depth, loop_depth() + pending_loops)
+        elif token in "{([":
+            if token == "(":
+                parens += 1
+            weight = pending_loops if token == "{" else 0
+            if token == "{":
+                pending_loops = 0
+            stack.append((token, position, weight))
+        elif token in "})]":
+            if token == ")":
+                parens = max(0, parens - 1)
+            if not stack or stack[-1][0] != closing[token]:
+                errors.append(f"Line {line_of(position)}: unmatched `{token}`")
+                break
+            stack.pop()
+        elif token == ";" and parens == 0:
+            pending_loops = 0
+    for token, position, _ in stack[-3:]:
+        errors.append(f"Line {line_of(position)}: `{token}` is never closed")
+
+    family = _BRACE_FAMILY.get(language, language)
+    for pattern, finding, is_error in _BRACE_LINTS["*"] + _BRACE_LINTS.get(family, []):
+        match = re.search(pattern, cleaned, re.MULTILINE)
+        if match:
+            (errors if is_error else improvements).append(f"Line {line_of(match.start())}: {finding}")
+
+    power, logs = deepest, 0
+    if sort_depth >= 0 and (sort_depth + 1, 1) > (power, 0):
+        power, logs = sort_depth + 1, 1
+    reason = f"{deepest} nested loops" if deepest > 1 else "a loop" if deepest else "no loops"
+    if logs:
+        reason = "sorting" + (" inside a loop" if sort_depth else "")
+    return {
+        "language": language,
+        "errors": errors[:MAX_FINDINGS],
+        "improvements": improvements[:MAX_FINDINGS],
+        "complexity": f"{_format_complexity(power, logs)} time: {reason} (estimated from loop nesting)",
+    }
+
+@timed_tool("code_analyzer")
+def analyze_code_locally(code: str):
+    """
+    Review a code snippet without the LLM.
+
+    Returns {"language", "errors", "improvements", "complexity"}, or None when
+    the language is unknown or not supported, or the code is too deeply nested
+    to parse, so the caller can ask the LLM.
+    Python is parsed with ast (syntax errors with their location, common bug
+    patterns and lint findings, complexity from loop nesting, sorting and
+    recursion). C-family languages are checked for unbalanced brackets and a
+    few well-known mistakes, with complexity estimated from loop nesting.
+    """
+    code = textwrap.dedent(code).strip("\n")
+    if not code.strip():
+        return None
+    language = detect_language(code)
+    if language == "unknown":
+        # Too short to show any hints; it is still Python if it parses as Python
+        try:
+            ast.parse(code)
+            language = PYTHON
+        except (SyntaxError, *_UNPARSEABLE):
+            return None
+    if language == PYTHON:
+        return _analyze_python(code)
+    if language in BRACE_LANGUAGES:
+        return _analyze_braces(code, language)
+    return None
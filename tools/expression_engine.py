@@ -0,0 +1,554 @@
+import ast
+import math
+import re
+import time
+from fractions import Fraction
+from functools import lru_cache
+
+# Limits that keep hostile input from pinning a worker
+MAX_EXPRESSION_LENGTH = 500
+MAX_NODES = 300
+MAX_EVALUATION_SECONDS = 0.05
+MAX_EXPONENT = 1024
+# Below Python's 4300-digit limit on int-to-str conversion, so every result can be shown
+MAX_RESULT_BITS = 14000
+MAX_FACTORIAL = 500
+# Expanded unknowns: the solvers need degree 2 at most, so larger polynomials are only ever hostile
+MAX_POLYNOMIAL_DEGREE = 16
+MAX_POLYNOMIAL_TERMS = 1000
+
+class ExpressionError(ValueError):
+    pass
+
+def _exact_sqrt(value):
+    """Square root that stays exact for perfect-square rationals"""
+    if isinstance(value, Fraction) and value >= 0:
+        numerator, denominator = math.isqrt(value.numerator), math.isqrt(value.denominator)
+        if numerator * numerator == value.numerator and denominator * denominator == value.denominator:
+            return Fraction(numerator, denominator)
+    if value < 0:
+        raise ExpressionError("Square root of a negative number")
+    return math.sqrt(value)
+
+def _factorial(value):
+    if value != int(value) or value < 0:
+        raise ExpressionError("factorial() needs a non-negative integer")
+    if value > MAX_FACTORIAL:
+        raise ExpressionError(f"factorial() is limited to {MAX_FACTORIAL}")
+    return Fraction(math.factorial(int(value)))
+
+def _log(value, base=None):
+    if value <= 0 or (base is not None and (base <= 0 or base == 1)):
+        raise ExpressionError("Logarithm of a non-positive number")
+    return math.log(value) if base is None else math.log(value, base)
+
+def _integer_result(func):
+    return lambda value: Fraction(func(value))
+
+FUNCTIONS = {
+    "sqrt": _exact_sqrt,
+    "abs": abs,
+    "sin": math.sin, "cos": math.cos, "tan": math.tan,
+    "asin": math.asin, "acos": math.acos, "atan": math.atan,
+    "sinh": math.sinh, "cosh": math.cosh, "tanh": math.tanh,
+    "exp": math.exp,
+    "ln": _log, "log": _log,
+    "log10": math.log10, "log2": math.log2,
+    "floor": _integer_result(math.floor), "ceil": _integer_result(math.ceil),
+    "round": _integer_result(round),
+    "factorial": _factorial,
+    "degrees": math.degrees, "radians": math.radians,
+}
+
+CONSTANTS = {"pi": math.pi, "π": math.pi, "e": math.e, "tau": math.tau}
+
+# Multi-letter variable names kept whole; any other unknown word is read as implicit multiplication (xy -> x*y)
+NAMED_VARIABLES = {"alpha", "beta", "gamma", "theta", "mu", "omega"}
+
+TOKEN_PATTERN = re.compile(r"\s*(?:(\d+\.?\d*(?:[eE][-+]?\d+)?|\.\d+(?:[eE][-+]?\d+)?)|([A-Za-z_π][A-Za-z_0-9]*)|(\*\*|//|[-+*/%^(),×÷·]))")
+SYMBOL_REPLACEMENTS = {"^": "**", "×": "*", "·": "*", "÷": "/"}
+
+def _tokenize(text: str) -> list:
+    tokens = []
+    position = 0
+    text = text.strip()
+    while position < len(text):
+        match = TOKEN_PATTERN.match(text, position)
+        if not match or match.end() == position:
+            raise ExpressionError(f"Unexpected character '{text[position]}'")
+        number, name, symbol = match.groups()
+        if number is not None:
+            tokens.append(("number", number))
+        elif name is not None:
+            if name in FUNCTIONS or name in CONSTANTS or name in NAMED_VARIABLES or len(name) == 1:
+                tokens.append(("name", name))
+            elif name.isalpha():
+                tokens.extend(("name", letter) for letter in name)
+            else:
+                tokens.append(("name", name))
+        else:
+            tokens.append(("symbol", SYMBOL_REPLACEMENTS.get(symbol, symbol)))
+        position = match.end()
+    return tokens
+
+def _insert_implicit_multiplication(tokens: list) -> str:
+    """Join tokens into Python syntax, turning 2x, 3(x+1), (a)(b) and x y into products"""
+    parts = []
+    previous = None
+    for kind, value in tokens:
+        if previous is not None:
+            previous_kind, previous_value = previous
+            left_operand = previous_kind == "number" or (previous_kind == "name" and previous_value not in FUNCTIONS) or previous_value == ")"
+            right_operand = kind in ("number", "name") or value == "("
+            if left_operand and right_operand:
+                parts.append("*")
+        parts.append(value)
+        previous = (kind, value)
+    return " ".join(parts)
+
+class _Context:
+    __slots__ = ("values", "deadline")
+
+    def __init__(self, values: dict, deadline: float):
+        self.values = values
+        self.deadline = deadline
+
+def _check_size(value):
+    """Reject results too large to keep exactly (or, for floats, to represent at all)"""
+    if isinstance(value, Fraction):
+        if max(value.numerator.bit_length(), value.denominator.bit_length()) > MAX_RESULT_BITS:
+            raise ExpressionError("Result would be too large")
+    elif isinstance(value, float):
+        if not math.isfinite(value):
+            raise ExpressionError("Result would be too large")
+    elif isinstance(value, Polynomial):
+        for coefficient in value.terms.values():
+            _check_size(coefficient)
+    return value
+
+def _check_deadline(context: _Context):
+    if time.perf_counter() > context.deadline:
+        raise ExpressionError("Expression took too long to evaluate")
+
+def _power(base, exponent):
+    if isinstance(exponent, Fraction) and exponent.denominator == 1:
+        exponent = int(exponent)
+    if isinstance(exponent, int):
+        if abs(exponent) > MAX_EXPONENT:
+            raise ExpressionError(f"Exponents are limited to ±{MAX_EXPONENT}")
+        if isinstance(base, Fraction):
+            bits = max(base.numerator.bit_length(), base.denominator.bit_length())
+            if bits * abs(exponent) > MAX_RESULT_BITS:
+                raise ExpressionError("Result would be too large")
+            if base == 0 and exponent < 0:
+                raise ExpressionError("Division by zero")
+        return base ** exponent
+    if isinstance(base, Polynomial) or isinstance(exponent, Polynomial):
+        raise ExpressionError("Only whole-number powers of unknowns are supported")
+    try:
+        return float(base) ** float(exponent)
+    except OverflowError:
+        raise ExpressionError("Result would be too large")
+
+def _divide(left, right):
+    if right == 0:
+        raise ExpressionError("Division by zero")
+    return left / right
+
+def _modulo(left, right):
+    if right == 0:
+        raise ExpressionError("Division by zero")
+    return left % right
+
+def _floor_divide(left, right):
+    if right == 0:
+        raise ExpressionError("Division by zero")
+    return left // right
+
+BINARY_OPERATORS = {
+    ast.Add: lambda a, b: a + b,
+    ast.Sub: lambda a, b: a - b,
+    ast.Mult: lambda a, b: a * b,
+    ast.Div: _divide,
+    ast.Pow: _power,
+    ast.Mod: _modulo,
+    ast.FloorDiv: _floor_divide,
+}
+
+UNARY_OPERATORS = {
+    ast.UAdd: lambda a: +a,
+    ast.USub: lambda a: -a,
+}
+
+def _compile_node(node, variables: set):
+    """Turn a whitelisted AST node into a closure taking a _Context"""
+    if isinstance(node, ast.Constant):
+        if isinstance(node.value, bool) or not isinstance(node.value, (int, float)):
+            raise ExpressionError("Only numbers are allowed")
+        if isinstance(node.value, float) and not math.isfinite(node.value):
+            raise ExpressionError("Number is too large")
+        value = _check_size(Fraction(node.value) if isinstance(node.value, int) else Fraction(repr(node.value)))
+        return lambda context: value
+
+    if isinstance(node, ast.Name):
+        name = node.id
+        if name in CONSTANTS:
+            value = CONSTANTS[name]
+            return lambda context: value
+        if name in FUNCTIONS:
+            raise ExpressionError(f"'{name}' is a function and needs parentheses")
+        variables.add(name)
+
+        def lookup(context):
+            if name not in context.values:
+                raise ExpressionError(f"Unknown variable '{name}'")
+            return context.values[name]
+        return lookup
+
+    if isinstance(node, ast.BinOp) and type(node.op) in BINARY_OPERATORS:
+        operator = BINARY_OPERATORS[type(node.op)]
+        polynomial_operator = POLYNOMIAL_OPERATORS.get(type(node.op))
+        left, right = _compile_node(node.left, variables), _compile_node(node.right, variables)
+
+        def binary(context):
+            _check_deadline(context)
+            a, b = left(context), right(context)
+            if polynomial_operator is not None and (isinstance(a, Polynomial) or isinstance(b, Polynomial)):
+                # Expanding products can take far longer than one node, so it checks the deadline itself
+                return _check_size(polynomial_operator(a, b, context))
+            return _check_size(operator(a, b))
+        return binary
+
+    if isinstance(node, ast.UnaryOp) and type(node.op) in UNARY_OPERATORS:
+        operator = UNARY_OPERATORS[type(node.op)]
+        operand = _compile_node(node.operand, variables)
+        return lambda context: operator(operand(context))
+
+    if isinstance(node, ast.Call) and isinstance(node.func, ast.Name) and node.func.id in FUNCTIONS and not node.keywords:
+        function = FUNCTIONS[node.func.id]
+        arguments = [_compile_node(argument, variables) for argument in node.args]
+
+        def call(context):
+            _check_deadline(context)
+            values = [argument(context) for argument in arguments]
+            if any(isinstance(value, Polynomial) and not value.is_constant() for value in values):
+                raise ExpressionError(f"Cannot solve equations with unknowns inside {node.func.id}()")
+            values = [value.constant() if isinstance(value, Polynomial) else value for value in values]
+            try:
+                return _check_size(function(*values))
+            except ExpressionError:
+                raise
+            except (TypeError, ValueError, OverflowError) as e:
+                raise ExpressionError(f"{node.func.id}(): {e}")
+        return call
+
+    raise ExpressionError(f"Unsupported syntax: {type(node).__name__}")
+
+@lru_cache(maxsize=1024)
+def compile_expression(expression: str) -> tuple:
+    """
+    Parse and validate an expression once, returning (evaluator, variable names).
+
+    Compiled expressions are cached, so re-evaluating a popular expression
+    skips tokenising and parsing entirely.
+    """
+    if len(expression) > MAX_EXPRESSION_LENGTH:
+        raise ExpressionError(f"Expressions are limited to {MAX_EXPRESSION_LENGTH} characters")
+    source = _insert_implicit_multiplication(_tokenize(expression))
+    if not source:
+        raise ExpressionError("Empty expression")
+    try:
+        tree = ast.parse(source, mode="eval")
+    except SyntaxError:
+        raise ExpressionError("Invalid expression")
+    if sum(1 for _ in ast.walk(tree)) > MAX_NODES:
+        raise ExpressionError("Expression is too complex")
+    variables = set()
+    evaluator = _compile_node(tree.body, variables)
+    return evaluator, frozenset(variables)
+
+def evaluate(expression: str, values: dict = None, timeout: float = MAX_EVALUATION_SECONDS):
+    """Evaluate a numeric expression; results are exact Fractions unless a float function was used"""
+    evaluator, variables = compile_expression(expression.strip())
+    missing = variables - set(values or {})
+    if missing:
+        raise ExpressionError(f"Unknown variable '{sorted(missing)[0]}'")
+    context = _Context({name: Fraction(value) if isinstance(value, int) else value for name, value in (values or {}).items()}, time.perf_counter() + timeout)
+    try:
+        return evaluator(context)
+    except ZeroDivisionError:
+        raise ExpressionError("Division by zero")
+    except ExpressionError:
+        raise
+    except (ValueError, OverflowError):
+        raise ExpressionError("Result would be too large")
+
+class Polynomial:
+    """
+    Sparse multivariate polynomial with exact Fraction coefficients (floats
+    once an inexact constant such as pi is involved).
+
+    Keys are monomials: sorted tuples of (variable, power). Evaluating an
+    equation's compiled sides with Polynomial variables yields lhs - rhs in
+    expanded form, which is all the linear and quadratic solvers need.
+    """
+
+    __slots__ = ("terms",)
+
+    def __init__(self, terms: dict = None):
+        self.terms = {monomial: coefficient for monomial, coefficient in (terms or {}).items() if coefficient != 0}
+
+    @classmethod
+    def variable(cls, name: str) -> "Polynomial":
+        return cls({((name, 1),): Fraction(1)})
+
+    @classmethod
+    def lift(cls, value) -> "Polynomial":
+        if isinstance(value, Polynomial):
+            return value
+        return cls({(): value})
+
+    def is_constant(self) -> bool:
+        return all(monomial == () for monomial in self.terms)
+
+    def constant(self):
+        return self.terms.get((), Fraction(0))
+
+    def degree(self) -> int:
+        return max((sum(power for _, power in monomial) for monomial in self.terms), default=0)
+
+    def variables(self) -> set:
+        return {name for monomial in self.terms for name, _ in monomial}
+
+    def coefficient(self, monomial: tuple):
+        return self.terms.get(monomial, Fraction(0))
+
+    def __add__(self, other):
+        other = Polynomial.lift(other)
+        terms = dict(self.terms)
+        for monomial, coefficient in other.terms.items():
+            terms[monomial] = terms.get(monomial, 0) + coefficient
+        return Polynomial(terms)
+
+    __radd__ = __add__
+
+    def __neg__(self):
+        return Polynomial({monomial: -coefficient for monomial, coefficient in self.terms.items()})
+
+    def __pos__(self):
+        return self
+
+    def __sub__(self, other):
+        return self + (-Polynomial.lift(other))
+
+    def __rsub__(self, other):
+        return Polynomial.lift(other) - self
+
+    def multiply(self, other, context: _Context = None) -> "Polynomial":
+        """
+        The expanded product, checking context's deadline as it goes.
+
+        Products beyond MAX_POLYNOMIAL_DEGREE are refused up front, and ones
+        beyond MAX_POLYNOMIAL_TERMS as soon as they grow that large.
+        """
+        other = Polynomial.lift(other)
+        if self.degree() + other.degree() > MAX_POLYNOMIAL_DEGREE:
+            raise ExpressionError("Expression is too complex to expand")
+        terms = {}
+        for left_monomial, left_coefficient in self.terms.items():
+            if context is not None:
+                _check_deadline(context)
+            for right_monomial, right_coefficient in other.terms.items():
+                powers = dict(left_monomial)
+                for name, power in right_monomial:
+                    powers[name] = powers.get(name, 0) + power
+                monomial = tuple(sorted(powers.items()))
+                terms[monomial] = terms.get(monomial, 0) + left_coefficient * right_coefficient
+            if len(terms) > MAX_POLYNOMIAL_TERMS:
+                raise ExpressionError("Expression is too complex to expand")
+        return Polynomial(terms)
+
+    def __mul__(self, other):
+        return self.multiply(other)
+
+    __rmul__ = __mul__
+
+    def __truediv__(self, other):
+        other = Polynomial.lift(other)
+        if not other.is_constant():
+            raise ExpressionError("Cannot divide by an expression containing unknowns")
+        return self * Polynomial.lift(1 / Fraction(other.constant()))
+
+    def __rtruediv__(self, other):
+        if not self.is_constant():
+            raise ExpressionError("Cannot divide by an expression containing unknowns")
+        return Polynomial.lift(other) / self
+
+    def power(self, exponent, context: _Context = None) -> "Polynomial":
+        """self ** exponent expanded, with multiply()'s deadline and size limits"""
+        if isinstance(exponent, Polynomial):
+            if not exponent.is_constant():
+                raise ExpressionError("Unknowns in exponents are not supported")
+            exponent = exponent.constant()
+        if exponent != int(exponent) or exponent < 0 or exponent > 8:
+            raise ExpressionError("Only powers 0-8 of unknowns are supported")
+        if self.degree() * int(exponent) > MAX_POLYNOMIAL_DEGREE:
+            raise ExpressionError("Expression is too complex to expand")
+        result = Polynomial.lift(1)
+        for _ in range(int(exponent)):
+            result = result.multiply(self, context)
+        return result
+
+    def __pow__(self, exponent):
+        return self.power(exponent)
+
+    def __eq__(self, other):
+        return isinstance(other, (Polynomial, int, Fraction, float)) and self.terms == Polynomial.lift(other).terms
+
+    def __hash__(self):
+        return hash(tuple(sorted(self.terms.items())))
+
+    def __lt__(self, other):
+        if not self.is_constant():
+            raise ExpressionError("Cannot compare unknowns")
+        return self.constant() < Polynomial.lift(other).constant()
+
+    def __mod__(self, other):
+        raise ExpressionError("'%' is not supported with unknowns")
+
+    __floordiv__ = __rfloordiv__ = __rmod__ = __mod__
+
+# Products and powers involving unknowns, which expand under the evaluation's deadline
+POLYNOMIAL_OPERATORS = {
+    ast.Mult: lambda a, b, context: Polynomial.lift(a).multiply(b, context),
+    ast.Pow: lambda a, b, context: Polynomial.lift(a).power(b, context) if isinstance(a, Polynomial) else _power(a, b),
+}
+
+EQUATION_SEPARATOR = re.compile(r"\s*(?:;|\band\b)\s*")
+
+def _split_equations(text: str) -> list:
+    """Split a system on ';', 'and', or commas outside parentheses"""
+    parts, depth, current = [], 0, []
+    for character in text:
+        if character == "(":
+            depth += 1
+        elif character == ")":
+            depth -= 1
+        if character == "," and depth == 0:
+            parts.append("".join(current))
+            current = []
+        else:
+            current.append(character)
+    parts.append("".join(current))
+    return [piece for part in parts for piece in EQUATION_SEPARATOR.split(part) if piece.strip()]
+
+def _equation_polynomial(equation: str, deadline: float) -> Polynomial:
+    sides = equation.split("=")
+    if len(sides) != 2:
+        raise ExpressionError("Each equation needs exactly one '='")
+    polynomials = []
+    for side in sides:
+        evaluator, variables = compile_expression(side.strip())
+        context = _Context({name: Polynomial.variable(name) for name in variables}, deadline)
+        polynomials.append(Polynomial.lift(evaluator(context)))
+    return polynomials[0] - polynomials[1]
+
+def _solve_linear_system(polynomials: list, variables: list) -> dict:
+    rows = []
+    for polynomial in polynomials:
+        if polynomial.degree() > 1:
+            raise ExpressionError("Systems of equations must be linear")
+        rows.append([polynomial.coefficient(((name, 1),)) for name in variables] + [-polynomial.constant()])
+
+    columns = len(variables)
+    rank = 0
+    pivots = []
+    for column in range(columns):
+        pivot_row = next((r for r in range(rank, len(rows)) if rows[r][column] != 0), None)
+        if pivot_row is None:
+            continue
+        rows[rank], rows[pivot_row] = rows[pivot_row], rows[rank]
+        pivot = rows[rank][column]
+        rows[rank] = [value / pivot for value in rows[rank]]
+        for r in range(len(rows)):
+            if r != rank and rows[r][column] != 0:
+                factor = rows[r][column]
+                rows[r] = [a - factor * b for a, b in zip(rows[r], rows[rank])]
+        pivots.append(column)
+        rank += 1
+
+    if any(all(value == 0 for value in row[:-1]) and row[-1] != 0 for row in rows):
+        raise ExpressionError("The equations have no solution")
+    if rank < columns:
+        raise ExpressionError("The equations have infinitely many solutions")
+    return {variables[column]: rows[r][-1] for r, column in enumerate(pivots)}
+
+def _solve_quadratic(polynomial: Polynomial, name: str) -> list:
+    a = polynomial.coefficient(((name, 2),))
+    b = polynomial.coefficient(((name, 1),))
+    c = polynomial.constant()
+    discriminant = b * b - 4 * a * c
+    if discriminant < 0:
+        real = float(-b / (2 * a))
+        imaginary = math.sqrt(float(-discriminant)) / float(2 * abs(a))
+        return [complex(real, imaginary), complex(real, -imaginary)]
+    root = _exact_sqrt(discriminant)
+    if isinstance(root, Fraction):
+        roots = {(-b - root) / (2 * a), (-b + root) / (2 * a)}
+        return sorted(roots)
+    return sorted({(float(-b) - root) / float(2 * a), (float(-b) + root) / float(2 * a)})
+
+def solve(equations: str, timeout: float = MAX_EVALUATION_SECONDS) -> dict:
+    """
+    Solve one equation or a system for its unknowns.
+
+    Supports a single linear or quadratic equation in one unknown, and linear
+    systems ("x + y = 3, x - y = 1"). Returns {variable: [solutions]}.
+    """
+    if len(equations) > MAX_EXPRESSION_LENGTH:
+        raise ExpressionError(f"Expressions are limited to {MAX_EXPRESSION_LENGTH} characters")
+    try:
+        return _solve(equations, time.perf_counter() + timeout)
+    except ZeroDivisionError:
+        raise ExpressionError("Division by zero")
+    except ExpressionError:
+        raise
+    except (ValueError, OverflowError):
+        raise ExpressionError("Result would be too large")
+
+def _solve(equations: str, deadline: float) -> dict:
+    polynomials = [_equation_polynomial(equation, deadline) for equation in _split_equations(equations)]
+
+    variables = sorted(set().union(*(polynomial.variables() for polynomial in polynomials)))
+    if not variables:
+        raise ExpressionError("There is no unknown to solve for")
+
+    if len(polynomials) == 1 and len(variables) == 1:
+        polynomial, name = polynomials[0], variables[0]
+        degree = polynomial.degree()
+        if degree == 1:
+            return {name: [-polynomial.constant() / polynomial.coefficient(((name, 1),))]}
+        if degree == 2:
+            return {name: _solve_quadratic(polynomial, name)}
+        raise ExpressionError("Only linear and quadratic equations can be solved")
+
+    if len(polynomials) < len(variables):
+        raise ExpressionError("Need as many equations as unknowns")
+    solution = _solve_linear_system(polynomials, variables)
+    return {name: [value] for name, value in solution.items()}
+
+def format_number(value) -> str:
+    """Show exact values exactly, with a decimal approximation for non-integers"""
+    if isinstance(value, Fraction):
+        try:
+            if value.denominator == 1:
+                return str(value.numerator)
+            return f"{value.numerator}/{value.denominator} (≈ {float(value):.10g})"
+        except (ValueError, OverflowError):
+            raise ExpressionError("Result is too large to show")
+    if isinstance(value, complex):
+        sign = "+" if value.imag >= 0 else "-"
+        return f"{value.real:.10g} {sign} {abs(value.imag):.10g}i"
+    if isinstance(value, float) and value.is_integer() and abs(value) < 1e15:
+        return str(int(value))
+    return f"{value:.12g}"
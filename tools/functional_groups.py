@@ -0,0 +1,458 @@
+import re
+from functools import lru_cache
+from telemetry.tracing import timed_tool
+
+# Common compounds by name, as SMILES; looked up before any name is parsed
+COMPOUND_INDEX = {
+    "methanol": "CO", "ethanol": "CCO", "isopropanol": "CC(C)O", "isopropyl alcohol": "CC(C)O",
+    "ethylene glycol": "OCCO", "glycerol": "OCC(O)CO", "glycerin": "OCC(O)CO",
+    "formaldehyde": "C=O", "acetaldehyde": "CC=O", "benzaldehyde": "O=Cc1ccccc1", "vanillin": "COc1cc(C=O)ccc1O",
+    "acetone": "CC(C)=O", "acetophenone": "CC(=O)c1ccccc1",
+    "formic acid": "OC=O", "acetic acid": "CC(=O)O", "propionic acid": "CCC(=O)O", "butyric acid": "CCCC(=O)O",
+    "oxalic acid": "OC(=O)C(=O)O", "lactic acid": "CC(O)C(=O)O", "citric acid": "OC(=O)CC(O)(CC(=O)O)C(=O)O",
+    "benzoic acid": "OC(=O)c1ccccc1", "salicylic acid": "OC(=O)c1ccccc1O", "acrylic acid": "C=CC(=O)O",
+    "aspirin": "CC(=O)Oc1ccccc1C(=O)O", "acetylsalicylic acid": "CC(=O)Oc1ccccc1C(=O)O",
+    "paracetamol": "CC(=O)Nc1ccc(O)cc1", "acetaminophen": "CC(=O)Nc1ccc(O)cc1",
+    "ibuprofen": "CC(C)Cc1ccc(cc1)C(C)C(=O)O",
+    "ethyl acetate": "CCOC(C)=O", "methyl acetate": "COC(C)=O", "methyl salicylate": "COC(=O)c1ccccc1O",
+    "diethyl ether": "CCOCC", "dimethyl ether": "COC", "anisole": "COc1ccccc1",
+    "methylamine": "CN", "ethylamine": "CCN", "dimethylamine": "CNC", "trimethylamine": "CN(C)C",
+    "aniline": "Nc1ccccc1", "urea": "NC(N)=O", "acetamide": "CC(N)=O",
+    "glycine": "NCC(=O)O", "alanine": "CC(N)C(=O)O", "serine": "NC(CO)C(=O)O", "cysteine": "NC(CS)C(=O)O",
+    "acetonitrile": "CC#N", "nitrobenzene": "[O-][N+](=O)c1ccccc1", "nitromethane": "C[N+](=O)[O-]",
+    "benzene": "c1ccccc1", "toluene": "Cc1ccccc1", "phenol": "Oc1ccccc1", "styrene": "C=Cc1ccccc1",
+    "benzyl alcohol": "OCc1ccccc1", "chlorobenzene": "Clc1ccccc1", "pyridine": "c1ccncc1",
+    "ethylene": "C=C", "propylene": "CC=C", "acetylene": "C#C", "isoprene": "CC(=C)C=C",
+    "chloroform": "ClC(Cl)Cl", "dichloromethane": "ClCCl", "carbon tetrachloride": "ClC(Cl)(Cl)Cl",
+    "vinyl chloride": "C=CCl", "methanethiol": "CS", "ethanethiol": "CCS",
+    "acetyl chloride": "CC(Cl)=O", "acetic anhydride": "CC(=O)OC(C)=O",
+    "glucose": "OCC1OC(O)C(O)C(O)C1O", "fructose": "OCC1(O)OCC(O)C(O)C1O",
+    "cholesterol": "CC(C)CCCC(C)C1CCC2C1(CCC3C2CC=C4C3(CCC(C4)O)C)C",
+    "menthol": "CC(C)C1CCC(C)CC1O", "limonene": "CC1=CCC(CC1)C(C)=C",
+}
+
+# Organic-subset SMILES tokens: bracket atoms, two-letter halogens, atoms, bonds, branches, ring closures
+_SMILES_TOKEN = re.compile(r"\[[^\]]+\]|Br|Cl|[BCNOPSFI]|[bcnops]|[-=#:/\\]|[()]|%\d\d|\d|\.")
+_BRACKET_ATOM = re.compile(r"^\[(\d*)([A-Z][a-z]?|[bcnops])(@*)(H\d?)?([+-]\d*|[+-]+)?\]$")
+_DEFAULT_VALENCE = {"B": 3, "C": 4, "N": 3, "O": 2, "P": 3, "S": 2, "F": 1, "Cl": 1, "Br": 1, "I": 1}
+_BOND_ORDERS = {"-": 1, "/": 1, "\\": 1, "=": 2, "#": 3, ":": 1.5}
+HALOGENS = ("F", "Cl", "Br", "I")
+
+class Molecule:
+    """
+    A lightweight molecular graph: elements, aromaticity, hydrogen counts
+    and bonds (with order 1, 2, 3 or 1.5 for aromatic) between atom indices.
+    """
+
+    def __init__(self):
+        self.elements = []
+        self.aromatic = []
+        self.hydrogens = []
+        self.charges = []
+        self.bonds = []
+
+    def add_atom(self, element: str, aromatic: bool = False, hydrogens: int = None, charge: int = 0) -> int:
+        self.elements.append(element)
+        self.aromatic.append(aromatic)
+        self.hydrogens.append(hydrogens)
+        self.charges.append(charge)
+        self.bonds.append({})
+        return len(self.elements) - 1
+
+    def bond(self, a: int, b: int, order: float):
+        if a == b or b in self.bonds[a]:
+            raise ValueError("Invalid bond")
+        self.bonds[a][b] = self.bonds[b][a] = order
+
+    def __len__(self):
+        return len(self.elements)
+
+def _fill_hydrogens(molecule: Molecule):
+    """Give atoms without an explicit hydrogen count the hydrogens their default valence leaves over"""
+    for atom, hydrogens in enumerate(molecule.hydrogens):
+        if hydrogens is None:
+            valence = _DEFAULT_VALENCE.get(molecule.elements[atom], 0)
+            used = sum(molecule.bonds[atom].values())
+            if molecule.elements[atom] in ("N", "P") and used > valence:
+                valence = 5
+            elif molecule.elements[atom] == "S" and used > valence:
+                valence = 4 if used <= 4 else 6
+            molecule.hydrogens[atom] = max(0, int(valence - used))
+
+@lru_cache(maxsize=1024)
+def parse_smiles(smiles: str) -> Molecule:
+    """Parse organic-subset SMILES (atoms, brackets, branches, ring closures, bond orders) into a Molecule"""
+    tokens = _SMILES_TOKEN.findall(smiles)
+    if "".join(tokens) != smiles or not tokens:
+        raise ValueError(f"Not SMILES: {smiles!r}")
+
+    molecule = Molecule()
+    previous, branches, rings, pending = None, [], {}, None
+    for token in tokens:
+        if token == "(":
+            if previous is None:
+                raise ValueError("Branch before any atom")
+            branches.append(previous)
+        elif token == ")":
+            if not branches:
+                raise ValueError("Unbalanced branch")
+            previous = branches.pop()
+        elif token in _BOND_ORDERS:
+            pending = _BOND_ORDERS[token]
+        elif token == ".":
+            previous, pending = None, None
+        elif token[0] == "%" or token.isdigit():
+            if previous is None:
+                raise ValueError("Ring closure before any atom")
+            if token in rings:
+                other, order = rings.pop(token)
+                both_aromatic = molecule.aromatic[other] and molecule.aromatic[previous]
+                molecule.bond(other, previous, pending or order or (1.5 if both_aromatic else 1))
+            else:
+                rings[token] = (previous, pending)
+            pending = None
+        else:
+            if token[0] == "[":
+                match = _BRACKET_ATOM.match(token)
+                if not match:
+                    raise ValueError(f"Unsupported atom {token}")
+                _, element, _, hydrogens, charge = match.groups()
+                aromatic = element.islower()
+                hydrogens = int(hydrogens[1:] or 1) if hydrogens else 0
+                sign = -1 if charge and charge[0] == "-" else 1
+                charge = sign * (int(charge[1:]) if charge and charge[1:].isdigit() else len(charge or ""))
+                atom = molecule.add_atom(element.capitalize(), aromatic, hydrogens, charge)
+            else:
+                atom = molecule.add_atom(token.capitalize(), token.islower())
+            if previous is not None:
+                both_aromatic = molecule.aromatic[previous] and molecule.aromatic[atom]
+                molecule.bond(previous, atom, pending or (1.5 if both_aromatic else 1))
+            previous, pending = atom, None
+    if branches or rings:
+        raise ValueError("Unclosed branch or ring")
+    _fill_hydrogens(molecule)
+    return molecule
+
+# Condensed-formula groups, longest first, and the SMILES each stands for
+_CONDENSED_GROUPS = [
+    ("C6H5", "c1ccccc1"), ("C6H4", "c1ccc(cc1)"), ("C3H7", "CCC"), ("C2H5", "CC"),
+    ("CONH2", "C(=O)N"), ("CHOH", "C(O)"), ("COOH", "C(=O)O"), ("COO", "C(=O)O"), ("CONH", "C(=O)N"), ("COCl", "C(=O)Cl"),
+    ("CHO", "C=O"), ("NO2", "[N+](=O)[O-]"), ("NH2", "N"), ("NH", "N"), ("OH", "O"), ("SH", "S"),
+    ("CN", "C#N"), ("CH3", "C"), ("CH2", "C"), ("CO", "C(=O)"), ("CH", "C"), ("Cl", "Cl"), ("Br", "Br"),
+    ("C", "C"), ("N", "N"), ("O", "O"), ("S", "S"), ("F", "F"), ("I", "I"),
+]
+_CONDENSED_TOKEN = re.compile("|".join(re.escape(group) for group, _ in _CONDENSED_GROUPS) + r"|\(|\)\d*|=|≡|-|H")
+_CONDENSED_SMILES = dict(_CONDENSED_GROUPS)
+
+def condensed_to_smiles(formula: str) -> str:
+    """
+    Translate a condensed structural formula (CH3CH2OH, CH3COOCH2CH3,
+    (CH3)2CHOH, CH3(CH2)3NH2, CH2=CHCl) to SMILES.
+
+    Parenthesised groups after an atom are its substituents; leading ones
+    belong to the next atom, and a repeated (CH2)n is a chain. A molecular
+    formula such as C2H6O describes no structure and is rejected.
+    """
+    tokens = _CONDENSED_TOKEN.findall(formula)
+    if "".join(tokens) != formula:
+        raise ValueError(f"Not a condensed formula: {formula!r}")
+
+    def translate(position: int, closing: bool) -> tuple:
+        parts, held = [], []
+        while position < len(tokens):
+            token = tokens[position]
+            if token == "(":
+                inner, position = translate(position + 1, True)
+                count = int(tokens[position - 1][1:] or 1)
+                if inner == "C" and tokens[position - 2] == "CH2":
+                    parts.append("C" * count)
+                elif parts:
+                    parts.append(f"({inner})" * count)
+                else:
+                    held.append(f"({inner})" * count)
+                continue
+            if token.startswith(")"):
+                if not closing:
+                    raise ValueError("Unbalanced parenthesis")
+                return "".join(parts), position + 1
+            if token == "H":
+                # A leading H (HCOOH, HC≡CH) is implicit in SMILES
+                if parts:
+                    raise ValueError("Stray hydrogen")
+            elif token == "=":
+                parts.append("=")
+            elif token == "≡":
+                parts.append("#")
+            elif token != "-":
+                smiles = _CONDENSED_SMILES[token]
+                if token == "CHO" and position + 1 < len(tokens):
+                    raise ValueError("CHO must end the formula")
+                parts.append(smiles)
+                if held:
+                    parts.append("".join(held))
+                    held = []
+            position += 1
+        if closing:
+            raise ValueError("Unclosed parenthesis")
+        return "".join(parts), position
+
+    smiles, _ = translate(0, False)
+    if not smiles:
+        raise ValueError("Empty formula")
+    return smiles
+
+_CHAIN_STEMS = {"meth": 1, "eth": 2, "prop": 3, "but": 4, "pent": 5, "hex": 6, "hept": 7, "oct": 8, "non": 9, "dec": 10}
+_MULTIPLIERS = {"": 1, "di": 2, "tri": 3, "tetra": 4}
+_SUBSTITUENTS = {
+    "methyl": "C", "ethyl": "CC", "propyl": "CCC", "isopropyl": "C(C)C", "butyl": "CCCC", "phenyl": "c1ccccc1",
+    "fluoro": "F", "chloro": "Cl", "bromo": "Br", "iodo": "I",
+    "hydroxy": "O", "amino": "N", "nitro": "[N+](=O)[O-]", "oxo": "=O", "methoxy": "OC", "ethoxy": "OCC",
+}
+_PREFIX = re.compile(r"(?:(\d+(?:,\d+)*)-)?(di|tri|tetra)?(" + "|".join(sorted(_SUBSTITUENTS, key=len, reverse=True)) + r")-?")
+_NAME = re.compile(
+    r"^(?P<prefixes>.*?)(?P<cyclo>cyclo)?(?P<stem>" + "|".join(_CHAIN_STEMS) + r")a?"
+    r"(?:-(?P<bond_locants>\d+(?:,\d+)*)-)?(?P<bond_multiplier>di|tri)?(?P<bond>an|en|yn)e?"
+    r"(?:-(?P<locants>\d+(?:,\d+)*)-)?(?P<multiplier>di|tri)?(?P<suffix>ol|al|one|oic acid|amine|amide|nitrile|oate|thiol)?$"
+)
+# Suffix -> (SMILES branches on the carbon, default locant: "end" for chain-terminal groups)
+_SUFFIXES = {
+    "ol": ("(O)", 1), "amine": ("(N)", 1), "thiol": ("(S)", 1), "one": ("(=O)", 2),
+    "al": ("(=O)", "end"), "oic acid": ("(=O)(O)", "end"), "amide": ("(=O)(N)", "end"),
+    "nitrile": ("(#N)", "end"), "oate": ("(=O)(O{ester})", "end"),
+}
+
+def name_to_smiles(name: str) -> str:
+    """
+    Build SMILES from a systematic name: substituted chains and rings with
+    locants (2-methylpropan-1-ol, but-2-ene, cyclohexanone, ethane-1,2-diol,
+    3-chloropropanoic acid), and esters (ethyl ethanoate).
+    """
+    name = " ".join(name.lower().split())
+    ester = None
+    if name.endswith("oate") and " " in name:
+        alkyl, name = name.split(" ", 1)
+        if alkyl.endswith("yl") and alkyl in _SUBSTITUENTS:
+            ester = _SUBSTITUENTS[alkyl]
+        else:
+            raise ValueError(f"Unknown ester group {alkyl!r}")
+    match = _NAME.match(name)
+    if not match:
+        raise ValueError(f"Unrecognised name {name!r}")
+
+    length = _CHAIN_STEMS[match.group("stem")]
+    cyclic = bool(match.group("cyclo"))
+    if cyclic and length < 3:
+        raise ValueError("Rings need three or more carbons")
+    branches = {position: [] for position in range(1, length + 1)}
+    bonds = {position: "" for position in range(1, length)}
+
+    def locants(text: str, count: int, default) -> list:
+        positions = [int(locant) for locant in text.split(",")] if text else default
+        if len(positions) != count or any(not 1 <= position <= length for position in positions):
+            raise ValueError(f"Bad locants in {name!r}")
+        return positions
+
+    # Unsaturation
+    if match.group("bond") != "an":
+        count = _MULTIPLIERS[match.group("bond_multiplier") or ""]
+        for position in locants(match.group("bond_locants"), count, [1 + 2 * i for i in range(count)]):
+            if position >= length and not cyclic:
+                raise ValueError(f"Bad bond locant in {name!r}")
+            bonds[position] = "=" if match.group("bond") == "en" else "#"
+
+    # Principal characteristic group
+    suffix = match.group("suffix")
+    if suffix:
+        count = _MULTIPLIERS[match.group("multiplier") or ""]
+        smiles, default = _SUFFIXES[suffix]
+        if suffix == "oate":
+            if ester is None:
+                raise ValueError("Ester names need an alkyl group")
+            smiles = smiles.format(ester=ester)
+        if default == "end":
+            if cyclic:
+                raise ValueError(f"-{suffix} needs a chain end")
+            default = [1, length][:count]
+        else:
+            default = [1 if cyclic else default] * count if count == 1 else list(range(default if not cyclic else 1, default + count))
+        for position in locants(match.group("locants"), count, default):
+            branches[position].append(smiles)
+
+    # Substituent prefixes
+    prefixes = match.group("prefixes").strip("-")
+    consumed = 0
+    for prefix in _PREFIX.finditer(prefixes):
+        if prefix.start() != consumed:
+            break
+        consumed = prefix.end()
+        count = _MULTIPLIERS[prefix.group(2) or ""]
+        substituent = _SUBSTITUENTS[prefix.group(3)]
+        for position in locants(prefix.group(1), count, [1] * count if not prefix.group(1) else None):
+            branches[position].append(f"({substituent})")
+    if consumed != len(prefixes):
+        raise ValueError(f"Unrecognised prefix in {name!r}")
+
+    parts = []
+    for position in range(1, length + 1):
+        atom = "C1" if cyclic and position == 1 else "C"
+        ring_close = "1" if cyclic and position == length else ""
+        bond = bonds.get(position, "")
+        parts.append(atom + ring_close + "".join(branches[position]) + bond)
+    return "".join(parts)
+
+def _looks_like_smiles(text: str) -> bool:
+    return len(text) > 1 and bool(re.search(r"[Cc]", text)) and "H" not in re.sub(r"\[[^\]]*\]", "", text)
+
+@lru_cache(maxsize=1024)
+def parse_compound(compound: str):
+    """
+    Parse a compound given by common name, systematic name, SMILES or
+    condensed formula into a Molecule, or return None when none applies
+    (or when it has no carbon, so isn't an organic compound).
+    """
+    text = compound.strip().strip(".,;:?!")
+    key = " ".join(text.lower().split())
+    attempts = []
+    if key in COMPOUND_INDEX:
+        attempts.append(lambda: parse_smiles(COMPOUND_INDEX[key]))
+    if re.fullmatch(r"[a-z0-9,\- ]+(?: acid)?", key):
+        attempts.append(lambda: parse_smiles(name_to_smiles(key)))
+    if _looks_like_smiles(text):
+        attempts.append(lambda: parse_smiles(text))
+    if "H" in text or "≡" in text:
+        attempts.append(lambda: parse_smiles(condensed_to_smiles(text)))
+    for attempt in attempts:
+        try:
+            molecule = attempt()
+        except ValueError:
+            continue
+        if "C" in molecule.elements:
+            return molecule
+    return None
+
+# Substructure patterns, most specific first. Each is (name, centre element, centre
+# conditions, [(bond, neighbour element, neighbour conditions)]). "X" is any
+# halogen; conditions are "h" (at least that many hydrogens), "h_max",
+# "aromatic" and "carbons" (carbon neighbours of a neighbour, e.g. an ester's O).
+# Matched heteroatoms and the centre are claimed, so an acid's OH is not also
+# reported as an alcohol.
+PATTERNS = [
+    ("carboxyl (carboxylic acid)", "C", {}, [("=", "O", {}), ("-", "O", {"h": 1})]),
+    ("acid anhydride", "C", {}, [("=", "O", {}), ("-", "O", {"acyl": 2})]),
+    ("ester", "C", {}, [("=", "O", {}), ("-", "O", {"carbons": 2})]),
+    ("amide", "C", {}, [("=", "O", {}), ("-", "N", {})]),
+    ("acyl halide", "C", {}, [("=", "O", {}), ("-", "X", {})]),
+    ("carbonyl (aldehyde)", "C", {"h": 1}, [("=", "O", {})]),
+    ("carbonyl (ketone)", "C", {}, [("=", "O", {}), ("-", "C", {}), ("-", "C", {})]),
+    ("nitrile", "C", {}, [("#", "N", {})]),
+    ("nitro", "N", {}, [("=", "O", {}), ("-", "O", {})]),
+    ("hydroxyl (phenol)", "O", {"h": 1}, [("-", "C", {"aromatic": True})]),
+    ("hydroxyl (alcohol)", "O", {"h": 1}, [("-", "C", {"aromatic": False})]),
+    ("thiol", "S", {"h": 1}, [("-", "C", {})]),
+    ("ether", "O", {"aromatic": False}, [("-", "C", {}), ("-", "C", {})]),
+    ("amino (primary amine)", "N", {"h": 2, "aromatic": False}, [("-", "C", {})]),
+    ("amino (secondary amine)", "N", {"h": 1, "h_max": 1, "aromatic": False}, [("-", "C", {}), ("-", "C", {})]),
+    ("amino (tertiary amine)", "N", {"h_max": 0, "aromatic": False}, [("-", "C", {}), ("-", "C", {}), ("-", "C", {})]),
+    ("aromatic ring", "C", {"aromatic": True}, []),
+    ("alkene (C=C)", "C", {"aromatic": False}, [("=", "C", {})]),
+    ("alkyne (C≡C)", "C", {}, [("#", "C", {})]),
+    ("halide (fluoro)", "F", {}, [("-", "C", {})]),
+    ("halide (chloro)", "Cl", {}, [("-", "C", {})]),
+    ("halide (bromo)", "Br", {}, [("-", "C", {})]),
+    ("halide (iodo)", "I", {}, [("-", "C", {})]),
+]
+_BOND_SYMBOLS = {"-": 1, "=": 2, "#": 3}
+
+def _atom_matches(molecule: Molecule, atom: int, element: str, conditions: dict) -> bool:
+    actual = molecule.elements[atom]
+    if not (actual == element or (element == "X" and actual in HALOGENS)):
+        return False
+    if molecule.hydrogens[atom] < conditions.get("h", 0) or molecule.hydrogens[atom] > conditions.get("h_max", 99):
+        return False
+    if "aromatic" in conditions and molecule.aromatic[atom] != conditions["aromatic"]:
+        return False
+    carbons = [other for other in molecule.bonds[atom] if molecule.elements[other] == "C"]
+    if "carbons" in conditions and len(carbons) < conditions["carbons"]:
+        return False
+    if "acyl" in conditions:
+        acyl = [other for other in carbons if any(molecule.elements[o] == "O" and order == 2 for o, order in molecule.bonds[other].items())]
+        if len(acyl) < conditions["acyl"]:
+            return False
+    return True
+
+def _compile(pattern: tuple):
+    """Turn a pattern into a function returning the atoms it matches at a centre atom, or None"""
+    name, element, conditions, neighbours = pattern
+    wanted = [(_BOND_SYMBOLS[bond], neighbour, neighbour_conditions) for bond, neighbour, neighbour_conditions in neighbours]
+
+    def match(molecule: Molecule, centre: int, claimed: set):
+        if centre in claimed or not _atom_matches(molecule, centre, element, conditions):
+            return None
+
+        def assign(index: int, used: list):
+            if index == len(wanted):
+                return used
+            order, neighbour, neighbour_conditions = wanted[index]
+            for other, bond_order in molecule.bonds[centre].items():
+                if other in used or bond_order != order:
+                    continue
+                # Heteroatoms already part of another group can't be reused; shared carbons can
+                if molecule.elements[other] != "C" and other in claimed:
+                    continue
+                if _atom_matches(molecule, other, neighbour, neighbour_conditions):
+                    found = assign(index + 1, used + [other])
+                    if found is not None:
+                        return found
+            return None
+
+        matched = assign(0, [])
+        return None if matched is None else [centre] + matched
+
+    return name, match
+
+_COMPILED_PATTERNS = [_compile(pattern) for pattern in PATTERNS]
+
+def detect_functional_groups(molecule: Molecule) -> dict:
+    """Return {group name: occurrences} for the patterns found in a molecule, most specific first"""
+    found, claimed = {}, set()
+    for name, match in _COMPILED_PATTERNS:
+        for centre in range(len(molecule)):
+            atoms = match(molecule, centre, claimed)
+            if atoms is None:
+                continue
+            found[name] = found.get(name, 0) + 1
+            claimed.update(atom for atom in atoms if molecule.elements[atom] != "C" or atom == centre)
+    # A ring or a multiple bond is one group, not one per atom
+    for name in ("aromatic ring", "alkene (C=C)", "alkyne (C≡C)"):
+        if name in found:
+            found[name] = 1 if name == "aromatic ring" else found[name] // 2 or 1
+    return found
+
+@timed_tool("functional_groups")
+def find_functional_groups(compound: str):
+    """
+    Name the functional groups in a compound, or return None when it can't be parsed.
+
+    The compound may be a common name (from COMPOUND_INDEX), a systematic
+    name, SMILES or a condensed formula. Groups are listed most specific
+    first, with a count when one occurs more than once.
+    """
+    molecule = parse_compound(compound)
+    if molecule is None:
+        return None
+    return [f"{name} ×{count}" if count > 1 else name for name, count in detect_functional_groups(molecule).items()]
+
+_INDEX_NAMES = re.compile(r"\b(" + "|".join(re.escape(name) for name in sorted(COMPOUND_INDEX, key=len, reverse=True)) + r")\b", re.IGNORECASE)
+_SYSTEMATIC_NAME = re.compile(
+    r"(?:\b(?:methyl|ethyl|propyl|butyl) )?\b[\d,\-a-z]*(?:" + "|".join(_CHAIN_STEMS) + r")[a-z\d,\-]*(?: acid)?\b", re.IGNORECASE
+)
+_FORMULA = re.compile(r"(?<![\w\[\]()=#≡])[A-Za-z0-9()\[\]=#≡+\-@/\\]*[A-Z][A-Za-z0-9()\[\]=#≡+\-@/\\]*")
+
+def find_compound(question: str):
+    """Return the first compound in a question that parse_compound understands, or None"""
+    for pattern in (_INDEX_NAMES, _SYSTEMATIC_NAME, _FORMULA):
+        for match in pattern.finditer(question):
+            candidate = match.group(0).strip("-,")
+            if parse_compound(candidate) is not None:
+                return candidate
+    return None
@@ -0,0 +1,281 @@
+import math
+from functools import lru_cache
+
+G = 9.8  # gravitational acceleration, m/s²
+
+# Short symbols used in relation definitions -> quantity names used everywhere else
+SYMBOLS = {
+    "v0": "initial_velocity", "v": "final_velocity", "a": "acceleration", "t": "time", "d": "displacement",
+    "m": "mass", "F": "force", "h": "height", "speed": "velocity",
+    "Ep": "potential_energy", "Ek": "kinetic_energy", "E": "energy", "W": "work", "P": "power",
+    "p": "momentum", "J": "impulse",
+    "V": "voltage", "I": "current", "R": "resistance", "Q": "charge",
+}
+
+DISPLAY_UNITS = {
+    "initial_velocity": "m/s", "final_velocity": "m/s", "velocity": "m/s", "acceleration": "m/s²",
+    "time": "s", "displacement": "m", "height": "m", "mass": "kg", "force": "N",
+    "potential_energy": "J", "kinetic_energy": "J", "energy": "J", "work": "J", "power": "W",
+    "momentum": "kg·m/s", "impulse": "N·s",
+    "voltage": "V", "current": "A", "resistance": "Ω", "charge": "C",
+}
+
+def _sqrt(value):
+    # ** 0.5 works on floats and NumPy arrays alike; negative inputs yield
+    # complex (float) or NaN (array) results, which evaluation discards
+    return value ** 0.5
+
+class Relation:
+    """
+    One physics equation and the ways it can be rearranged.
+
+    Each keyword argument maps a symbol from SYMBOLS to a function computing
+    it from the others, named by their symbols in its parameter list. The
+    functions use only arithmetic, so they accept floats or NumPy arrays.
+    """
+
+    def __init__(self, equation: str, topic: str, **solutions):
+        self.equation = equation
+        self.topic = topic
+        self.solutions = {}
+        variables = set()
+        for symbol, function in solutions.items():
+            parameters = function.__code__.co_varnames[:function.__code__.co_argcount]
+            self.solutions[SYMBOLS[symbol]] = (function, tuple(SYMBOLS[p] for p in parameters))
+            variables.add(SYMBOLS[symbol])
+            variables.update(SYMBOLS[p] for p in parameters)
+        self.variables = frozenset(variables)
+
+    def __repr__(self):
+        return f"Relation({self.equation!r})"
+
+RELATIONS = [
+    # Kinematics (constant acceleration)
+    Relation("v = v0 + a·t", "kinematics",
+             v=lambda v0, a, t: v0 + a * t,
+             v0=lambda v, a, t: v - a * t,
+             a=lambda v, v0, t: (v - v0) / t,
+             t=lambda v, v0, a: (v - v0) / a),
+    Relation("d = ½(v0 + v)·t", "kinematics",
+             d=lambda v0, v, t: 0.5 * (v0 + v) * t,
+             t=lambda d, v0, v: 2 * d / (v0 + v),
+             v=lambda d, v0, t: 2 * d / t - v0,
+             v0=lambda d, v, t: 2 * d / t - v),
+    Relation("d = v0·t + ½a·t²", "kinematics",
+             d=lambda v0, a, t: v0 * t + 0.5 * a * t ** 2,
+             a=lambda d, v0, t: 2 * (d - v0 * t) / t ** 2,
+             v0=lambda d, a, t: (d - 0.5 * a * t ** 2) / t,
+             t=lambda d, v0, a: (_sqrt(v0 ** 2 + 2 * a * d) - v0) / a),
+    Relation("v² = v0² + 2a·d", "kinematics",
+             v=lambda v0, a, d: _sqrt(v0 ** 2 + 2 * a * d),
+             v0=lambda v, a, d: _sqrt(v ** 2 - 2 * a * d),
+             a=lambda v, v0, d: (v ** 2 - v0 ** 2) / (2 * d),
+             d=lambda v, v0, a: (v ** 2 - v0 ** 2) / (2 * a)),
+    Relation("d = v·t − ½a·t²", "kinematics",
+             d=lambda v, a, t: v * t - 0.5 * a * t ** 2),
+
+    # Dynamics
+    Relation("F = m·a", "dynamics",
+             F=lambda m, a: m * a,
+             m=lambda F, a: F / a,
+             a=lambda F, m: F / m),
+
+    # Energy, work and power
+    Relation("Ep = m·g·h", "energy",
+             Ep=lambda m, h: m * G * h,
+             m=lambda Ep, h: Ep / (G * h),
+             h=lambda Ep, m: Ep / (m * G)),
+    Relation("Ek = ½m·v²", "energy",
+             Ek=lambda m, speed: 0.5 * m * speed ** 2,
+             m=lambda Ek, speed: 2 * Ek / speed ** 2,
+             speed=lambda Ek, m: _sqrt(2 * Ek / m)),
+    Relation("W = F·d", "energy",
+             W=lambda F, d: F * d,
+             F=lambda W, d: W / d,
+             d=lambda W, F: W / F),
+    Relation("P = E / t", "energy",
+             P=lambda E, t: E / t,
+             E=lambda P, t: P * t,
+             t=lambda E, P: E / P),
+
+    # Momentum
+    Relation("p = m·v", "momentum",
+             p=lambda m, speed: m * speed,
+             m=lambda p, speed: p / speed,
+             speed=lambda p, m: p / m),
+    Relation("J = F·t", "momentum",
+             J=lambda F, t: F * t,
+             F=lambda J, t: J / t,
+             t=lambda J, F: J / F),
+
+    # Circuits
+    Relation("V = I·R", "circuits",
+             V=lambda I, R: I * R,
+             I=lambda V, R: V / R,
+             R=lambda V, I: V / I),
+    Relation("P = V·I", "circuits",
+             P=lambda V, I: V * I,
+             V=lambda P, I: P / I,
+             I=lambda P, V: P / V),
+    Relation("P = I²·R", "circuits",
+             P=lambda I, R: I ** 2 * R,
+             R=lambda P, I: P / I ** 2,
+             I=lambda P, R: _sqrt(P / R)),
+    Relation("Q = I·t", "circuits",
+             Q=lambda I, t: I * t,
+             I=lambda Q, t: Q / t,
+             t=lambda Q, I: Q / I),
+]
+
+VARIABLES = frozenset(SYMBOLS.values())
+
+def register_relation(relation: Relation):
+    """Add a relation to the registry (cached plans are discarded)"""
+    RELATIONS.append(relation)
+    plan.cache_clear()
+
+@lru_cache(maxsize=512)
+def plan(known: frozenset, goals: frozenset = None) -> tuple:
+    """
+    Find the steps that derive new quantities from the known ones.
+
+    Searches the bipartite relation/variable graph by forward chaining: any
+    relation with exactly one unknown variable that it can be solved for
+    yields that variable, which may in turn unlock further relations. With
+    goals, steps that do not contribute to a goal are pruned. Plans depend
+    only on which quantities are known, so they are cached on that set.
+
+    Returns a tuple of (relation, target) steps in evaluation order.
+    """
+    known = set(known)
+    steps = []
+    progress = True
+    while progress:
+        progress = False
+        for relation in RELATIONS:
+            unknown = relation.variables - known
+            if len(unknown) == 1:
+                target = next(iter(unknown))
+                if target in relation.solutions:
+                    steps.append((relation, target))
+                    known.add(target)
+                    progress = True
+
+    if goals is not None:
+        needed = set(goals)
+        kept = []
+        for relation, target in reversed(steps):
+            if target in needed:
+                kept.append((relation, target))
+                needed.update(relation.solutions[target][1])
+        steps = kept[::-1]
+    return tuple(steps)
+
+def _evaluate(steps: tuple, values: dict) -> tuple:
+    """Run a plan, returning (derived values, {target: relation used})"""
+    values = dict(values)
+    derived, used = {}, {}
+    for relation, target in steps:
+        function, parameters = relation.solutions[target]
+        try:
+            result = function(*(values[name] for name in parameters))
+        except (KeyError, ZeroDivisionError, OverflowError, ValueError):
+            continue
+        if isinstance(result, complex):
+            continue
+        values[target] = derived[target] = result
+        used[target] = relation
+    return derived, used
+
+def _is_missing(value) -> bool:
+    return value is None or (isinstance(value, float) and math.isnan(value))
+
+def _known_values(quantities: dict) -> dict:
+    return {name: value for name, value in quantities.items() if name in VARIABLES and value is not None}
+
+def solve(quantities: dict, goals=None) -> dict:
+    """
+    Derive every quantity reachable from the known ones (or only those needed
+    for goals). Returns {quantity: value} for the newly derived quantities.
+    """
+    known = _known_values(quantities)
+    derived, _ = _evaluate(plan(frozenset(known), frozenset(goals) if goals else None), known)
+    return derived
+
+def solve_with_steps(quantities: dict, goals=None) -> list:
+    """Like solve, but returns [(quantity, value, relation)] in derivation order"""
+    known = _known_values(quantities)
+    derived, used = _evaluate(plan(frozenset(known), frozenset(goals) if goals else None), known)
+    return [(name, value, used[name]) for name, value in derived.items()]
+
+def _numpy():
+    try:
+        import numpy
+    except ImportError:
+        return None
+    return numpy
+
+def solve_columns(columns: dict, goals=None) -> dict:
+    """
+    Solve a whole column of problems that all know the same quantities.
+
+    columns maps quantity names to equal-length NumPy arrays (or anything
+    numpy.asarray accepts); one plan is evaluated over the arrays in a single
+    vectorised pass. Returns {quantity: array} for the derived quantities,
+    with NaN where a row has no valid solution.
+    """
+    numpy = _numpy()
+    if numpy is None:
+        raise RuntimeError("solve_columns needs NumPy: pip install numpy")
+    known = {name: numpy.asarray(values, dtype=float) for name, values in _known_values(columns).items()}
+    with numpy.errstate(all="ignore"):
+        derived, _ = _evaluate(plan(frozenset(known), frozenset(goals) if goals else None), known)
+    return derived
+
+def solve_table(table: dict, goals=None) -> dict:
+    """
+    Solve a worksheet given as columns, where each row is its own problem.
+
+    table maps quantity names to equal-length sequences, with NaN or None
+    where a row does not know that quantity. Rows are grouped by which
+    quantities they know; with NumPy each group shares one plan and is solved
+    by solve_columns in one vectorised pass, without NumPy rows are solved one
+    by one. Returns {quantity: column} of derived values, NaN where a row did
+    not derive that quantity.
+    """
+    table = _known_values(table)
+    numpy = _numpy()
+    if numpy is None:
+        rows = [
+            {name: values[i] for name, values in table.items() if not _is_missing(values[i])}
+            for i in range(len(next(iter(table.values()), [])))
+        ]
+        solved = [solve(row, goals) for row in rows]
+        names = {name for result in solved for name in result}
+        return {name: [result.get(name, math.nan) for result in solved] for name in names}
+
+    # dtype=float turns None into NaN
+    columns = {name: numpy.array(values, dtype=float) for name, values in table.items()}
+    if not columns:
+        return {}
+    names = sorted(columns)
+    size = len(columns[names[0]])
+    # One integer per row with a bit set for each known quantity
+    codes = numpy.zeros(size, dtype=numpy.int64)
+    for bit, name in enumerate(names):
+        codes |= (~numpy.isnan(columns[name])).astype(numpy.int64) << bit
+
+    results = {}
+    for code in numpy.unique(codes):
+        rows = numpy.flatnonzero(codes == code)
+        known = {name: columns[name][rows] for bit, name in enumerate(names) if code >> bit & 1}
+        for name, values in solve_columns(known, goals).items():
+            results.setdefault(name, numpy.full(size, numpy.nan))[rows] = values
+    return results
+
+def format_results(steps: list) -> str:
+    """Render solve_with_steps output as 'name = value unit (equation)' lines"""
+    return ", ".join(
+        f"{name.replace('_', ' ')} = {value:.4g} {DISPLAY_UNITS.get(name, '')} (using {relation.equation})".replace("  ", " ")
+        for name, value, relation in steps
+    )
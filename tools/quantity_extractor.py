@@ -0,0 +1,212 @@
+import re
+from telemetry.tracing import timed_tool
+
+# Unit spellings -> (quantity, factor to SI). Symbols are case-sensitive
+# (mm vs Mm, mA vs MA); spelled-out units also match when capitalised.
+UNITS = {
+    "length": {
+        "m": 1.0, "km": 1000.0, "cm": 0.01, "mm": 0.001, "ft": 0.3048, "mi": 1609.344,
+        "meter": 1.0, "meters": 1.0, "metre": 1.0, "metres": 1.0,
+        "kilometer": 1000.0, "kilometers": 1000.0, "kilometre": 1000.0, "kilometres": 1000.0,
+        "centimeter": 0.01, "centimeters": 0.01, "centimetre": 0.01, "centimetres": 0.01,
+        "millimeter": 0.001, "millimeters": 0.001,
+        "foot": 0.3048, "feet": 0.3048, "inch": 0.0254, "inches": 0.0254,
+        "mile": 1609.344, "miles": 1609.344,
+    },
+    "mass": {
+        "kg": 1.0, "Kg": 1.0, "KG": 1.0, "g": 0.001, "mg": 1e-6, "lb": 0.45359237, "lbs": 0.45359237,
+        "kilogram": 1.0, "kilograms": 1.0, "gram": 0.001, "grams": 0.001,
+        "milligram": 1e-6, "milligrams": 1e-6, "tonne": 1000.0, "tonnes": 1000.0,
+        "pound": 0.45359237, "pounds": 0.45359237,
+    },
+    "time": {
+        "s": 1.0, "sec": 1.0, "secs": 1.0, "ms": 0.001, "min": 60.0, "mins": 60.0,
+        "h": 3600.0, "hr": 3600.0, "hrs": 3600.0,
+        "second": 1.0, "seconds": 1.0, "millisecond": 0.001, "milliseconds": 0.001,
+        "minute": 60.0, "minutes": 60.0, "hour": 3600.0, "hours": 3600.0,
+    },
+    "velocity": {
+        "m/s": 1.0, "m s^-1": 1.0, "m s⁻¹": 1.0, "ms^-1": 1.0, "ms⁻¹": 1.0,
+        "km/h": 1 / 3.6, "km/hr": 1 / 3.6, "kmph": 1 / 3.6, "kph": 1 / 3.6,
+        "cm/s": 0.01, "ft/s": 0.3048, "mph": 0.44704,
+        "meters per second": 1.0, "meter per second": 1.0, "metres per second": 1.0, "metre per second": 1.0,
+        "kilometers per hour": 1 / 3.6, "kilometres per hour": 1 / 3.6, "miles per hour": 0.44704,
+    },
+    "acceleration": {
+        "m/s²": 1.0, "m/s^2": 1.0, "m/s2": 1.0, "m/s/s": 1.0, "m s^-2": 1.0, "m s⁻²": 1.0, "ms^-2": 1.0, "ms⁻²": 1.0,
+        "cm/s²": 0.01, "cm/s^2": 0.01, "ft/s²": 0.3048, "ft/s^2": 0.3048,
+        "meters per second squared": 1.0, "meter per second squared": 1.0,
+        "metres per second squared": 1.0, "metre per second squared": 1.0,
+    },
+    "force": {
+        "N": 1.0, "kN": 1000.0, "newton": 1.0, "newtons": 1.0, "kilonewton": 1000.0, "kilonewtons": 1000.0,
+    },
+    "energy": {
+        "J": 1.0, "kJ": 1000.0, "MJ": 1e6, "cal": 4.184, "kcal": 4184.0, "kWh": 3.6e6, "eV": 1.602176634e-19,
+        "joule": 1.0, "joules": 1.0, "kilojoule": 1000.0, "kilojoules": 1000.0,
+        "calorie": 4.184, "calories": 4.184,
+    },
+    "power": {
+        "W": 1.0, "kW": 1000.0, "MW": 1e6, "hp": 745.7, "watt": 1.0, "watts": 1.0, "kilowatt": 1000.0, "kilowatts": 1000.0,
+    },
+    "momentum": {
+        "kg m/s": 1.0, "kg·m/s": 1.0, "kg*m/s": 1.0, "kgm/s": 1.0, "N s": 1.0, "N·s": 1.0, "Ns": 1.0,
+    },
+    "voltage": {
+        "V": 1.0, "kV": 1000.0, "mV": 0.001, "volt": 1.0, "volts": 1.0,
+    },
+    "current": {
+        "A": 1.0, "mA": 0.001, "amp": 1.0, "amps": 1.0, "ampere": 1.0, "amperes": 1.0, "milliamps": 0.001,
+    },
+    "resistance": {
+        "Ω": 1.0, "kΩ": 1000.0, "MΩ": 1e6, "ohm": 1.0, "ohms": 1.0, "kohm": 1000.0, "kilohms": 1000.0,
+    },
+    "charge": {
+        "C": 1.0, "mC": 0.001, "μC": 1e-6, "µC": 1e-6, "coulomb": 1.0, "coulombs": 1.0,
+    },
+}
+
+def _is_word(spelling: str) -> bool:
+    return spelling.replace(" ", "").isalpha() and len(spelling) > 3
+
+def _unit_key(spelling: str, word: bool) -> str:
+    compact = "".join(spelling.split())
+    return compact.lower() if word else compact
+
+UNIT_LOOKUP = {}
+for _quantity, _spellings in UNITS.items():
+    for _spelling, _factor in _spellings.items():
+        UNIT_LOOKUP[_unit_key(_spelling, _is_word(_spelling))] = (_quantity, _factor)
+
+def _spelling_variants(spelling: str) -> set:
+    """Spelled-out units also match Capitalised and UPPER case; symbols are exact"""
+    if not _is_word(spelling):
+        return {spelling}
+    return {spelling, spelling.capitalize(), spelling.upper()}
+
+def _trie_pattern(spellings) -> str:
+    """
+    Build one regex from a set of spellings by sharing common prefixes.
+
+    A flat alternation of ~200 units makes the engine retry every branch after
+    each number; a prefix trie rejects non-units after a character or two.
+    Optional tails are greedy, so the longest spelling still wins ("m/s²"
+    over "m/s" over "m", "ms" over "m").
+    """
+    trie = {}
+    for spelling in spellings:
+        node = trie
+        for character in spelling:
+            node = node.setdefault(character, {})
+        node[""] = {}
+
+    def build(node) -> str:
+        branches = [
+            (r"\s*" if character == " " else re.escape(character)) + build(child)
+            for character, child in sorted(node.items()) if character
+        ]
+        if not branches:
+            return ""
+        body = branches[0] if len(branches) == 1 else f"(?:{'|'.join(branches)})"
+        return f"(?:{body})?" if "" in node else body
+
+    return build(trie)
+
+_UNIT_PATTERN = _trie_pattern({variant for spellings in UNITS.values() for s in spellings for variant in _spelling_variants(s)})
+
+# Exact matched text -> (quantity, factor), so the common case is one dict hit
+_EXACT_UNITS = {
+    variant: (quantity, factor)
+    for quantity, spellings in UNITS.items()
+    for spelling, factor in spellings.items()
+    for variant in _spelling_variants(spelling)
+}
+
+NUMBER = (
+    r"(?<![\w.])(?P<sign>[-+−])?"
+    r"(?P<mantissa>\d{1,3}(?:,\d{3})+(?:\.\d+)?|\d+(?:\.\d+)?|\.\d+)"
+    r"(?:[eE](?P<exponent>[-+−]?\d+)|\s*[x×*·]\s*10\s*\^\s*(?P<power>[-+−]?\d+))?"
+)
+
+# One pass over the text finds every number-with-unit
+QUANTITY_PATTERN = re.compile(rf"{NUMBER}(?:-|\s*)(?P<unit>{_UNIT_PATTERN})(?![A-Za-z0-9Ω²³])")
+
+# Phrases that imply a zero initial ("from rest") or final ("comes to a stop")
+# velocity; only searched when the text mentions rest, stop or halt at all
+REST_PHRASE = re.compile(r"\bto\s+(?:a\s+)?(?:stop|halt|rest)\b|\b(?P<start>from|at)\s+rest\b")
+
+CONTEXT_WINDOW = 40
+
+# The cue closest to the number decides which velocity it is
+VELOCITY_CUE = re.compile(
+    r"(?P<initial>\binitial(?:ly)?\b|\bstart(?:s|ing)?\b|\bfrom\b|\bbegin(?:s|ning)?\b|\blaunched\b|\bthrown\b|\bfired\b|\bkicked\b|\bu\s*=|\bv0\s*=|\bv₀\s*=)"
+    r"|(?P<final>\bfinal(?:ly)?\b|\breach(?:es|ing)?\b|\bto\b|\buntil\b|\bends?\b|\bv\s*=|\bv_f\s*=)"
+)
+HEIGHT_BEFORE = re.compile(r"\b(?:height|heights|high|tall|above|altitude|raised|lifted|dropped|falls?|cliff|tower|building|roof)\b")
+HEIGHT_AFTER = re.compile(r"\s*(?:high|tall|above|up\b|off the ground)")
+
+def _to_float(match) -> float:
+    sign, mantissa, exponent, power = match.group("sign", "mantissa", "exponent", "power")
+    value = float(mantissa.replace(",", "") if "," in mantissa else mantissa)
+    exponent = exponent or power
+    if exponent:
+        value *= 10 ** int(exponent.replace("−", "-"))
+    if sign == "-" or sign == "−":
+        value = -value
+    return value
+
+@timed_tool("quantity_extractor")
+def extract_quantities(text: str) -> dict:
+    """
+    Extract every quantity with a recognised unit, converted to SI.
+
+    Returns a dict mapping quantity names (mass, time, velocity,
+    initial_velocity, final_velocity, acceleration, displacement, height,
+    force, energy, power, momentum, voltage, current, resistance, charge) to
+    lists of values in the order they appear. Velocities are labelled initial
+    or final from nearby cues ("from", "to", "initially", "reaches");
+    "from rest" counts as an initial and "comes to a stop" as a final velocity
+    of 0. Unlabelled velocities fill initial first, then final.
+    """
+    quantities = {}
+    unlabelled_velocities = []
+    lowered = text.lower()
+    previous_end = 0
+
+    for match in QUANTITY_PATTERN.finditer(text):
+        unit = match.group("unit")
+        quantity, factor = _EXACT_UNITS.get(unit) or UNIT_LOOKUP.get(_unit_key(unit, False)) or UNIT_LOOKUP[_unit_key(unit, True)]
+        value = _to_float(match) * factor
+        start, end = match.span()
+
+        if quantity == "length" or quantity == "velocity":
+            # Cues only count if no other quantity sits between them and this number
+            before = lowered[max(previous_end, start - CONTEXT_WINDOW):start]
+            if quantity == "length":
+                quantity = "height" if HEIGHT_AFTER.match(lowered, end, end + 16) or HEIGHT_BEFORE.search(before) else "displacement"
+            else:
+                quantities.setdefault("velocity", []).append(value)
+                cue = None
+                for cue in VELOCITY_CUE.finditer(before):
+                    pass
+                if cue is None:
+                    unlabelled_velocities.append(value)
+                    previous_end = end
+                    continue
+                quantity = "initial_velocity" if cue.group("initial") else "final_velocity"
+
+        previous_end = end
+        quantities.setdefault(quantity, []).append(value)
+
+    if "rest" in lowered or "stop" in lowered or "halt" in lowered:
+        for phrase in REST_PHRASE.finditer(lowered):
+            if phrase.group("start"):
+                quantities.setdefault("initial_velocity", []).insert(0, 0.0)
+            else:
+                quantities.setdefault("final_velocity", []).append(0.0)
+
+    for value in unlabelled_velocities:
+        key = "final_velocity" if "initial_velocity" in quantities else "initial_velocity"
+        quantities.setdefault(key, []).append(value)
+
+    return quantities